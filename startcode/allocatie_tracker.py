@@ -0,0 +1,384 @@
+"""
+AllocatieTracker - Meet hoeveel geheugen elke frame aanmaakt (en hoe lang de garbage collector pauzeert).
+
+Elk object dat een frame aanmaakt en bijhoudt (een pygame.Rect, een lijst,
+een tekst...) telt mee voor de garbage collector: na genoeg nieuwe objecten
+stopt Python het spel even om op te ruimen. Dat zijn de pieken in de
+frametijd die de profiler niet aan één fase kan toewijzen.
+
+De tracker gebruikt tracemalloc:
+    per fase:  bytes die er na de fase meer zijn (netto) en de hoogste
+               piek tijdens de fase (ook tijdelijke objecten tellen mee)
+    per regel: een snapshot aan het begin en einde van elke frame; het
+               verschil zegt welke regel code hoeveel blokken aanmaakte
+en gc.callbacks voor de duur van elke garbage collection.
+
+Het meten is traag (elke allocatie wordt bijgehouden): enkel aanzetten om te zoeken.
+
+Gebruik:
+    python allocatie_tracker.py --frames 200            # spel met invoer
+    python allocatie_tracker.py --idle --frames 200     # idle frames: moet 0 allocaties geven
+"""
+from collections import deque, defaultdict
+import argparse
+import contextlib
+import gc
+import linecache
+import time
+import tracemalloc
+
+# Onze eigen allocaties (en die van tracemalloc) horen niet in het rapport, net als de
+# geschiedenis van de Profiler: die groeit tot zijn venster vol is
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "*/profiler.py"),
+    tracemalloc.Filter(False, "*/fnmatch.py"),  # fnmatch en re: de filters zelf worden de eerste keer gecompileerd
+    tracemalloc.Filter(False, "*/re/*.py"),
+    tracemalloc.Filter(False, "<frozen abc>"),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class _Fase:
+    """Een fase die nu loopt (zie AllocatieTracker.begin_fase)."""
+
+    __slots__ = ("naam", "start", "piek")
+
+    def __init__(self):
+        self.naam = None
+        self.start = 0
+        self.piek = 0
+
+
+class AllocatieTracker:
+    """
+    Houdt per frame bij hoeveel geheugen er aangemaakt wordt, per fase en per regel code.
+
+    # Gebruik: tracker = AllocatieTracker(game.profiler); tracker.start()
+    # De fasen zijn die van de Profiler (with profiler.fase(...)): de profiler
+    # meldt het begin en einde van elke fase en frame aan de tracker.
+    """
+
+    def __init__(self, profiler, venster: int = 120, diepte: int = 1, met_regels: bool = True):
+        """
+        Initialiseer de tracker.
+
+        Args:
+            profiler: De Profiler van de game (wordt aangezet)
+            venster: Aantal frames voor de gemiddelden
+            diepte: Aantal stack frames dat tracemalloc per allocatie bewaart (1 = enkel de regel zelf)
+            met_regels: Ook per regel code meten (twee snapshots per frame: traag, en de snapshots
+                        zelf laten de garbage collector vaker lopen)
+        """
+        self.profiler = profiler
+        self.venster = venster
+        self.diepte = diepte
+        self.met_regels = met_regels
+        self.actief = False
+
+        self.frames = deque(maxlen=venster)  # per frame: {fase: (netto bytes, piek bytes)}
+        self.regels = deque(maxlen=venster)  # per frame: {(bestand, regel): (bytes, blokken)}
+        self.gc_pauzes = deque(maxlen=1000)  # (generatie, duur in ns, frame nummer)
+        self.frame_nummer = 0
+
+        self._snapshot = None
+        self._eerste_snapshot = False
+        self._frame_fasen = {}
+        # Vooraf aangemaakte _Fase objecten: zelf niets alloceren tijdens het meten
+        self._stapel = [_Fase() for _ in range(32)]
+        self._diepte_nu = 0
+        self._gc_start = 0
+        self._eigen_tracing = False  # of wij tracemalloc gestart hebben (en het dus ook stoppen)
+
+
+    def start(self):
+        """Begin met meten (ook de profiler gaat aan)."""
+        if self.actief:
+            return
+        self.actief = True
+        self._eigen_tracing = not tracemalloc.is_tracing()
+        if self._eigen_tracing:
+            tracemalloc.start(self.diepte)
+        gc.callbacks.append(self._gc_callback)
+        self.profiler.allocaties = self
+        self.profiler.actief = True
+
+
+    def stop(self):
+        """Stop met meten."""
+        if not self.actief:
+            return
+        self.actief = False
+        gc.callbacks.remove(self._gc_callback)
+        self.profiler.allocaties = None
+        self._snapshot = None
+        if self._eigen_tracing:
+            tracemalloc.stop()
+
+
+    def _gc_callback(self, fase: str, info: dict):
+        if fase == "start":
+            self._gc_start = time.perf_counter_ns()
+        else:
+            self.gc_pauzes.append((info["generation"], time.perf_counter_ns() - self._gc_start, self.frame_nummer))
+
+
+    def begin_frame(self):
+        """Markeer het begin van een frame (via Profiler.begin_frame)."""
+        self._frame_fasen = {}
+        self._diepte_nu = 0
+        if self.met_regels and self._snapshot is None:
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+            self._eerste_snapshot = True
+
+
+    def einde_frame(self):
+        """Markeer het einde van een frame en bewaar het verschil per regel (via Profiler.einde_frame)."""
+        self.frames.append(self._frame_fasen)
+        self.frame_nummer += 1
+        if self._snapshot is None:
+            return
+        na = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        if self._eerste_snapshot:
+            # Het eerste snapshot kwam uit begin_frame, niet uit einde_frame zoals de rest: deze frame is enkel het vertrekpunt
+            self._eerste_snapshot = False
+            self._snapshot = na
+            return
+        regels = {}
+        for verschil in na.compare_to(self._snapshot, "lineno"):
+            if verschil.size_diff or verschil.count_diff:
+                frame = verschil.traceback[0]
+                regels[(frame.filename, frame.lineno)] = (verschil.size_diff, verschil.count_diff)
+        self.regels.append(regels)
+        # Het einde van deze frame is het begin van de volgende: wat tussen twee frames gebeurt, telt ook mee
+        self._snapshot = na
+
+
+    def begin_fase(self, naam: str):
+        """Markeer het begin van een fase (via Profiler.fase)."""
+        if self._diepte_nu >= len(self._stapel):
+            return
+        huidig, piek = tracemalloc.get_traced_memory()
+        # reset_peak() hieronder wist ook de piek van de fasen rond deze fase: eerst bij hen bewaren
+        for nummer in range(self._diepte_nu):
+            fase = self._stapel[nummer]
+            fase.piek = max(fase.piek, piek)
+        fase = self._stapel[self._diepte_nu]
+        fase.naam, fase.start, fase.piek = naam, huidig, huidig
+        self._diepte_nu += 1
+        tracemalloc.reset_peak()
+
+
+    def einde_fase(self):
+        """Markeer het einde van de laatst begonnen fase."""
+        if not self._diepte_nu:
+            return
+        huidig, piek = tracemalloc.get_traced_memory()
+        self._diepte_nu -= 1
+        fase = self._stapel[self._diepte_nu]
+        netto, hoogste = self._frame_fasen.get(fase.naam, (0, 0))
+        self._frame_fasen[fase.naam] = (netto + huidig - fase.start, max(hoogste, max(fase.piek, piek) - fase.start))
+
+
+    def per_fase(self) -> dict[str, tuple[float, float]]:
+        """
+        Gemiddelde per fase over het venster.
+
+        Returns:
+            {fase: (netto bytes per frame, gemiddelde piek in bytes)}
+        """
+        if not self.frames:
+            return {}
+        netto, piek = defaultdict(int), defaultdict(int)
+        for fasen in self.frames:
+            for naam, (bytes_netto, bytes_piek) in fasen.items():
+                netto[naam] += bytes_netto
+                piek[naam] += bytes_piek
+        return {naam: (netto[naam] / len(self.frames), piek[naam] / len(self.frames)) for naam in netto}
+
+
+    def per_regel(self, aantal: int = 10) -> list[tuple[str, int, float, float]]:
+        """
+        De regels code die het meest aanmaken, gemiddeld over het venster.
+
+        Returns:
+            Lijst van (bestand, regel, bytes per frame, blokken per frame), meeste blokken eerst
+        """
+        if not self.regels:
+            return []
+        totalen = defaultdict(lambda: [0, 0])
+        for regels in self.regels:
+            for sleutel, (grootte, blokken) in regels.items():
+                totalen[sleutel][0] += grootte
+                totalen[sleutel][1] += blokken
+        frames = len(self.regels)
+        resultaat = [
+            (bestand, regel, grootte / frames, blokken / frames)
+            for (bestand, regel), (grootte, blokken) in totalen.items()
+        ]
+        resultaat.sort(key=lambda item: abs(item[3]), reverse=True)
+        return resultaat[:aantal]
+
+
+    def per_frame(self) -> tuple[float, float]:
+        """
+        Gemiddeld aantal (bytes, blokken) dat een frame netto aanmaakt.
+        """
+        if not self.regels:
+            return 0.0, 0.0
+        grootte = sum(waarde[0] for regels in self.regels for waarde in regels.values())
+        blokken = sum(waarde[1] for regels in self.regels for waarde in regels.values())
+        return grootte / len(self.regels), blokken / len(self.regels)
+
+
+    def controleer_geen_allocaties(self, frames: int | None = None, tolerantie: float = 0.02):
+        """
+        Controleer dat de laatste frames niets aangemaakt hebben (bv. in een test van idle frames).
+
+        # Netto over alle frames samen: een object dat in de ene frame gemaakt en in de
+        # volgende opgeruimd wordt, telt niet. De tolerantie is voor de vrije lijsten van
+        # Python: een opgeruimde dict (bv. die van een gc.callback) blijft soms bewaard.
+
+        Args:
+            frames: Aantal laatste frames om te controleren, of None voor het hele venster
+            tolerantie: Aantal blokken per frame dat een regel mag aanmaken
+
+        Raises:
+            AssertionError: Met de regels die toch iets aanmaakten
+        """
+        laatste = list(self.regels)[-frames:] if frames else list(self.regels)
+        netto = defaultdict(int)
+        for regels in laatste:
+            for sleutel, (_, blokken) in regels.items():
+                netto[sleutel] += blokken
+        schuldig = sorted(((sleutel, blokken) for sleutel, blokken in netto.items() if blokken > tolerantie * len(laatste)),
+                          key=lambda item: item[1], reverse=True)
+        if schuldig:
+            uitleg = ", ".join(f"{bestand}:{regel} ({blokken} blokken)" for (bestand, regel), blokken in schuldig[:5])
+            raise AssertionError(f"allocaties in {len(laatste)} frames: {uitleg}")
+
+
+    def rapport(self, aantal: int = 10) -> str:
+        """Het rapport als tekst (per fase, per frame, per regel en de GC pauzes)."""
+        regels = ["per fase (bytes/frame: netto, piek):"]
+        for naam, (netto, piek) in sorted(self.per_fase().items(), key=lambda item: item[1][1], reverse=True):
+            regels.append(f"  {naam:<20} {netto:>10.0f} {piek:>10.0f}")
+
+        if self.regels:
+            grootte, blokken = self.per_frame()
+            regels.append(f"per frame (netto, {len(self.regels)} frames): {grootte:.0f} bytes, {blokken:.1f} blokken")
+            regels.append("per regel (bytes/frame, blokken/frame):")
+            for bestand, regel, grootte, blokken in self.per_regel(aantal):
+                code = linecache.getline(bestand, regel).strip()
+                regels.append(f"  {bestand}:{regel} {grootte:>9.0f} {blokken:>7.2f}  {code}")
+
+        if self.gc_pauzes:
+            per_generatie = defaultdict(list)
+            for generatie, duur, _ in self.gc_pauzes:
+                per_generatie[generatie].append(duur / 1_000_000)
+            regels.append("GC pauzes (ms):")
+            for generatie, duren in sorted(per_generatie.items()):
+                regels.append(f"  generatie {generatie}: {len(duren)}x, totaal {sum(duren):.2f}, max {max(duren):.2f}")
+        else:
+            regels.append("GC pauzes: geen")
+        return "\n".join(regels)
+
+
+class NepKlok:
+    """
+    Vervangt de time module in main.py: perf_counter() gaat enkel vooruit als wij dat zeggen.
+    Zo telt _tel_sim_stappen elke idle frame even veel simulatiestappen, hoe traag het meten ook is.
+    """
+
+    def __init__(self):
+        self.tijd = time.perf_counter()
+
+
+    def perf_counter(self) -> float:
+        return self.tijd
+
+
+    def __getattr__(self, naam: str):
+        return getattr(time, naam)
+
+
+@contextlib.contextmanager
+def nep_klok():
+    """Gebruik een NepKlok in main.py zolang het with-blok loopt."""
+    import main
+    klok = NepKlok()
+    echte_time, main.time = main.time, klok
+    try:
+        yield klok
+    finally:
+        main.time = echte_time
+
+
+def speel_idle(game, frames: int, klok: NepKlok):
+    """
+    Laat de game idle frames doen, langs dezelfde weg als Game.run: events uit wacht_op_events
+    en zoveel simulatiestappen als de (nep) tijd zegt.
+
+    # Zonder input en zonder timer zou wacht_op_events voor altijd slapen. Elke frame komt
+    # er daarom een leeg event binnen (zoals een timer die afgaat), en gaat de klok één
+    # frame vooruit.
+    """
+    import pygame
+    from config import FPS
+    wekker = pygame.event.Event(pygame.USEREVENT)
+    for _ in range(frames):
+        klok.tijd += 1 / FPS
+        pygame.event.post(wekker)
+        events = None
+        if game.idle_modus and not game.is_geanimeerd():
+            events = game.wacht_op_events()
+        game.stap(fps=0, events=events)
+
+
+def main():
+    # Hier pas importeren: main.py gebruikt deze module ook
+    import pygame
+    from benchmark import maak_game, INVOER_SCRIPT
+
+    parser = argparse.ArgumentParser(description="Meet de allocaties per frame van de game loop (headless)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--opwarmen", type=int, default=100, help="frames voor het meten (caches vullen)")
+    parser.add_argument("--npcs", type=int, default=100)
+    parser.add_argument("--kaart", default="200x200")
+    parser.add_argument("--idle", action="store_true", help="idle frames zonder invoer: controleer dat er niets aangemaakt wordt")
+    parser.add_argument("--regels", type=int, default=15, help="aantal regels code in het rapport (0 = niet per regel meten)")
+    args = parser.parse_args()
+
+    breedte, hoogte = (int(waarde) for waarde in args.kaart.lower().split("x"))
+    game = maak_game(args.npcs, breedte, hoogte, 60, 3)
+    game.idle_modus = args.idle
+
+    def speel(frames: int):
+        for frame in range(frames):
+            toets, unicode = INVOER_SCRIPT[frame % len(INVOER_SCRIPT)]
+            event = pygame.event.Event(pygame.KEYDOWN, key=toets, unicode=unicode, mod=0, scancode=0)
+            game.stap(fps=0, events=[event], sim_stappen=1)
+
+    tracker = AllocatieTracker(game.profiler, venster=args.frames, met_regels=args.regels > 0)
+    with nep_klok() as klok:
+        if args.idle:
+            speel_idle(game, args.opwarmen, klok)
+            tracker.start()
+            speel_idle(game, args.frames, klok)
+        else:
+            speel(args.opwarmen)
+            tracker.start()
+            speel(args.frames)
+        tracker.stop()
+    print(tracker.rapport(args.regels))
+    if args.idle and args.regels > 0:
+        tracker.controleer_geen_allocaties()
+        print("idle frames: geen allocaties")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
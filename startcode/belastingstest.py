@@ -0,0 +1,139 @@
+"""
+Belastingstest - Honderden nep-spelers tegelijk op de multiplayer server.
+
+Elke nep-speler verbindt, stuurt een willekeurige stap, wacht tot de
+server antwoordt (zijn nieuwe positie, of een tekst als de stap niet kon)
+en wacht dan even voor de volgende stap, zoals een echte speler.
+
+We meten:
+    latentie:     tijd tussen het versturen van een stap en het antwoord
+                  (inclusief het wachten op de volgende simulatiestap)
+    bandbreedte:  bytes die de server naar de spelers stuurt
+
+Gebruik:
+    python server.py --kaart 200x200 --statistiek &
+    python belastingstest.py --spelers 300 --seconden 20
+
+    python belastingstest.py --spelers 30 --start-server   # start zelf een server
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from padvinding import RICHTINGEN
+import protocol
+
+
+class NepSpeler:
+    """Eén nep-speler met zijn eigen verbinding."""
+
+    def __init__(self, nummer: int):
+        self.toeval = random.Random(nummer)
+        self.latenties = []  # seconden per stap
+        self.ontvangen_bytes = 0
+        self.nummer = None  # nummer van ons karakter op de server
+        self._verstuurd = None  # tijdstip waarop de laatste stap vertrok
+        self._antwoord = asyncio.Event()
+
+
+    async def speel(self, host: str, poort: int, einde: float, denktijd: float):
+        reader, writer = await asyncio.open_connection(host, poort)
+        try:
+            lezer = asyncio.create_task(self._lees(reader))
+            await self._antwoord.wait()  # WELKOM
+            while time.perf_counter() < einde and not lezer.done():
+                self._antwoord.clear()
+                self._verstuurd = time.perf_counter()
+                writer.write(protocol.frame(protocol.record(protocol.BEWEEG, *self.toeval.choice(RICHTINGEN))))
+                try:
+                    await asyncio.wait_for(self._antwoord.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass  # bv. de stap was naar een tile waar we al stonden: geen antwoord
+                await asyncio.sleep(self.toeval.uniform(0.5, 1.5) * denktijd)
+            lezer.cancel()
+        finally:
+            writer.close()
+
+
+    async def _lees(self, reader):
+        try:
+            while True:
+                data = await protocol.lees_frame(reader)
+                self.ontvangen_bytes += protocol.FRAME.size + len(data)
+                nu = time.perf_counter()
+                for velden in protocol.lees_records(data):
+                    soort = velden[0]
+                    if soort == protocol.WELKOM:
+                        self.nummer = velden[1]
+                        self._antwoord.set()
+                    elif self._verstuurd is not None and (
+                        soort == protocol.TEKST_VOOR_SPELER or (soort == protocol.BEWOGEN and velden[1] == self.nummer)
+                    ):
+                        self.latenties.append(nu - self._verstuurd)
+                        self._verstuurd = None
+                        self._antwoord.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+
+def percentiel(waarden: list[float], fractie: float) -> float:
+    waarden = sorted(waarden)
+    return waarden[min(len(waarden) - 1, int(len(waarden) * fractie))]
+
+
+async def belast(host: str, poort: int, spelers: int, seconden: float, denktijd: float):
+    nep_spelers = [NepSpeler(nummer) for nummer in range(spelers)]
+    start = time.perf_counter()
+    einde = start + seconden
+    taken = []
+    for nep_speler in nep_spelers:
+        taken.append(asyncio.create_task(nep_speler.speel(host, poort, einde, denktijd)))
+        await asyncio.sleep(0.005)  # niet iedereen in dezelfde milliseconde laten verbinden
+    resultaten = await asyncio.gather(*taken, return_exceptions=True)
+    duur = time.perf_counter() - start
+
+    fouten = [resultaat for resultaat in resultaten if isinstance(resultaat, Exception)]
+    latenties = [latentie for nep_speler in nep_spelers for latentie in nep_speler.latenties]
+    ontvangen = sum(nep_speler.ontvangen_bytes for nep_speler in nep_spelers)
+
+    print(f"{spelers} spelers, {duur:.1f} s, {len(latenties)} stappen ({len(latenties) / duur:.0f} per seconde)")
+    if latenties:
+        print(f"latentie: mediaan {statistics.median(latenties) * 1000:.1f} ms, "
+              f"p99 {percentiel(latenties, 0.99) * 1000:.1f} ms, max {max(latenties) * 1000:.1f} ms")
+    print(f"bandbreedte: {ontvangen / duur / 1024:.1f} KB/s in totaal, {ontvangen / duur / spelers / 1024:.2f} KB/s per speler")
+    if fouten:
+        print(f"{len(fouten)} spelers konden niet spelen, bv. {fouten[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Belastingstest voor de multiplayer server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--poort", type=int, default=5555)
+    parser.add_argument("--spelers", type=int, default=300)
+    parser.add_argument("--seconden", type=float, default=20)
+    parser.add_argument("--denktijd", type=float, default=0.25, help="gemiddelde tijd tussen twee stappen van een speler")
+    parser.add_argument("--start-server", action="store_true", help="start zelf een server (en stop hem op het einde)")
+    parser.add_argument("--kaart", default="200x200", help="kaartgrootte voor de zelf gestarte server")
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        server = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+            "--host", args.host, "--poort", str(args.poort), "--kaart", args.kaart, "--statistiek",
+        ])
+        time.sleep(2)  # tijd om te starten
+    try:
+        asyncio.run(belast(args.host, args.poort, args.spelers, args.seconden, args.denktijd))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
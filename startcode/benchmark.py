@@ -0,0 +1,121 @@
+"""
+Benchmark - Meet hoe snel de game loop draait, zonder venster.
+
+Het spel draait headless (SDL dummy video driver) met een vast script van
+toetsaanslagen en zonder FPS limiet. Per combinatie van aantal NPCs,
+kaartgrootte en lengte van bericht/inventory krijg je frames per seconde,
+percentielen van de frametijd en de tijd per fase van de game loop
+(gemeten met de Profiler).
+
+Gebruik:
+    python benchmark.py --npcs 0 100 1000 --kaart 20x15 200x200 --frames 300
+    python benchmark.py --json resultaten.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import pygame
+from main import Game
+from models.karakter import Karakter
+from config import COLORS
+from profiler import Profiler
+
+# Vast invoerscript: rondje lopen, praten (E) en typen (T + tekst + Enter)
+INVOER_SCRIPT = (
+    [(pygame.K_RIGHT, "")] * 5 + [(pygame.K_DOWN, "")] * 5
+    + [(pygame.K_LEFT, "")] * 5 + [(pygame.K_UP, "")] * 5
+    + [(pygame.K_e, "e"), (pygame.K_t, "t")]
+    + [(ord(letter), letter) for letter in "hallo"]
+    + [(pygame.K_RETURN, "\r")]
+)
+
+
+def maak_game(aantal_npcs: int, breedte: int, hoogte: int, bericht_lengte: int, inventory_lengte: int, seed: int = 1) -> Game:
+    """Maak een headless game met extra NPCs op willekeurige vrije tiles."""
+    game = Game(breedte, hoogte, headless=True)
+    game.idle_modus = False  # elke frame tekenen: we willen de volle game loop meten
+    willekeurig = random.Random(seed)
+
+    vrije_tiles = [
+        (x, y)
+        for y in range(hoogte) for x in range(breedte)
+        if not game.tilemap.is_blokkade(x, y) and not game.is_npc_op_positie(x, y)
+        and (x, y) != (game.speler.x_tile, game.speler.y_tile)
+    ]
+    for nummer, (x, y) in enumerate(willekeurig.sample(vrije_tiles, min(aantal_npcs, len(vrije_tiles)))):
+        game.voeg_npc_toe(Karakter(f"NPC{nummer}", 15, x, y, COLORS["groen"], "Hallo!"))
+
+    game.bericht = ("Dit is een lang bericht. " * (bericht_lengte // 25 + 1))[:bericht_lengte]
+    game.speler.inventory.extend(f"item{nummer}" for nummer in range(inventory_lengte))
+    return game
+
+
+def meet(game: Game, frames: int) -> dict:
+    """
+    Laat de game een aantal frames draaien en meet de tijden.
+
+    Returns:
+        Dictionary met fps, percentielen (ms) en gemiddelde tijd per fase (ms per frame)
+    """
+    game.profiler = Profiler(venster=frames, actief=True, details=False, max_trace_frames=0)
+
+    frametijden = []
+    for frame in range(frames):
+        toets, unicode = INVOER_SCRIPT[frame % len(INVOER_SCRIPT)]
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=toets, unicode=unicode, mod=0, scancode=0))
+
+        start = time.perf_counter()
+        game.stap(fps=0, sim_stappen=1)  # één vaste simulatiestap per frame: elke toets wordt meteen uitgevoerd
+        frametijden.append((time.perf_counter() - start) * 1000)
+
+    percentielen = statistics.quantiles(frametijden, n=100)
+    return {
+        "fps": len(frametijden) / (sum(frametijden) / 1000),
+        "p50_ms": percentielen[49],
+        "p95_ms": percentielen[94],
+        "p99_ms": percentielen[98],
+        "max_ms": max(frametijden),
+        "fasen_ms": dict(sorted(game.profiler.gemiddelden().items())),
+    }
+
+
+def lees_kaartgrootte(tekst: str) -> tuple[int, int]:
+    """Zet '200x150' om naar (200, 150)."""
+    breedte, hoogte = tekst.lower().split("x")
+    return int(breedte), int(hoogte)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark van de game loop")
+    parser.add_argument("--npcs", type=int, nargs="+", default=[0, 100, 1000])
+    parser.add_argument("--kaart", type=lees_kaartgrootte, nargs="+", default=[(20, 15), (200, 200)])
+    parser.add_argument("--bericht", type=int, default=60, help="lengte van het HUD bericht")
+    parser.add_argument("--inventory", type=int, default=3, help="aantal items in de inventory")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--json", help="schrijf de resultaten ook naar dit bestand")
+    args = parser.parse_args()
+
+    resultaten = []
+    print(f"{'npcs':>6} {'kaart':>11} {'fps':>8} {'p50':>7} {'p95':>7} {'p99':>7}  fasen (ms/frame)")
+    for breedte, hoogte in args.kaart:
+        for aantal_npcs in args.npcs:
+            game = maak_game(aantal_npcs, breedte, hoogte, args.bericht, args.inventory)
+            resultaat = meet(game, args.frames)
+            resultaat.update(npcs=aantal_npcs, kaart=f"{breedte}x{hoogte}", bericht=args.bericht, inventory=args.inventory)
+            resultaten.append(resultaat)
+
+            fasen = " ".join(f"{fase}={tijd:.3f}" for fase, tijd in resultaat["fasen_ms"].items())
+            print(f"{aantal_npcs:>6} {breedte:>5}x{hoogte:<5} {resultaat['fps']:>8.0f} "
+                  f"{resultaat['p50_ms']:>7.3f} {resultaat['p95_ms']:>7.3f} {resultaat['p99_ms']:>7.3f}  {fasen}")
+
+    pygame.quit()
+
+    if args.json:
+        with open(args.json, "w") as bestand:
+            json.dump(resultaten, bestand, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Bewaren - Bewaar en laad de toestand van het spel in een binair bestand.
+
+Opbouw van een bewaarbestand:
+    header:     magic b"RPGS", versie, aantal karakters, aantal gewijzigde tiles
+    karakters:  per karakter (speler eerst) x, y, vlaggen, kleur, type/naam en inventory
+    tiles:      tiles die verschillen van de kaart bij de start (x, y, code)
+    deltas:     daarna kleine records met wat er sindsdien veranderd is
+
+Autosave schrijft enkel nieuwe deltas achteraan het bestand. Pas als er
+veel deltas zijn, wordt een nieuwe volledige snapshot geschreven. Het
+schrijven zelf gebeurt in een achtergrond thread, zodat de game loop
+niet hoeft te wachten op de schijf.
+"""
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import struct
+
+MAGIC = b"RPGS"
+VERSIE = 2
+HEADER = struct.Struct("<4sHII")  # magic, versie, aantal karakters, aantal tiles
+KARAKTER = struct.Struct("<iiBBBBH")  # x, y, vlaggen, kleur (r, g, b), aantal items in de inventory
+TEKST = struct.Struct("<H")  # lengte van een utf-8 tekst
+TILE = struct.Struct("<iiB")  # x, y, code
+
+# Delta records: één byte met het soort record, dan de gegevens
+DELTA_POSITIE = 1
+DELTA_VLAGGEN = 2
+DELTA_INVENTORY = 3
+DELTA_TILE = 4
+DELTA_KLEUR = 5
+POSITIE = struct.Struct("<BHii")  # soort, karakter nummer, x, y
+VLAGGEN = struct.Struct("<BHB")  # soort, karakter nummer, vlaggen
+INVENTORY = struct.Struct("<BHH")  # soort, karakter nummer, aantal items (gevolgd door de items)
+TILE_DELTA = struct.Struct("<BiiB")  # soort, x, y, code
+KLEUR = struct.Struct("<BHBBB")  # soort, karakter nummer, r, g, b
+
+
+def _tekst(tekst: str) -> bytes:
+    data = tekst.encode("utf-8")
+    return TEKST.pack(len(data)) + data
+
+
+def _lees_tekst(data, positie: int) -> tuple[str, int]:
+    (lengte,) = TEKST.unpack_from(data, positie)
+    positie += TEKST.size
+    return bytes(data[positie:positie + lengte]).decode("utf-8"), positie + lengte
+
+
+def _inventory(items) -> bytes:
+    return b"".join(_tekst(item) for item in items)
+
+
+def _lees_inventory(data, positie: int, aantal: int) -> tuple[list[str], int]:
+    items = []
+    for _ in range(aantal):
+        item, positie = _lees_tekst(data, positie)
+        items.append(item)
+    return items, positie
+
+
+class Bewaarbestand:
+    """
+    Bewaart de speler, de NPCs en gewijzigde tiles van een Game.
+
+    # We onthouden wat er bij de vorige keer bewaren in het bestand stond.
+    # Bij autosave vergelijken we daarmee en schrijven we enkel de verschillen
+    # (deltas). Enkel karakters die de EntiteitOpslag als gewijzigd markeerde
+    # (beweeg, plaats, vlaggen, kleur, inventory) worden vergeleken.
+    # Karakters worden in het bestand genummerd: 0 = speler, daarna de NPCs
+    # in de volgorde van game.npcs.
+    """
+
+    def __init__(self, pad: str, max_delta_bytes: int = 64 * 1024):
+        """
+        Initialiseer het bewaarbestand.
+
+        Args:
+            pad: Pad van het bestand
+            max_delta_bytes: Na zoveel bytes aan deltas wordt een nieuwe snapshot geschreven
+        """
+        self.pad = pad
+        self.max_delta_bytes = max_delta_bytes
+        self._schrijver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bewaren")  # één thread: schrijfopdrachten blijven in volgorde
+        self._tilemap = None
+
+        self._karakters = None  # karakters zoals ze genummerd zijn in het bestand
+        self._nummers = {}  # index in de EntiteitOpslag -> nummer in het bestand
+        # Wat er in het bestand staat, per index in de EntiteitOpslag: kopieën van de arrays
+        # bij de laatste snapshot, bijgewerkt met de deltas (inventory enkel als die niet leeg is)
+        self._bewaard_x = self._bewaard_y = self._bewaard_vlaggen = None
+        self._bewaard_kleur = []
+        self._bewaard_inventory = {}
+        self._tiles = {}  # (x, y) -> code, alle tiles die verschillen van de start
+        self._nieuwe_tiles = {}  # tiles die veranderd zijn sinds de vorige keer bewaren
+        self._delta_bytes = 0
+
+
+    def koppel(self, game):
+        """Volg de tile wijzigingen van een game (roep dit op vóór laad of bewaar)."""
+        self._tilemap = game.tilemap
+        game.tilemap.luisteraars.append(self._tile_gewijzigd)
+
+
+    def _tile_gewijzigd(self, x_tile: int, y_tile: int, code: int):
+        self._tiles[(x_tile, y_tile)] = code
+        self._nieuwe_tiles[(x_tile, y_tile)] = code
+
+
+    def bewaar(self, game, volledig: bool = False):
+        """
+        Bewaar de game: enkel de deltas, of een nieuwe snapshot als dat nodig is.
+        Het schrijven gebeurt op de achtergrond.
+
+        Args:
+            game: Het Game object
+            volledig: True = altijd een volledige snapshot schrijven
+
+        Returns:
+            Een Future die klaar is als alles op de schijf staat
+        """
+        karakters = [game.speler] + game.npcs
+        opslag = game.opslag
+        gewijzigd = opslag.neem_gewijzigd()
+        if volledig or karakters != self._karakters or self._delta_bytes > self.max_delta_bytes:
+            return self._bewaar_snapshot(karakters, opslag)
+
+        records = []
+        for index in sorted(gewijzigd & self._nummers.keys(), key=self._nummers.__getitem__):
+            nummer = self._nummers[index]
+            x, y, vlaggen = opslag.x[index], opslag.y[index], opslag.vlaggen[index]
+            kleur = tuple(opslag.kleur[index][:3])
+            inventory = karakters[nummer].inventory_inhoud()
+            if x != self._bewaard_x[index] or y != self._bewaard_y[index]:
+                records.append(POSITIE.pack(DELTA_POSITIE, nummer, x, y))
+                self._bewaard_x[index], self._bewaard_y[index] = x, y
+            if vlaggen != self._bewaard_vlaggen[index]:
+                records.append(VLAGGEN.pack(DELTA_VLAGGEN, nummer, vlaggen))
+                self._bewaard_vlaggen[index] = vlaggen
+            if kleur != tuple(self._bewaard_kleur[index][:3]):
+                records.append(KLEUR.pack(DELTA_KLEUR, nummer, *kleur))
+                self._bewaard_kleur[index] = kleur
+            if inventory != self._bewaard_inventory.get(index, ()):
+                records.append(INVENTORY.pack(DELTA_INVENTORY, nummer, len(inventory)) + _inventory(inventory))
+                if inventory:
+                    self._bewaard_inventory[index] = inventory
+                else:
+                    self._bewaard_inventory.pop(index, None)
+
+        for (x, y), code in self._nieuwe_tiles.items():
+            records.append(TILE_DELTA.pack(DELTA_TILE, x, y, code))
+        self._nieuwe_tiles.clear()
+
+        data = b"".join(records)
+        self._delta_bytes += len(data)
+        return self._schrijver.submit(self._voeg_toe, data)
+
+
+    def _bewaar_snapshot(self, karakters: list, opslag):
+        # Hier enkel de arrays kopiëren (dat gaat snel), het inpakken gebeurt in de schrijf thread
+        self._karakters = karakters
+        indexen = [karakter.index for karakter in karakters]
+        self._nummers = dict(zip(indexen, range(len(indexen))))
+        inventories = {}
+        for karakter in karakters:
+            inventory = karakter.inventory_inhoud()
+            if inventory:
+                inventories[karakter.index] = inventory
+        self._bewaard_x, self._bewaard_y, self._bewaard_vlaggen = opslag.x[:], opslag.y[:], opslag.vlaggen[:]
+        self._bewaard_kleur = opslag.kleur[:]
+        self._bewaard_inventory = dict(inventories)
+        self._nieuwe_tiles.clear()
+        self._delta_bytes = 0
+
+        # De schrijf thread krijgt eigen kopieën: de deltas passen die van hierboven aan
+        return self._schrijver.submit(self._schrijf_snapshot, karakters, indexen, opslag.x[:], opslag.y[:], opslag.vlaggen[:],
+                                      opslag.kleur[:], inventories, list(self._tiles.items()))
+
+
+    def _schrijf_snapshot(self, karakters, indexen, x, y, vlaggen, kleur, inventories, tiles):
+        delen = [HEADER.pack(MAGIC, VERSIE, len(karakters), len(tiles))]
+        for karakter, index in zip(karakters, indexen):
+            inventory = inventories.get(index, ())
+            delen.append(KARAKTER.pack(x[index], y[index], vlaggen[index], *kleur[index][:3], len(inventory)))
+            delen.append(_tekst(f"{type(karakter).__name__}/{karakter.naam}"))
+            delen.append(_inventory(inventory))
+        for (tile_x, tile_y), code in tiles:
+            delen.append(TILE.pack(tile_x, tile_y, code))
+        self._vervang(b"".join(delen))
+
+
+    def _voeg_toe(self, data: bytes):
+        if not data:
+            return
+        with open(self.pad, "ab") as bestand:
+            bestand.write(data)
+            bestand.flush()
+            os.fsync(bestand.fileno())
+
+
+    def _vervang(self, data: bytes):
+        # Eerst naar een tijdelijk bestand: als het spel crasht tijdens het schrijven blijft de oude save heel
+        tijdelijk = self.pad + ".tmp"
+        with open(tijdelijk, "wb") as bestand:
+            bestand.write(data)
+            bestand.flush()
+            os.fsync(bestand.fileno())
+        os.replace(tijdelijk, self.pad)
+
+
+    def laad(self, game) -> bool:
+        """
+        Zet de game in de bewaarde toestand (snapshot + alle deltas).
+        Karakters worden teruggevonden op type en naam; wat niet meer bestaat, wordt overgeslagen.
+
+        Returns:
+            True als er een bewaarbestand was, anders False
+
+        Raises:
+            ValueError: Als het bestand geen (geldig) bewaarbestand is. Het wordt dan hernoemd
+                naar <pad>.bad, zodat de volgende autosave het niet overschrijft.
+        """
+        try:
+            return self._laad(game)
+        except ValueError as fout:
+            kapot = self.pad + ".bad"
+            os.replace(self.pad, kapot)
+            raise ValueError(f"{fout} (opzij gezet als {kapot})") from fout
+
+
+    def _laad(self, game) -> bool:
+        self.wacht()
+        try:
+            with open(self.pad, "rb") as bestand:
+                data = memoryview(bestand.read())
+        except FileNotFoundError:
+            return False
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"{self.pad} is geen bewaarbestand")
+        magic, versie, aantal_karakters, aantal_tiles = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or versie != VERSIE:
+            raise ValueError(f"{self.pad} is geen bewaarbestand (versie {VERSIE})")
+        if HEADER.size + aantal_karakters * KARAKTER.size + aantal_tiles * TILE.size > len(data):
+            raise ValueError(f"{self.pad} is beschadigd (te kort voor {aantal_karakters} karakters en {aantal_tiles} tiles)")
+        positie = HEADER.size
+        kaart = game.tilemap.botsing
+
+        # Karakters in het bestand koppelen aan karakters in de game
+        beschikbaar = defaultdict(deque)
+        for karakter in [game.speler] + game.npcs:
+            beschikbaar[f"{type(karakter).__name__}/{karakter.naam}"].append(karakter)
+
+        gekoppeld = []  # nummer in het bestand -> karakter (of None)
+        staten = []  # nummer -> [x, y, vlaggen, kleur, inventory]
+        tiles = {}
+        try:
+            for _ in range(aantal_karakters):
+                x, y, vlaggen, r, g, b, aantal_items = KARAKTER.unpack_from(data, positie)
+                self._controleer_positie(kaart, x, y, positie)
+                sleutel, positie = _lees_tekst(data, positie + KARAKTER.size)
+                inventory, positie = _lees_inventory(data, positie, aantal_items)
+                kandidaten = beschikbaar.get(sleutel)
+                gekoppeld.append(kandidaten.popleft() if kandidaten else None)
+                staten.append([x, y, vlaggen, (r, g, b), inventory])
+
+            for _ in range(aantal_tiles):
+                x, y, code = TILE.unpack_from(data, positie)
+                self._controleer_positie(kaart, x, y, positie)
+                tiles[(x, y)] = code
+                positie += TILE.size
+        except (struct.error, UnicodeDecodeError) as fout:
+            # De snapshot wordt in één keer geschreven (via een tijdelijk bestand): als die stuk is, is het hele bestand stuk
+            raise ValueError(f"{self.pad} is beschadigd: {fout}") from fout
+
+        # Deltas: enkel de laatste waarde telt, dus eerst alles verzamelen en dan één keer toepassen
+        while positie < len(data):
+            soort = data[positie]
+            try:
+                if soort == DELTA_POSITIE:
+                    _, nummer, x, y = POSITIE.unpack_from(data, positie)
+                    self._controleer_nummer(staten, nummer, positie)
+                    self._controleer_positie(kaart, x, y, positie)
+                    staten[nummer][0:2] = x, y
+                    positie += POSITIE.size
+                elif soort == DELTA_VLAGGEN:
+                    _, nummer, vlaggen = VLAGGEN.unpack_from(data, positie)
+                    self._controleer_nummer(staten, nummer, positie)
+                    staten[nummer][2] = vlaggen
+                    positie += VLAGGEN.size
+                elif soort == DELTA_INVENTORY:
+                    _, nummer, aantal_items = INVENTORY.unpack_from(data, positie)
+                    self._controleer_nummer(staten, nummer, positie)
+                    staten[nummer][4], positie = _lees_inventory(data, positie + INVENTORY.size, aantal_items)
+                elif soort == DELTA_KLEUR:
+                    _, nummer, r, g, b = KLEUR.unpack_from(data, positie)
+                    self._controleer_nummer(staten, nummer, positie)
+                    staten[nummer][3] = (r, g, b)
+                    positie += KLEUR.size
+                elif soort == DELTA_TILE:
+                    _, x, y, code = TILE_DELTA.unpack_from(data, positie)
+                    self._controleer_positie(kaart, x, y, positie)
+                    tiles[(x, y)] = code
+                    positie += TILE_DELTA.size
+                else:
+                    raise ValueError(f"{self.pad}: onbekend record {soort} op positie {positie}")
+            except (struct.error, UnicodeDecodeError):
+                break  # half geschreven laatste record (bv. crash tijdens autosave): negeren
+
+        for karakter, (x, y, vlaggen, kleur, inventory) in zip(gekoppeld, staten):
+            if karakter is None:
+                continue
+            karakter.plaats(x, y)
+            karakter.vlaggen = vlaggen
+            karakter.kleur = kleur
+            karakter.inventory = inventory
+
+        for (x, y), code in tiles.items():
+            game.tilemap.set_tile(x, y, code)
+
+        # Vanaf nu is de geladen toestand de basis voor de volgende deltas
+        self._tiles.update(tiles)
+        self._bewaar_snapshot([game.speler] + game.npcs, game.opslag)
+        return True
+
+
+    def _controleer_nummer(self, staten: list, nummer: int, positie: int):
+        if nummer >= len(staten):
+            raise ValueError(f"{self.pad}: karakter {nummer} bestaat niet (record op positie {positie})")
+
+
+    def _controleer_positie(self, kaart, x: int, y: int, positie: int):
+        # Bv. een bewaarbestand van een spel met een andere MAP_WIDTH / MAP_HEIGHT
+        if not kaart.in_kaart(x, y):
+            raise ValueError(f"{self.pad}: tile ({x}, {y}) ligt niet op de kaart (record op positie {positie})")
+
+
+    def wacht(self):
+        """Wacht tot alle schrijfopdrachten klaar zijn."""
+        self._schrijver.submit(lambda: None).result()
+
+
+    def sluit(self):
+        """Wacht tot alles geschreven is en stop de schrijf thread."""
+        self._schrijver.shutdown(wait=True)
+        if self._tilemap is not None and self._tile_gewijzigd in self._tilemap.luisteraars:
+            self._tilemap.luisteraars.remove(self._tile_gewijzigd)
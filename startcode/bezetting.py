@@ -0,0 +1,373 @@
+"""
+BezettingsIndex - Houdt bij welk karakter op welke tile staat.
+"""
+from array import array
+from botsing import BEZET
+
+try:
+    import numpy
+except ImportError:  # numpy is optioneel: zonder numpy verplaatst verplaats_indexen karakter per karakter
+    numpy = None
+
+
+class BezettingsIndex:
+    """
+    Index van tile positie naar de karakters die daar staan.
+
+    # In plaats van alle NPCs te overlopen om te weten wie op (x, y) staat,
+    # zoeken we de positie direct op in een dictionary.
+    # Karakters melden zelf wanneer ze bewegen (zie Karakter.beweeg).
+    # Als er een BotsingsKaart gegeven is, houden we daarin ook bij welke tiles bezet zijn.
+    #
+    # verplaats_indexen verplaatst duizenden karakters tegelijk (regio simulatie).
+    # Dan werken we enkel de opslag en de BotsingsKaart bij; in de dictionary
+    # blijven die karakters op hun oude tile staan ("achter") tot iemand naar
+    # dat stuk van de kaart vraagt. Omdat de dictionary dan niet meer zegt welke
+    # tiles bezet zijn, tellen we vanaf dan de karakters per tile (_aantal).
+    # Wie achter is, staat per vak van VAK x VAK tiles in _achter_per_vak (bij zijn
+    # oude en zijn huidige tile): een opzoeking kijkt enkel naar de vakken die ze raakt.
+    """
+
+    VAK = 32  # zijde (in tiles) van de vakken voor karakters die achter zijn
+
+    def __init__(self, botsing=None):
+        """
+        Initialiseer de index.
+
+        Args:
+            botsing: BotsingsKaart om bezette tiles in aan te duiden, of None
+        """
+        self._tiles = {}  # (x_tile, y_tile) -> lijst van karakters op die tile
+        self.botsing = botsing
+
+        # Pas gemaakt bij de eerste verplaats_indexen (zie _begin_uitstel)
+        self._opslag = None
+        self._aantal = None  # per index in botsing.data: aantal karakters op die tile
+        self._lid = None  # per index in de opslag: 1 als dat karakter in deze index staat
+        self._achter = None  # per index in de opslag: 1 als het in _tiles nog op een oude tile staat
+        self._oud_x = None  # die oude tile
+        self._oud_y = None
+        self._aantal_achter = 0
+        self._vakken_breed = 0
+        self._achter_per_vak = {}  # vak -> set van indexen die achter zijn, met hun oude of huidige tile in dat vak
+
+
+    def __len__(self) -> int:
+        return sum(len(karakters) for karakters in self._tiles.values())
+
+
+    def voeg_toe(self, karakter):
+        """Voeg een karakter toe op zijn huidige positie."""
+        self._voeg_toe_op(karakter, (karakter.x_tile, karakter.y_tile))
+        karakter.bezetting = self
+        if self._lid is not None:
+            self._maak_plaats(karakter.index)
+            self._lid[karakter.index] = 1
+
+
+    def verwijder(self, karakter):
+        """Verwijder een karakter uit de index."""
+        self._verwijder_van(karakter, (karakter.x_tile, karakter.y_tile))
+        karakter.bezetting = None
+        if self._lid is not None:
+            self._lid[karakter.index] = 0
+
+
+    def verplaats(self, karakter, oude_x: int, oude_y: int):
+        """
+        Werk de index bij nadat een karakter bewogen heeft.
+
+        Args:
+            karakter: Het karakter dat bewogen heeft (met nieuwe positie)
+            oude_x: X-positie voor de beweging
+            oude_y: Y-positie voor de beweging
+        """
+        self._verwijder_van(karakter, (oude_x, oude_y))
+        self._voeg_toe_op(karakter, (karakter.x_tile, karakter.y_tile))
+
+
+    def verplaats_indexen(self, opslag, indexen, nieuwe_x, nieuwe_y) -> int:
+        """
+        Verplaats veel karakters tegelijk via hun index in de EntiteitOpslag (voor de regio simulatie).
+
+        # Met numpy worden enkel de arrays van de opslag en de BotsingsKaart in
+        # één keer bijgewerkt; de Karakter objecten en de dictionary pas als
+        # iemand naar dat stuk van de kaart vraagt (zie _haal_in).
+
+        Args:
+            opslag: De EntiteitOpslag van de karakters (dezelfde voor alle karakters in deze index)
+            indexen: Indexen in de opslag, allemaal verschillend
+            nieuwe_x: Nieuwe x-positie per index
+            nieuwe_y: Nieuwe y-positie per index (de doeltiles liggen op de kaart, zijn vrij en allemaal verschillend)
+
+        Returns:
+            Aantal verplaatste karakters (wie niet in deze index staat, wordt overgeslagen)
+        """
+        if numpy is None or self.botsing is None:
+            verplaatst = 0
+            for index, x, y in zip(indexen, nieuwe_x, nieuwe_y):
+                karakter = opslag.karakter(index)
+                if karakter is not None and karakter.bezetting is self:
+                    karakter.beweeg(x - karakter.x_tile, y - karakter.y_tile)
+                    verplaatst += 1
+            return verplaatst
+
+        self._begin_uitstel(opslag)
+        indexen = numpy.asarray(indexen, dtype=numpy.intp)
+        nieuwe_x = numpy.asarray(nieuwe_x, dtype=numpy.int32)
+        nieuwe_y = numpy.asarray(nieuwe_y, dtype=numpy.int32)
+        lid = numpy.frombuffer(self._lid, dtype=numpy.uint8)[indexen] != 0
+        indexen, nieuwe_x, nieuwe_y = indexen[lid], nieuwe_x[lid], nieuwe_y[lid]
+
+        xs = numpy.frombuffer(opslag.x, dtype=numpy.int32)
+        ys = numpy.frombuffer(opslag.y, dtype=numpy.int32)
+        oude_x, oude_y = xs[indexen], ys[indexen]
+
+        # Wie nog niet achter was, staat in _tiles op zijn huidige tile
+        achter = numpy.frombuffer(self._achter, dtype=numpy.uint8)
+        is_nieuw = achter[indexen] == 0
+        nieuw = indexen[is_nieuw]
+        oud_x = numpy.frombuffer(self._oud_x, dtype=numpy.int32)
+        oud_y = numpy.frombuffer(self._oud_y, dtype=numpy.int32)
+        oud_x[nieuw] = xs[nieuw]
+        oud_y[nieuw] = ys[nieuw]
+        achter[nieuw] = 1
+        self._aantal_achter += len(nieuw)
+        self._werk_vakken_bij(indexen, is_nieuw, oude_x, oude_y, nieuwe_x, nieuwe_y, oud_x, oud_y)
+
+        rij_breedte = self.botsing.rij_breedte
+        bron = (oude_y.astype(numpy.intp) + 1) * rij_breedte + oude_x + 1
+        doel = (nieuwe_y.astype(numpy.intp) + 1) * rij_breedte + nieuwe_x + 1
+        aantal = numpy.frombuffer(self._aantal, dtype=numpy.uint16)
+        numpy.subtract.at(aantal, bron, 1)  # twee karakters kunnen van dezelfde tile vertrekken
+        aantal[doel] += 1
+        raster = numpy.frombuffer(self.botsing.data, dtype=numpy.uint8)
+        leeg = bron[aantal[bron] == 0]
+        raster[leeg] &= 0xFF ^ BEZET
+        raster[doel] |= BEZET
+        if self.botsing.wijzigingen is not None:
+            self.botsing.wijzigingen += (leeg, doel)
+
+        xs[indexen] = nieuwe_x
+        ys[indexen] = nieuwe_y
+        opslag.gewijzigd.update(indexen.tolist())
+        return len(indexen)
+
+
+    def _begin_uitstel(self, opslag):
+        """Maak de tellers voor verplaats_indexen (één keer; daarna houden alle methodes ze bij)."""
+        if self._lid is not None:
+            self._maak_plaats(len(opslag.x) - 1)
+            return
+        self._opslag = opslag
+        self._aantal = array("H", bytes(2 * len(self.botsing.data)))
+        self._lid = bytearray(len(opslag.x))
+        self._achter = bytearray(len(opslag.x))
+        self._oud_x = array("i", bytes(4 * len(opslag.x)))
+        self._oud_y = array("i", bytes(4 * len(opslag.x)))
+        self._vakken_breed = self.botsing.breedte // self.VAK + 1
+        for (x, y), karakters in self._tiles.items():
+            if self.botsing.in_kaart(x, y):
+                self._aantal[self.botsing.index(x, y)] = len(karakters)
+            for karakter in karakters:
+                self._lid[karakter.index] = 1
+
+
+    def _maak_plaats(self, index: int):
+        """Zorg dat de arrays per karakter tot en met deze index gaan."""
+        tekort = index + 1 - len(self._lid)
+        if tekort > 0:
+            self._lid.extend(bytes(tekort))
+            self._achter.extend(bytes(tekort))
+            self._oud_x.extend(array("i", bytes(4 * tekort)))
+            self._oud_y.extend(array("i", bytes(4 * tekort)))
+
+
+    def _vak(self, x_tile: int, y_tile: int) -> int:
+        return (y_tile // self.VAK) * self._vakken_breed + x_tile // self.VAK
+
+
+    def _werk_vakken_bij(self, indexen, is_nieuw, oude_x, oude_y, nieuwe_x, nieuwe_y, oud_x, oud_y):
+        """Houd _achter_per_vak bij na een verplaats_indexen (één set bewerking per vak, niet per karakter)."""
+        vak, vakken_breed, per_vak = self.VAK, self._vakken_breed, self._achter_per_vak
+        van = (oude_y // vak) * vakken_breed + oude_x // vak
+        naar = (nieuwe_y // vak) * vakken_breed + nieuwe_x // vak
+
+        # Net achter: de oude tile (in _tiles) is de tile van voor deze verplaatsing
+        erbij = [(van[is_nieuw], indexen[is_nieuw])]
+        anders = van != naar
+        erbij.append((naar[anders], indexen[anders]))
+
+        # Al achter en naar een ander vak: uit het vak van de vorige tile (tenzij daar ook de oude tile ligt)
+        weg = anders & ~is_nieuw
+        verhuisd = indexen[weg]
+        weg_van = van[weg]
+        niet_oud = weg_van != (oud_y[verhuisd] // vak) * vakken_breed + oud_x[verhuisd] // vak
+        for sleutel, groep in _per_vak(weg_van[niet_oud], verhuisd[niet_oud]):
+            in_vak = per_vak[sleutel]
+            in_vak.difference_update(groep)
+            if not in_vak:
+                del per_vak[sleutel]
+        for vakken, groep_indexen in erbij:
+            for sleutel, groep in _per_vak(vakken, groep_indexen):
+                in_vak = per_vak.get(sleutel)
+                if in_vak is None:
+                    per_vak[sleutel] = set(groep)
+                else:
+                    in_vak.update(groep)
+
+
+    def _uit_vak(self, vak: int, index: int):
+        indexen = self._achter_per_vak.get(vak)
+        if indexen is not None:
+            indexen.discard(index)
+            if not indexen:
+                del self._achter_per_vak[vak]
+
+
+    def _haal_in(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Zet de karakters die achter zijn in de vakken van deze rechthoek weer juist in _tiles."""
+        if not self._aantal_achter:
+            return
+        vak, vakken_breed, per_vak = self.VAK, self._vakken_breed, self._achter_per_vak
+        vak_x_min, vak_x_max = x_min // vak, x_max // vak
+        vak_y_min, vak_y_max = y_min // vak, y_max // vak
+        indexen = set()
+        if (vak_x_max - vak_x_min + 1) * (vak_y_max - vak_y_min + 1) <= len(per_vak):
+            for vak_y in range(vak_y_min, vak_y_max + 1):
+                for vak_x in range(vak_x_min, vak_x_max + 1):
+                    in_vak = per_vak.get(vak_y * vakken_breed + vak_x)
+                    if in_vak:
+                        indexen |= in_vak
+        else:
+            # Grote rechthoek: overloop enkel de vakken waar iemand achter is
+            for sleutel, in_vak in per_vak.items():
+                if vak_x_min <= sleutel % vakken_breed <= vak_x_max and vak_y_min <= sleutel // vakken_breed <= vak_y_max:
+                    indexen |= in_vak
+
+        for index in indexen:
+            karakter = self._opslag.karakter(index)
+            oud = (self._oud_x[index], self._oud_y[index])
+            self._uit_vak(self._vak(*oud), index)
+            self._uit_vak(self._vak(karakter.x_tile, karakter.y_tile), index)
+            self._uit_tiles(karakter, oud)
+            self._tiles.setdefault((karakter.x_tile, karakter.y_tile), []).append(karakter)
+            self._achter[index] = 0
+            self._aantal_achter -= 1
+
+
+    def _voeg_toe_op(self, karakter, positie: tuple[int, int]):
+        karakters = self._tiles.get(positie)
+        if karakters is None:
+            self._tiles[positie] = [karakter]
+        else:
+            karakters.append(karakter)
+        if self._aantal is not None:
+            self._tel(positie, 1)
+        elif karakters is None and self.botsing is not None:
+            self.botsing.zet_bezet(*positie, True)
+
+
+    def _verwijder_van(self, karakter, positie: tuple[int, int]):
+        sleutel = positie
+        if self._aantal_achter and self._achter[karakter.index]:
+            # In _tiles staat het karakter nog op zijn oude tile
+            sleutel = (self._oud_x[karakter.index], self._oud_y[karakter.index])
+            self._uit_vak(self._vak(*sleutel), karakter.index)
+            self._uit_vak(self._vak(*positie), karakter.index)
+            self._achter[karakter.index] = 0
+            self._aantal_achter -= 1
+        leeg = self._uit_tiles(karakter, sleutel)
+        if leeg is None:
+            return
+        if self._aantal is not None:
+            self._tel(positie, -1)
+        elif leeg and self.botsing is not None:
+            self.botsing.zet_bezet(*positie, False)
+
+
+    def _uit_tiles(self, karakter, sleutel: tuple[int, int]) -> bool | None:
+        """Haal een karakter uit _tiles. Returns: of de tile nu leeg is (None als er niets stond)."""
+        karakters = self._tiles.get(sleutel)
+        if karakters is None:
+            return None
+        karakters.remove(karakter)
+        if karakters:
+            return False
+        del self._tiles[sleutel]
+        return True
+
+
+    def _tel(self, positie: tuple[int, int], verschil: int):
+        """Pas het aantal karakters op een tile aan (en de BEZET bit als de tile leeg of bezet wordt)."""
+        if not self.botsing.in_kaart(*positie):
+            return
+        index = self.botsing.index(*positie)
+        self._aantal[index] += verschil
+        self.botsing.zet_bezet(*positie, self._aantal[index] > 0)
+
+
+    def is_bezet(self, x_tile: int, y_tile: int) -> bool:
+        """Check of er een karakter op deze tile staat."""
+        self._haal_in(x_tile, y_tile, x_tile, y_tile)
+        return (x_tile, y_tile) in self._tiles
+
+
+    def op_positie(self, x_tile: int, y_tile: int):
+        """
+        Geef het karakter op deze tile terug.
+
+        Returns:
+            Het eerste karakter op die tile, of None als de tile leeg is
+        """
+        self._haal_in(x_tile, y_tile, x_tile, y_tile)
+        karakters = self._tiles.get((x_tile, y_tile))
+        if karakters:
+            return karakters[0]
+        return None
+
+
+    def in_rechthoek(self, x_min: int, y_min: int, x_max: int, y_max: int) -> list:
+        """
+        Geef alle karakters binnen een rechthoek (grenzen inbegrepen).
+        """
+        self._haal_in(x_min, y_min, x_max, y_max)
+        resultaat = []
+        oppervlakte = (x_max - x_min + 1) * (y_max - y_min + 1)
+
+        if oppervlakte <= len(self._tiles):
+            # Kleine rechthoek: overloop de tiles in de rechthoek
+            for y in range(y_min, y_max + 1):
+                for x in range(x_min, x_max + 1):
+                    karakters = self._tiles.get((x, y))
+                    if karakters:
+                        resultaat.extend(karakters)
+        else:
+            # Grote rechthoek: overloop enkel de bezette tiles
+            for (x, y), karakters in self._tiles.items():
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    resultaat.extend(karakters)
+        return resultaat
+
+
+    def in_straal(self, x_tile: int, y_tile: int, straal: int) -> list:
+        """
+        Geef alle karakters binnen een aantal stappen van een tile.
+        De afstand is het aantal stappen (boven, onder, links, rechts).
+        """
+        return [
+            karakter
+            for karakter in self.in_rechthoek(x_tile - straal, y_tile - straal, x_tile + straal, y_tile + straal)
+            if abs(karakter.x_tile - x_tile) + abs(karakter.y_tile - y_tile) <= straal
+        ]
+
+
+def _per_vak(vakken, indexen):
+    """Groepeer indexen per vak (numpy arrays even lang). Geeft (vak, lijst van indexen) per vak."""
+    if not len(vakken):
+        return []
+    volgorde = numpy.argsort(vakken, kind="stable")
+    vakken, indexen = vakken[volgorde], indexen[volgorde].tolist()
+    begin = numpy.flatnonzero(numpy.r_[True, vakken[1:] != vakken[:-1]]).tolist()
+    einde = begin[1:] + [len(indexen)]
+    return zip(vakken[begin].tolist(), (indexen[van:tot] for van, tot in zip(begin, einde)))
@@ -0,0 +1,202 @@
+"""
+BotsingsKaart - Eén bitmap met muren en bezette tiles voor snelle collision checks.
+"""
+from operator import itemgetter
+
+try:
+    import numpy
+except ImportError:  # numpy is optioneel: zonder numpy werken de batch vragen met itemgetter
+    numpy = None
+
+# Bits per tile
+MUUR = 1
+BEZET = 2
+
+# Muur = tile code 1 (zie TileMap._tile_kleur); gebruikt met bytes.translate om een hele rij om te zetten
+_MUUR_TABEL = bytes(MUUR if code == 1 else 0 for code in range(256))
+_BEZET_TABEL = bytes(waarde & BEZET for waarde in range(256))  # enkel de BEZET bit houden
+_ONBEKEND_TABEL = bytes((waarde & BEZET) | MUUR for waarde in range(256))  # muur maken, BEZET houden
+
+
+class BotsingsKaart:
+    """
+    Per tile één byte: MUUR als het een muur is, BEZET als er een karakter staat.
+
+    # Rond de kaart ligt een rand van één tile die altijd MUUR is. Zo kan je
+    # de buren van elke tile op de kaart opvragen zonder eerst te checken of
+    # ze nog binnen de kaart liggen: wie van de kaart stapt, botst op de rand.
+    # Tile (x, y) staat op index (y + 1) * rij_breedte + (x + 1).
+    """
+
+    def __init__(self, breedte: int, hoogte: int, onbekend: bool = False):
+        """
+        Maak een lege kaart (enkel de rand is muur).
+
+        Args:
+            breedte: Aantal tiles breed
+            hoogte: Aantal tiles hoog
+            onbekend: True = alle tiles zijn muur tot ze met vul_chunk ingevuld worden
+                      (voor kaartbestanden waarvan enkel de chunks rond de camera gelezen worden)
+        """
+        self.breedte = breedte
+        self.hoogte = hoogte
+        self.rij_breedte = breedte + 2
+        self.data = bytearray([MUUR]) * (self.rij_breedte * (hoogte + 2))
+        if not onbekend:
+            leeg = bytes(breedte)
+            for y in range(hoogte):
+                start = self.index(0, y)
+                self.data[start:start + breedte] = leeg
+
+        # Index verschil naar de buren in de volgorde van RICHTINGEN: boven, onder, links, rechts
+        self.buren = (-self.rij_breedte, self.rij_breedte, -1, 1)
+
+        # Gewijzigde indexen in data sinds de vorige neem_wijzigingen(), of None als niemand ze bijhoudt.
+        # Elk element is één index, een range of een numpy array van indexen (zie RegioSimulatie).
+        self.wijzigingen = None
+
+
+    def volg_wijzigingen(self):
+        """Begin bij te houden welke bytes in data veranderen (zie neem_wijzigingen)."""
+        self.wijzigingen = []
+
+
+    def neem_wijzigingen(self) -> list:
+        """Geef de wijzigingen sinds de vorige oproep en begin opnieuw met een lege lijst."""
+        wijzigingen, self.wijzigingen = self.wijzigingen, []
+        return wijzigingen
+
+
+    def index(self, x_tile: int, y_tile: int) -> int:
+        """Index van een tile in data (geldig van -1 tot en met breedte / hoogte)."""
+        return (y_tile + 1) * self.rij_breedte + x_tile + 1
+
+
+    def in_kaart(self, x_tile: int, y_tile: int) -> bool:
+        """Of een tile op de kaart ligt (en dus niet in de rand of erbuiten)."""
+        return 0 <= x_tile < self.breedte and 0 <= y_tile < self.hoogte
+
+
+    def vul_muren(self, tiles):
+        """
+        Neem de muren over uit een tile raster (rij per rij; bezette tiles worden gewist).
+
+        Args:
+            tiles: TileRaster of GechunktRaster (met rij())
+        """
+        for y in range(self.hoogte):
+            start = self.index(0, y)
+            self.data[start:start + self.breedte] = tiles.rij(0, y, self.breedte).translate(_MUUR_TABEL)
+            if self.wijzigingen is not None:
+                self.wijzigingen.append(range(start, start + self.breedte))
+
+
+    def vul_chunk(self, x_start: int, y_start: int, grootte: int, codes):
+        """
+        Neem de muren over uit één chunk van tile codes (bezette tiles blijven bezet).
+
+        Args:
+            x_start: X-positie van de linkerbovenhoek in tiles
+            y_start: Y-positie van de linkerbovenhoek in tiles
+            grootte: Aantal tiles per zijde van de chunk
+            codes: grootte * grootte tile codes, rij na rij (stukken buiten de kaart worden genegeerd)
+        """
+        breedte = min(grootte, self.breedte - x_start)
+        for rij in range(min(grootte, self.hoogte - y_start)):
+            start = self.index(x_start, y_start + rij)
+            muren = bytes(codes[rij * grootte:rij * grootte + breedte]).translate(_MUUR_TABEL)
+            bezet = self.data[start:start + breedte].translate(_BEZET_TABEL)
+            # MUUR en BEZET zijn verschillende bits: optellen als getallen is hetzelfde als per byte OR
+            samen = int.from_bytes(muren, "little") + int.from_bytes(bezet, "little")
+            self.data[start:start + breedte] = samen.to_bytes(breedte, "little")
+            if self.wijzigingen is not None:
+                self.wijzigingen.append(range(start, start + breedte))
+
+
+    def wis_chunk(self, x_start: int, y_start: int, grootte: int):
+        """Maak de tiles van één chunk weer onbekend (muur); bezette tiles blijven bezet."""
+        breedte = min(grootte, self.breedte - x_start)
+        for rij in range(min(grootte, self.hoogte - y_start)):
+            start = self.index(x_start, y_start + rij)
+            self.data[start:start + breedte] = self.data[start:start + breedte].translate(_ONBEKEND_TABEL)
+            if self.wijzigingen is not None:
+                self.wijzigingen.append(range(start, start + breedte))
+
+
+    def zet_muur(self, x_tile: int, y_tile: int, muur: bool):
+        """Markeer een tile als muur (of niet)."""
+        index = self.index(x_tile, y_tile)
+        if muur:
+            self.data[index] |= MUUR
+        else:
+            self.data[index] &= ~MUUR
+        if self.wijzigingen is not None:
+            self.wijzigingen.append(index)
+
+
+    def zet_bezet(self, x_tile: int, y_tile: int, bezet: bool):
+        """Markeer een tile als bezet door een karakter (of niet). Buiten de kaart wordt genegeerd."""
+        if not self.in_kaart(x_tile, y_tile):
+            return
+        index = self.index(x_tile, y_tile)
+        if bezet:
+            self.data[index] |= BEZET
+        else:
+            self.data[index] &= ~BEZET
+        if self.wijzigingen is not None:
+            self.wijzigingen.append(index)
+
+
+    def is_muur(self, x_tile: int, y_tile: int) -> bool:
+        """Muur of rand? (x en y mogen hoogstens één tile buiten de kaart liggen)"""
+        return (self.data[(y_tile + 1) * self.rij_breedte + x_tile + 1] & MUUR) != 0
+
+
+    def is_vrij(self, x_tile: int, y_tile: int) -> bool:
+        """Geen muur en geen karakter? (x en y mogen hoogstens één tile buiten de kaart liggen)"""
+        return self.data[(y_tile + 1) * self.rij_breedte + x_tile + 1] == 0
+
+
+    def vrij(self, indexen) -> list[bool]:
+        """
+        Beantwoord veel "is deze tile vrij?" vragen tegelijk.
+
+        Args:
+            indexen: Indexen in data (zie index())
+
+        Returns:
+            Per index True als de tile vrij is
+        """
+        indexen = list(indexen)
+        if not indexen:
+            return []
+        if len(indexen) == 1:
+            return [self.data[indexen[0]] == 0]
+        return [waarde == 0 for waarde in itemgetter(*indexen)(self.data)]
+
+
+    def vrije_buren(self, xs, ys):
+        """
+        Zoek voor veel tiles tegelijk welke buren vrij zijn (bv. voor alle NPCs die willen bewegen).
+
+        Args:
+            xs: X-posities (lijst, array of numpy array), allemaal op de kaart
+            ys: Y-posities
+
+        Returns:
+            Reeks van 4 * len(xs) booleans: element 4 * i + r is True als buur r
+            (boven, onder, links, rechts, zoals RICHTINGEN) van tile i vrij is
+        """
+        if numpy is not None:
+            raster = numpy.frombuffer(self.data, dtype=numpy.uint8)
+            indexen = (numpy.asarray(ys, dtype=numpy.intp) + 1) * self.rij_breedte + numpy.asarray(xs, dtype=numpy.intp) + 1
+            return (raster[indexen[:, None] + numpy.array(self.buren, dtype=numpy.intp)] == 0).ravel()
+
+        rij_breedte = self.rij_breedte
+        boven, onder, links, rechts = self.buren
+        indexen = []
+        for x, y in zip(xs, ys):
+            index = (y + 1) * rij_breedte + x + 1
+            indexen += (index + boven, index + onder, index + links, index + rechts)
+        return self.vrij(indexen)
+
@@ -0,0 +1,72 @@
+"""
+Camera - Bepaalt welk stuk van de wereld op het scherm staat.
+"""
+from config import TILE_SIZE
+
+
+class Camera:
+    """
+    Camera die de speler volgt over een kaart die groter kan zijn dan het scherm.
+
+    # x en y zijn de tile coördinaten van de tile linksboven op het scherm.
+    # Alleen tiles en karakters binnen het zichtbare gebied worden getekend.
+    """
+
+    def __init__(self, breedte: int, hoogte: int, kaart_breedte: int, kaart_hoogte: int):
+        """
+        Initialiseer de camera.
+
+        Args:
+            breedte: Aantal tiles dat op het scherm past (horizontaal)
+            hoogte: Aantal tiles dat op het scherm past (verticaal)
+            kaart_breedte: Breedte van de kaart in tiles
+            kaart_hoogte: Hoogte van de kaart in tiles
+        """
+        self.breedte = breedte
+        self.hoogte = hoogte
+        self.kaart_breedte = kaart_breedte
+        self.kaart_hoogte = kaart_hoogte
+        self.x = 0
+        self.y = 0
+
+
+    def volg(self, karakter):
+        """
+        Centreer de camera op een karakter, zonder buiten de kaart te kijken.
+        """
+        self.x = self._begrens(karakter.x_tile - self.breedte // 2, self.kaart_breedte - self.breedte)
+        self.y = self._begrens(karakter.y_tile - self.hoogte // 2, self.kaart_hoogte - self.hoogte)
+
+
+    def _begrens(self, waarde: int, maximum: int) -> int:
+        """Houd een waarde tussen 0 en maximum (of 0 als de kaart kleiner is dan het scherm)."""
+        return max(0, min(waarde, maximum))
+
+
+    @property
+    def offset(self) -> tuple[int, int]:
+        """Verschuiving in pixels van wereld naar scherm."""
+        return (-self.x * TILE_SIZE, -self.y * TILE_SIZE)
+
+
+    def zichtbaar_gebied(self, marge: int = 0) -> tuple[int, int, int, int]:
+        """
+        Geef het zichtbare gebied in tiles (grenzen inbegrepen).
+
+        Args:
+            marge: Aantal extra tiles rondom het scherm
+
+        Returns:
+            (x_min, y_min, x_max, y_max)
+        """
+        return (
+            self.x - marge,
+            self.y - marge,
+            self.x + self.breedte - 1 + marge,
+            self.y + self.hoogte - 1 + marge,
+        )
+
+
+    def is_zichtbaar(self, x_tile: int, y_tile: int) -> bool:
+        """Check of een tile op het scherm staat."""
+        return self.x <= x_tile < self.x + self.breedte and self.y <= y_tile < self.y + self.hoogte
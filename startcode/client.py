@@ -0,0 +1,213 @@
+"""
+NetwerkClient - Verbinding van een Game met de multiplayer server (zie server.py).
+
+In multiplayer beslist de server wat er gebeurt. De game stuurt enkel wat
+de speler wil doen (bewegen, interactie, een bericht) en past de deltas
+toe die de server terugstuurt. Een achtergrond thread leest de verbinding
+en maakt de game loop wakker met een NETWERK_EVENT, ook in idle modus.
+"""
+import queue
+import socket
+import threading
+import pygame
+import protocol
+from tilemap import TileMap
+from tileraster import TileRaster
+from models.karakter import Karakter
+from models.whiteboard import Whiteboard
+
+# Wordt gepost als er een frame van de server binnenkomt (maakt pygame.event.wait() wakker)
+NETWERK_EVENT = pygame.event.custom_type()
+
+
+def maak_karakter(sleutel: str, x_tile: int, y_tile: int, kleur: tuple[int, int, int]) -> Karakter:
+    """Maak een karakter dat er uitziet zoals op de server ("klasse/naam")."""
+    klasse, _, naam = sleutel.partition("/")
+    if klasse == "Whiteboard":
+        whiteboard = Whiteboard(x_tile, y_tile)
+        whiteboard.kleur = kleur
+        return whiteboard
+    return Karakter(naam, 0, x_tile, y_tile, kleur, "")
+
+
+class NetwerkClient:
+    """
+    Verbinding met de server.
+
+    # Karakters worden genummerd zoals op de server. Ons eigen karakter is
+    # game.speler; de andere spelers en de NPCs komen in game.npcs en in de
+    # BezettingsIndex, zodat ze getekend worden en in de weg staan.
+    """
+
+    def __init__(self, adres: str):
+        """
+        Verbind met de server en wacht op de begintoestand.
+
+        Args:
+            adres: "host:poort"
+
+        Raises:
+            OSError: Als de server niet bereikbaar is
+            ValueError: Als de server iets onverwachts stuurt
+        """
+        host, _, poort = adres.rpartition(":")
+        self._socket = socket.create_connection((host or "localhost", int(poort)))
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # kleine berichten meteen versturen
+        self._ontvangen = queue.SimpleQueue()  # frames van de server (None = verbinding verbroken)
+        self.verbonden = True
+        self.ontvangen_bytes = 0
+        self.server_stap = 0  # laatste TICK van de server
+
+        self._begin = list(protocol.lees_records(self._lees_frame()))
+        if not self._begin or self._begin[0][0] != protocol.WELKOM:
+            raise ValueError(f"{adres} is geen RPG server")
+        _, self.nummer, self.breedte, self.hoogte, self._tiles = self._begin.pop(0)
+        self._karakters = {}  # nummer op de server -> Karakter
+
+        threading.Thread(target=self._ontvang, name="netwerk", daemon=True).start()
+
+
+    def _lees_frame(self) -> bytes:
+        lengte = protocol.FRAME.unpack(self._lees(protocol.FRAME.size))[0]
+        if lengte > protocol.MAX_FRAME:
+            raise ValueError(f"frame van {lengte} bytes is te groot")
+        data = self._lees(lengte)
+        self.ontvangen_bytes += protocol.FRAME.size + lengte
+        return data
+
+
+    def _lees(self, aantal: int) -> bytes:
+        buffer = bytearray(aantal)
+        weergave = memoryview(buffer)
+        while weergave:
+            gelezen = self._socket.recv_into(weergave)
+            if not gelezen:
+                raise ConnectionError("verbinding gesloten door de server")
+            weergave = weergave[gelezen:]
+        return bytes(buffer)
+
+
+    def _ontvang(self):
+        """Lees frames tot de verbinding sluit (draait in een achtergrond thread)."""
+        try:
+            while True:
+                self._ontvangen.put(self._lees_frame())
+                pygame.event.post(pygame.event.Event(NETWERK_EVENT))
+        except (OSError, ValueError):
+            self._ontvangen.put(None)
+            if pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(NETWERK_EVENT))
+
+
+    def maak_tilemap(self) -> TileMap:
+        """De kaart zoals de server ze bij het verbinden doorstuurde."""
+        tiles = TileRaster(self.breedte, self.hoogte)
+        tiles.data[:] = self._tiles
+        self._tiles = None
+        return TileMap(self.breedte, self.hoogte, tiles)
+
+
+    def koppel(self, game):
+        """Zet de karakters van de begintoestand in de game (na maak_tilemap)."""
+        for velden in self._begin:
+            self._pas_toe(game, velden)
+        self._begin = None
+
+
+    def heeft_data(self) -> bool:
+        """Of er frames wachten om toegepast te worden."""
+        return not self._ontvangen.empty()
+
+
+    def verwerk(self, game) -> bool:
+        """
+        Pas alle ontvangen deltas toe (roep dit op in elke simulatiestap).
+
+        Returns:
+            True als er iets veranderd is
+        """
+        veranderd = False
+        while not self._ontvangen.empty():
+            data = self._ontvangen.get_nowait()
+            if data is None:
+                self.verbonden = False
+                game.bericht = "De verbinding met de server is verbroken."
+                return True
+            for velden in protocol.lees_records(data):
+                self._pas_toe(game, velden)
+            veranderd = True
+        return veranderd
+
+
+    def _pas_toe(self, game, velden: tuple):
+        soort = velden[0]
+        if soort == protocol.BEWOGEN:
+            _, nummer, x, y = velden
+            karakter = self._karakters.get(nummer)
+            if karakter is None:
+                return
+            dx, dy = x - karakter.x_tile, y - karakter.y_tile
+            if abs(dx) + abs(dy) == 1:
+                karakter.beweeg(dx, dy)  # één stap: glijden zoals lokaal
+            else:
+                karakter.plaats(x, y)
+        elif soort == protocol.TICK:
+            self.server_stap = velden[1]
+        elif soort == protocol.TEKST_VOOR_SPELER:
+            game.bericht = velden[1]
+        elif soort == protocol.VLAGGEN:
+            _, nummer, vlaggen = velden
+            karakter = self._karakters.get(nummer)
+            if karakter is not None:
+                karakter.vlaggen = vlaggen
+        elif soort == protocol.KLEUR:
+            _, nummer, r, g, b = velden
+            karakter = self._karakters.get(nummer)
+            if karakter is not None:
+                karakter.kleur = (r, g, b)
+        elif soort == protocol.TILE:
+            _, x, y, code = velden
+            game.tilemap.set_tile(x, y, code)
+        elif soort == protocol.NIEUW:
+            _, nummer, x, y, r, g, b, vlaggen, sleutel = velden
+            if nummer == self.nummer:
+                karakter = game.speler
+                karakter.plaats(x, y)
+                karakter.kleur = (r, g, b)
+            else:
+                self._verwijder(game, nummer)
+                karakter = maak_karakter(sleutel, x, y, (r, g, b))
+                karakter.verhuis(game.opslag)
+                game.npcs.append(karakter)
+                game.bezetting.voeg_toe(karakter)
+            karakter.vlaggen = vlaggen
+            self._karakters[nummer] = karakter
+        elif soort == protocol.WEG:
+            self._verwijder(game, velden[1])
+
+
+    def _verwijder(self, game, nummer: int):
+        karakter = self._karakters.pop(nummer, None)
+        if karakter is not None and karakter is not game.speler:
+            game.npcs.remove(karakter)
+            game.bezetting.verwijder(karakter)
+
+
+    def stuur(self, soort: int, *velden, tekst: str | None = None):
+        """Stuur één intentie naar de server (BEWEEG, INTERACTIE of BERICHT)."""
+        if not self.verbonden:
+            return
+        try:
+            self._socket.sendall(protocol.frame(protocol.record(soort, *velden, tekst=tekst)))
+        except OSError:
+            self.verbonden = False
+
+
+    def sluit(self):
+        """Verbreek de verbinding."""
+        self.verbonden = False
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
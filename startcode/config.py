@@ -3,21 +3,79 @@ Configuratie voor de RPG. Bevat constanten voor scherm, tiles, FPS en kleuren.
 """
 
 # Basis instellingen
-FPS = 60
+FPS = 60  # maximum aantal getekende frames per seconde
+
+# Vaste simulatiestap: de spellogica loopt altijd aan dit tempo, los van het tekenen
+SIM_STAPPEN_PER_SECONDE = 30
+MAX_SIM_STAPPEN = 5  # maximum aantal stappen per frame als het tekenen achterloopt (frame skipping)
+
+# Idle modus: wacht op input (of een timer) in plaats van elke frame te hertekenen
+IDLE_MODUS = True
+CURSOR_KNIPPER_MS = 500  # de typ-cursor knippert elke halve seconde
+
+# Maximum tijd per frame (in milliseconden) voor NPC gedrag
+NPC_BUDGET_MS = 2.0
+
+# Regio simulatie: leerlingen ver van de camera wandelen rond, berekend in andere processen (zie regio_simulatie.py)
+# Staat standaard uit: het resultaat hangt af van hoe snel de werkers zijn, dus opnames spelen niet identiek af
+REGIO_SIMULATIE = False
+REGIO_GROOTTE = 32  # tiles per zijde van een regio
+REGIO_INTERVAL = 0.5  # seconden speltijd tussen twee rondes
+REGIO_WERKERS = None  # aantal processen (None = aantal cores)
+
+# Bewaren: de game wordt bij de start geladen en elke AUTOSAVE_SECONDEN bewaard (None = niet bewaren)
+# Staat standaard uit; zet bv. SAVE_FILE = "savegame.rpgs" om het spel te bewaren
+SAVE_FILE = None
+AUTOSAVE_SECONDEN = 5
+
+# Opname: neem alle toetsen van de sessie op in dit bestand (zie opname.py), of None
+# Tijdens een opname begint het spel altijd vers (zonder bewaarbestand te laden)
+OPNAME_FILE = None
+
+# Zichtveld: enkel tekenen wat de speler kan zien (muren houden het zicht tegen), de rest ligt onder mist
+ZICHTVELD = True
+ZICHT_STRAAL = 8  # hoe ver de speler kan kijken (in tiles)
+
+# Multiplayer: speel op een server (zie server.py), bv. "localhost:5555", of None om alleen te spelen
+# Bewaren, opnames en de regio simulatie staan uit in multiplayer: de server is de baas over de toestand
+SERVER_ADRES = None
+
+# Profiler: meet de fasen van de game loop vanaf de start (F3 = overlay, F4 = trace opslaan)
+PROFILER = False
+PROFILER_TRACE_FILE = "trace.json"
+# Latentie: meet de tijd van elke toets tot hij op het scherm staat en toon p50/p99 bij het afsluiten (zie latentie.py)
+LATENTIE_METEN = False
+# Opeenvolgende bewegingstoetsen in dezelfde simulatiestap samen uitvoeren als één beweging (bv. bij key repeat)
+INVOER_SAMENVOEGEN = True
+# Allocatie tracker: meet het geheugen per frame, fase en regel code (traag!) en toont een rapport bij het afsluiten
+ALLOCATIE_TRACKER = False
+
+# Render instellingen
+DIRTY_RECTS = False  # True = enkel gewijzigde stukken van het scherm hertekenen
 
 # Tile instellingen
 TILE_SIZE = 40  # pixels per tile
 
-# Map instellingen
+# Map instellingen (de kaart mag groter zijn dan het scherm)
 MAP_WIDTH = 20  # aantal tiles breed
 MAP_HEIGHT = 15   # aantal tiles hoog
 
+# Kaartbestand om te laden (zie kaartbestand.py), of None voor de standaard schoolkaart
+MAP_FILE = None
+
+# Tiles worden per chunk (vierkant van CHUNK_SIZE x CHUNK_SIZE tiles) getekend en bewaard
+CHUNK_SIZE = 16
+
+# Camera instellingen: hoeveel tiles er op het scherm passen
+VIEW_WIDTH = 20  # aantal tiles breed
+VIEW_HEIGHT = 15  # aantal tiles hoog
+
 # HUD instellingen
 HUD_HEIGHT = 70  # pixels voor de HUD onderaan
 
 # Scherm instellingen (automatisch berekend)
-SCREEN_WIDTH = MAP_WIDTH * TILE_SIZE
-SCREEN_HEIGHT = MAP_HEIGHT * TILE_SIZE + HUD_HEIGHT
+SCREEN_WIDTH = VIEW_WIDTH * TILE_SIZE
+SCREEN_HEIGHT = VIEW_HEIGHT * TILE_SIZE + HUD_HEIGHT
 
 # Kleuren (R, G, B)
 COLORS = {
@@ -0,0 +1,184 @@
+"""
+EntiteitOpslag - Posities, kleuren en vlaggen van alle karakters in parallelle arrays.
+"""
+from array import array
+import functools
+import weakref
+
+try:
+    import numpy
+except ImportError:  # numpy is optioneel: zonder numpy werken de batch operaties met gewone lussen
+    numpy = None
+
+# Vlaggen (bits in EntiteitOpslag.vlaggen)
+VLAG_SCHOON = 1  # whiteboard is schoongemaakt
+VLAG_DWAALT = 2  # NPC dwaalt rond als hij ver van de speler is (zie regio_simulatie.py)
+
+
+class EntiteitOpslag:
+    """
+    Opslag van karakter gegevens als "struct of arrays".
+
+    # In plaats van dat elk Karakter object zijn eigen x, y en kleur bewaart,
+    # staan alle x-posities samen in één array, alle y-posities in een andere, ...
+    # Een Karakter is enkel nog een venster op één index in die arrays.
+    # Zo kost een karakter weinig geheugen en kunnen we bewerkingen op
+    # veel karakters tegelijk doen (bv. verplaatsen of zoeken wie zichtbaar is).
+    """
+
+    def __init__(self):
+        self.x = array("i")
+        self.y = array("i")
+        self.vorige_x = array("i")  # positie aan het begin van de laatste simulatiestap (voor interpolatie)
+        self.vorige_y = array("i")
+        self.alpha = 1.0  # hoe ver we tussen vorige en huidige positie tekenen (0 = vorige, 1 = huidige)
+        self.vlaggen = array("B")
+        self.kleur = []  # RGB tuples (meestal gedeeld met COLORS, dus geen extra geheugen)
+        self.karakters = []  # index -> weakref naar het Karakter (of None als de plaats vrij is)
+        self._vrij = []  # vrije indexen die hergebruikt kunnen worden
+        # Indexen van karakters waarvan positie, vlaggen, kleur of inventory veranderd kan zijn
+        # sinds de vorige neem_gewijzigd() (voor autosave, zie bewaren.py)
+        self.gewijzigd = set()
+
+
+    def __len__(self) -> int:
+        return len(self.karakters) - len(self._vrij)
+
+
+    def nieuw(self, karakter, x_tile: int, y_tile: int, kleur: tuple[int, int, int]) -> int:
+        """
+        Reserveer een plaats voor een karakter.
+
+        Returns:
+            De index van het karakter in de arrays
+        """
+        if self._vrij:
+            index = self._vrij.pop()
+            self.x[index] = self.vorige_x[index] = x_tile
+            self.y[index] = self.vorige_y[index] = y_tile
+            self.vlaggen[index] = 0
+            self.kleur[index] = kleur
+        else:
+            index = len(self.karakters)
+            self.x.append(x_tile)
+            self.y.append(y_tile)
+            self.vorige_x.append(x_tile)
+            self.vorige_y.append(y_tile)
+            self.vlaggen.append(0)
+            self.kleur.append(kleur)
+            self.karakters.append(None)
+
+        # Als het karakter niet meer gebruikt wordt, komt zijn plaats vanzelf vrij
+        self.karakters[index] = weakref.ref(karakter, functools.partial(self._geef_vrij, index))
+        return index
+
+
+    def neem_over(self, karakter, opslag: "EntiteitOpslag", index: int) -> int:
+        """
+        Kopieer een karakter uit een andere opslag naar deze (zie Karakter.verhuis).
+        Zijn plaats in de andere opslag komt vrij.
+
+        Returns:
+            De nieuwe index van het karakter in deze opslag
+        """
+        nieuwe_index = self.nieuw(karakter, opslag.x[index], opslag.y[index], opslag.kleur[index])
+        self.vorige_x[nieuwe_index] = opslag.vorige_x[index]
+        self.vorige_y[nieuwe_index] = opslag.vorige_y[index]
+        self.vlaggen[nieuwe_index] = opslag.vlaggen[index]
+        self.gewijzigd.add(nieuwe_index)
+        opslag.gewijzigd.discard(index)
+        opslag._geef_vrij(index)  # de oude weakref verdwijnt mee, dus zijn callback geeft de plaats niet nog eens vrij
+        return nieuwe_index
+
+
+    def _geef_vrij(self, index: int, ref=None):
+        """Maak de plaats van een verdwenen karakter vrij voor hergebruik."""
+        self.karakters[index] = None
+        self.kleur[index] = None
+        self.vlaggen[index] = 0
+        self._vrij.append(index)
+
+
+    def neem_gewijzigd(self) -> set[int]:
+        """Geef de gewijzigde indexen en begin opnieuw met een lege verzameling."""
+        gewijzigd, self.gewijzigd = self.gewijzigd, set()
+        return gewijzigd
+
+
+    def karakter(self, index: int):
+        """Geef het Karakter object op een index (of None)."""
+        ref = self.karakters[index]
+        return ref() if ref is not None else None
+
+
+    def bewaar_vorige(self):
+        """Onthoud de huidige posities; roep dit op aan het begin van elke simulatiestap."""
+        self.vorige_x[:] = self.x
+        self.vorige_y[:] = self.y
+
+
+    def onderweg(self) -> bool:
+        """Of er een karakter bewogen heeft in de laatste simulatiestap (en dus nog geïnterpoleerd wordt)."""
+        return self.x != self.vorige_x or self.y != self.vorige_y
+
+
+    def bewogen(self) -> list[int]:
+        """Geef de indexen van de karakters die bewogen hebben in de laatste simulatiestap."""
+        if numpy is not None:
+            verschil = (numpy.frombuffer(self.x, dtype=numpy.int32) != numpy.frombuffer(self.vorige_x, dtype=numpy.int32)) | \
+                       (numpy.frombuffer(self.y, dtype=numpy.int32) != numpy.frombuffer(self.vorige_y, dtype=numpy.int32))
+            return [int(index) for index in numpy.flatnonzero(verschil) if self.karakters[index] is not None]
+
+        x, y, vorige_x, vorige_y, karakters = self.x, self.y, self.vorige_x, self.vorige_y, self.karakters
+        return [
+            index for index in range(len(karakters))
+            if (x[index] != vorige_x[index] or y[index] != vorige_y[index]) and karakters[index] is not None
+        ]
+
+
+    def in_rechthoek(self, x_min: int, y_min: int, x_max: int, y_max: int, indexen=None) -> list[int]:
+        """
+        Geef de indexen van alle karakters binnen een rechthoek (grenzen inbegrepen).
+
+        Args:
+            indexen: Enkel deze indexen bekijken, of None voor alle karakters
+        """
+        if numpy is not None:
+            xs = numpy.frombuffer(self.x, dtype=numpy.int32)
+            ys = numpy.frombuffer(self.y, dtype=numpy.int32)
+            if indexen is not None:
+                indexen = numpy.asarray(indexen, dtype=numpy.intp)
+                xs, ys = xs[indexen], ys[indexen]
+            binnen = (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+            gevonden = numpy.flatnonzero(binnen)
+            if indexen is not None:
+                gevonden = indexen[gevonden]
+            return [int(index) for index in gevonden if self.karakters[index] is not None]
+
+        if indexen is None:
+            indexen = range(len(self.karakters))
+        x, y, karakters = self.x, self.y, self.karakters
+        return [
+            index for index in indexen
+            if x_min <= x[index] <= x_max and y_min <= y[index] <= y_max and karakters[index] is not None
+        ]
+
+
+    def verplaats(self, indexen, dx: int, dy: int):
+        """
+        Verplaats veel karakters tegelijk (zonder collision checks).
+        De bezettingsindex van elk karakter wordt mee bijgewerkt.
+        """
+        for index in indexen:
+            oude_x, oude_y = self.x[index], self.y[index]
+            self.x[index] = oude_x + dx
+            self.y[index] = oude_y + dy
+            self.gewijzigd.add(index)
+            karakter = self.karakter(index)
+            if karakter is not None and karakter.bezetting is not None:
+                karakter.bezetting.verplaats(karakter, oude_x, oude_y)
+
+
+# Opslag voor karakters die (nog) bij geen Game of SpelServer horen: die hebben elk
+# een eigen opslag en verhuizen hun karakters daarheen (zie Karakter.verhuis)
+standaard_opslag = EntiteitOpslag()
@@ -0,0 +1,119 @@
+"""
+Intenties - Herken trefwoorden in getypte berichten met één keer over de tekst te lopen.
+"""
+from collections import deque
+import functools
+import unicodedata
+
+
+@functools.lru_cache(maxsize=1024)
+def normaliseer(tekst: str) -> str:
+    """
+    Maak tekst vergelijkbaar: kleine letters en geen accenten ("Reinig DÉ bord" -> "reinig de bord").
+    Spelers typen vaak hetzelfde, dus het resultaat wordt bewaard.
+    """
+    ontleed = unicodedata.normalize("NFKD", tekst)
+    zonder_accenten = "".join(teken for teken in ontleed if not unicodedata.combining(teken))
+    return zonder_accenten.casefold()
+
+
+class IntentieHerkenner:
+    """
+    Zoekt alle trefwoorden tegelijk in een tekst (Aho-Corasick automaat).
+
+    # Met "if woord in bericht" voor elk trefwoord loop je per trefwoord over
+    # het hele bericht. Hier bouwen we één keer een boom (trie) van alle
+    # trefwoorden, met "terugval" pijlen voor als een trefwoord toch niet past.
+    # Daarna vinden we alle trefwoorden in één keer over het bericht te lopen.
+    """
+
+    def __init__(self, regels: dict[str, object]):
+        """
+        Bouw de automaat.
+
+        Args:
+            regels: Trefwoord of zin -> waarde (bv. de naam van de methode die reageert)
+        """
+        self._volgende = [{}]  # toestand -> {letter: volgende toestand}
+        self._terugval = [0]
+        self._uitvoer = [[]]  # toestand -> lijst van (trefwoord, waarde) die hier eindigen
+
+        for zin, waarde in regels.items():
+            zin = normaliseer(zin)
+            if zin:
+                self._voeg_toe(zin, waarde)
+        self._bouw_terugval()
+
+
+    def _voeg_toe(self, zin: str, waarde):
+        toestand = 0
+        for letter in zin:
+            volgende = self._volgende[toestand].get(letter)
+            if volgende is None:
+                volgende = len(self._volgende)
+                self._volgende.append({})
+                self._terugval.append(0)
+                self._uitvoer.append([])
+                self._volgende[toestand][letter] = volgende
+            toestand = volgende
+        self._uitvoer[toestand].append((zin, waarde))
+
+
+    def _bouw_terugval(self):
+        # Breedte eerst: de terugval van een toestand ligt altijd dichter bij de wortel
+        rij = deque(self._volgende[0].values())
+        while rij:
+            toestand = rij.popleft()
+            for letter, volgende in self._volgende[toestand].items():
+                rij.append(volgende)
+                terugval = self._terugval[toestand]
+                while terugval and letter not in self._volgende[terugval]:
+                    terugval = self._terugval[terugval]
+                self._terugval[volgende] = self._volgende[terugval].get(letter, 0)
+                # Trefwoorden die eindigen in de terugval eindigen ook hier ("reinig" bevat "nig")
+                self._uitvoer[volgende] = self._uitvoer[volgende] + self._uitvoer[self._terugval[volgende]]
+
+
+    def zoek(self, tekst: str) -> list[tuple[int, str, object]]:
+        """
+        Zoek alle trefwoorden in een tekst (hoofdletters en accenten maken niet uit).
+
+        Returns:
+            Lijst van (startpositie in de genormaliseerde tekst, trefwoord, waarde), in de volgorde waarin ze eindigen
+        """
+        volgende, terugval, uitvoer = self._volgende, self._terugval, self._uitvoer
+        gevonden = []
+        toestand = 0
+        for positie, letter in enumerate(normaliseer(tekst)):
+            while toestand and letter not in volgende[toestand]:
+                toestand = terugval[toestand]
+            toestand = volgende[toestand].get(letter, 0)
+            for zin, waarde in uitvoer[toestand]:
+                gevonden.append((positie - len(zin) + 1, zin, waarde))
+        return gevonden
+
+
+    def eerste(self, tekst: str) -> tuple[str, object] | None:
+        """
+        Geef het eerste trefwoord in de tekst (bij gelijke start het langste).
+
+        Returns:
+            (trefwoord, waarde), of None als er geen trefwoord in staat
+        """
+        gevonden = self.zoek(tekst)
+        if not gevonden:
+            return None
+        _, zin, waarde = min(gevonden, key=lambda treffer: (treffer[0], -len(treffer[1])))
+        return zin, waarde
+
+
+@functools.cache
+def herkenner_voor(klasse: type) -> IntentieHerkenner:
+    """
+    Geef de (één keer gebouwde) herkenner voor een klasse.
+    Gebruikt de INTENTIES van de klasse en van haar superklassen (subklassen winnen).
+    """
+    regels = {}
+    for basis in reversed(klasse.__mro__):
+        regels.update(vars(basis).get("INTENTIES", {}))
+    return IntentieHerkenner(regels)
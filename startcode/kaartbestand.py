@@ -0,0 +1,244 @@
+"""
+Kaartbestand - Binair kaartformaat met chunks dat via mmap ingelezen wordt.
+
+Opbouw van een kaartbestand:
+    header:      magic b"RPGK", versie, chunk grootte, breedte, hoogte
+    chunk index: per chunk (rij na rij) een offset en een vulcode
+    chunks:      per chunk chunk_grootte * chunk_grootte bytes, rij na rij
+
+Een chunk met offset 0 heeft geen data: alle tiles hebben dan de vulcode
+(bijvoorbeeld een stuk lege vloer). Zo blijven grote lege stukken klein.
+
+Gebruik als script om de standaard schoolkaart om te zetten naar een bestand:
+    python kaartbestand.py school.kaart [breedte hoogte]
+"""
+import mmap
+import struct
+import sys
+from config import CHUNK_SIZE
+
+MAGIC = b"RPGK"
+VERSIE = 1
+HEADER = struct.Struct("<4sHHII")  # magic, versie, chunk grootte, breedte, hoogte
+INDEX_ITEM = struct.Struct("<QB7x")  # offset van de chunk data, vulcode
+
+
+def schrijf_kaart(pad: str, tiles, chunk_grootte: int = CHUNK_SIZE):
+    """
+    Schrijf tiles naar een kaartbestand.
+
+    Args:
+        pad: Pad van het bestand
+        tiles: TileRaster (of ander raster met breedte, hoogte en rij())
+        chunk_grootte: Aantal tiles per zijde van een chunk
+    """
+    chunks_breed = (tiles.breedte + chunk_grootte - 1) // chunk_grootte
+    chunks_hoog = (tiles.hoogte + chunk_grootte - 1) // chunk_grootte
+    index = []
+
+    with open(pad, "wb") as bestand:
+        bestand.write(HEADER.pack(MAGIC, VERSIE, chunk_grootte, tiles.breedte, tiles.hoogte))
+        # Plaats voor de index, wordt op het einde ingevuld
+        bestand.write(bytes(INDEX_ITEM.size * chunks_breed * chunks_hoog))
+
+        for chunk_y in range(chunks_hoog):
+            for chunk_x in range(chunks_breed):
+                data = _chunk_data(tiles, chunk_x, chunk_y, chunk_grootte)
+                if data.count(data[0]) == len(data):
+                    # Hele chunk heeft dezelfde code: enkel de vulcode bewaren
+                    index.append((0, data[0]))
+                else:
+                    index.append((bestand.tell(), 0))
+                    bestand.write(data)
+
+        bestand.seek(HEADER.size)
+        for offset, vulcode in index:
+            bestand.write(INDEX_ITEM.pack(offset, vulcode))
+
+
+def _chunk_data(tiles, chunk_x: int, chunk_y: int, chunk_grootte: int) -> bytes:
+    """Geef de tile codes van één chunk; tiles buiten de kaart worden muur (1)."""
+    x_start = chunk_x * chunk_grootte
+    y_start = chunk_y * chunk_grootte
+    breedte = min(chunk_grootte, tiles.breedte - x_start)
+    opvulling = bytes([1]) * (chunk_grootte - breedte)
+
+    rijen = []
+    for y in range(y_start, y_start + chunk_grootte):
+        if y < tiles.hoogte:
+            rijen.append(tiles.rij(x_start, y, breedte) + opvulling)
+        else:
+            rijen.append(bytes([1]) * chunk_grootte)
+    return b"".join(rijen)
+
+
+class GechunktRaster:
+    """
+    Raster van tile codes dat rechtstreeks uit een kaartbestand gelezen wordt.
+
+    # Het bestand wordt met mmap geopend: het besturingssysteem laadt enkel
+    # de stukken van het bestand die we echt lezen. Met houd_geladen() geven
+    # we aan welke chunks rond de camera nodig zijn; de rest mag vergeten worden.
+    # Gewijzigde chunks worden naar het geheugen gekopieerd (het bestand blijft
+    # ongewijzigd tot je het opnieuw wegschrijft met schrijf_kaart).
+    """
+
+    def __init__(self, pad: str):
+        """
+        Open een kaartbestand.
+
+        Args:
+            pad: Pad van het kaartbestand
+        """
+        self._bestand = open(pad, "rb")
+        self._mm = mmap.mmap(self._bestand.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, versie, self.chunk_grootte, self.breedte, self.hoogte = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or versie != VERSIE:
+            self._mm.close()
+            self._bestand.close()
+            raise ValueError(f"{pad} is geen geldig kaartbestand (versie {VERSIE})")
+
+        self.chunks_breed = (self.breedte + self.chunk_grootte - 1) // self.chunk_grootte
+        self.chunks_hoog = (self.hoogte + self.chunk_grootte - 1) // self.chunk_grootte
+        aantal = self.chunks_breed * self.chunks_hoog
+        self._index = [INDEX_ITEM.unpack_from(self._mm, HEADER.size + i * INDEX_ITEM.size) for i in range(aantal)]
+
+        # Per chunk: None (niet geladen), een memoryview op het bestand,
+        # gedeelde bytes (chunk met één vulcode) of een bytearray (gewijzigd)
+        self._chunks = [None] * aantal
+        self._vulchunks = {}  # vulcode -> bytes
+        self._mmap_chunks = set()  # indexen van chunks die als memoryview geladen zijn
+        self._geladen_gebied = None
+        # Functies die (chunk_x, chunk_y, codes) krijgen als een chunk geladen wordt,
+        # en (chunk_x, chunk_y, None) als hij weer vergeten wordt (zie TileMap)
+        self.luisteraars = []
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.sluit()
+
+
+    def sluit(self):
+        """Sluit het kaartbestand."""
+        for chunk_index in self._mmap_chunks:
+            self._chunks[chunk_index].release()
+        self._mmap_chunks.clear()
+        self._chunks = []
+        self._mm.close()
+        self._bestand.close()
+
+
+    def _laad_chunk(self, chunk_index: int):
+        """Maak een chunk beschikbaar (zonder de data te kopiëren)."""
+        offset, vulcode = self._index[chunk_index]
+        oppervlakte = self.chunk_grootte * self.chunk_grootte
+        if offset == 0:
+            chunk = self._vulchunks.get(vulcode)
+            if chunk is None:
+                chunk = bytes([vulcode]) * oppervlakte
+                self._vulchunks[vulcode] = chunk
+        else:
+            chunk = memoryview(self._mm)[offset:offset + oppervlakte]
+            self._mmap_chunks.add(chunk_index)
+        self._chunks[chunk_index] = chunk
+        for luisteraar in self.luisteraars:
+            luisteraar(chunk_index % self.chunks_breed, chunk_index // self.chunks_breed, chunk)
+        return chunk
+
+
+    def geef(self, x: int, y: int) -> int:
+        """Geef de tile code op (x, y)."""
+        c = self.chunk_grootte
+        chunk_index = (y // c) * self.chunks_breed + x // c
+        chunk = self._chunks[chunk_index]
+        if chunk is None:
+            chunk = self._laad_chunk(chunk_index)
+        return chunk[(y % c) * c + x % c]
+
+
+    def zet(self, x: int, y: int, code: int):
+        """Zet de tile code op (x, y); de chunk wordt eerst naar het geheugen gekopieerd."""
+        c = self.chunk_grootte
+        chunk_index = (y // c) * self.chunks_breed + x // c
+        chunk = self._chunks[chunk_index]
+        if not isinstance(chunk, bytearray):
+            if chunk is None:
+                chunk = self._laad_chunk(chunk_index)
+            kopie = bytearray(chunk)
+            if isinstance(chunk, memoryview):
+                chunk.release()
+                self._mmap_chunks.discard(chunk_index)
+            chunk = kopie
+            self._chunks[chunk_index] = chunk
+        chunk[(y % c) * c + x % c] = code
+
+
+    def rij(self, x: int, y: int, lengte: int) -> bytes:
+        """Geef de tile codes van een stuk rij, vanaf (x, y) naar rechts."""
+        return bytes(self.geef(x + i, y) for i in range(lengte))
+
+
+    def houd_geladen(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """
+        Laad de chunks binnen een gebied (in tiles) en vergeet de andere.
+        Gewijzigde chunks blijven altijd bewaard.
+        """
+        c = self.chunk_grootte
+        gebied = (
+            max(0, x_min // c), max(0, y_min // c),
+            min(self.chunks_breed - 1, x_max // c), min(self.chunks_hoog - 1, y_max // c),
+        )
+        if gebied == self._geladen_gebied:
+            return
+        self._geladen_gebied = gebied
+        chunk_x_min, chunk_y_min, chunk_x_max, chunk_y_max = gebied
+
+        for chunk_index in list(self._mmap_chunks):
+            chunk_x = chunk_index % self.chunks_breed
+            chunk_y = chunk_index // self.chunks_breed
+            if not (chunk_x_min <= chunk_x <= chunk_x_max and chunk_y_min <= chunk_y <= chunk_y_max):
+                self._chunks[chunk_index].release()
+                self._chunks[chunk_index] = None
+                self._mmap_chunks.remove(chunk_index)
+                for luisteraar in self.luisteraars:
+                    luisteraar(chunk_x, chunk_y, None)
+
+        for chunk_y in range(chunk_y_min, chunk_y_max + 1):
+            for chunk_x in range(chunk_x_min, chunk_x_max + 1):
+                chunk_index = chunk_y * self.chunks_breed + chunk_x
+                if self._chunks[chunk_index] is None:
+                    self._laad_chunk(chunk_index)
+                    self._vraag_pagina_op(chunk_index)
+
+
+    def _vraag_pagina_op(self, chunk_index: int):
+        """Vraag het besturingssysteem om de data van een chunk alvast te laden."""
+        offset = self._index[chunk_index][0]
+        if offset == 0 or not hasattr(self._mm, "madvise"):
+            return
+        begin = offset - offset % mmap.PAGESIZE
+        self._mm.madvise(mmap.MADV_WILLNEED, begin, offset + self.chunk_grootte * self.chunk_grootte - begin)
+
+
+def main():
+    """Zet de standaard schoolkaart (TileMap._maak_kaart) om naar een kaartbestand."""
+    from tilemap import TileMap
+    from config import MAP_WIDTH, MAP_HEIGHT
+
+    if len(sys.argv) not in (2, 4):
+        print("Gebruik: python kaartbestand.py <bestand> [breedte hoogte]")
+        sys.exit(1)
+
+    pad = sys.argv[1]
+    breedte, hoogte = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) == 4 else (MAP_WIDTH, MAP_HEIGHT)
+    schrijf_kaart(pad, TileMap(breedte, hoogte).tiles)
+    print(f"Kaart van {breedte}x{hoogte} tiles geschreven naar {pad}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Latentie - Meet hoe lang het duurt voor een toets op het scherm te zien is.
+
+Voor elke toets onthouden we wanneer de game loop hem binnenkreeg
+(verwerk_input). De toets wordt uitgevoerd in de volgende simulatiestap
+en is pas te zien na de eerstvolgende pygame.display.flip() of update().
+De tijd tussen binnenkomen en die flip is de latentie van de toets.
+
+Gebruik:
+    python latentie.py --seconden 5 --toetsen 8     # 8 bewegingstoetsen per frame (key repeat)
+"""
+from collections import deque
+import argparse
+import statistics
+import time
+
+
+class LatentieMeter:
+    """
+    Houdt de latentie bij van elke toets, van binnenkomen tot op het scherm.
+
+    # Toetsen worden in volgorde uitgevoerd, dus een rij van tijdstippen is
+    # genoeg: ontvangen() voegt achteraan toe, verwerkt() schuift de eerste
+    # naar de uitgevoerde toetsen en getoond() rekent hun latentie uit.
+    """
+
+    def __init__(self, venster: int = 1000):
+        """
+        Initialiseer de meter.
+
+        Args:
+            venster: Aantal laatste toetsen voor de percentielen
+        """
+        self.latenties = deque(maxlen=venster)  # in seconden
+        self._wachtend = deque()  # tijdstippen van toetsen die nog niet uitgevoerd zijn
+        self._uitgevoerd = []  # tijdstippen van uitgevoerde toetsen die nog niet getoond zijn
+
+
+    def ontvangen(self):
+        """Een toets komt binnen (roep dit op als hij in de wachtrij van de game komt)."""
+        self._wachtend.append(time.perf_counter())
+
+
+    def verwerkt(self, aantal: int):
+        """De eerste aantal wachtende toetsen zijn uitgevoerd in een simulatiestap."""
+        for _ in range(min(aantal, len(self._wachtend))):
+            self._uitgevoerd.append(self._wachtend.popleft())
+
+
+    def getoond(self):
+        """Het scherm is net bijgewerkt (na display.flip of update): alle uitgevoerde toetsen zijn nu te zien."""
+        if not self._uitgevoerd:
+            return
+        nu = time.perf_counter()
+        self.latenties.extend(nu - ontvangen for ontvangen in self._uitgevoerd)
+        self._uitgevoerd.clear()
+
+
+    def percentielen(self) -> dict[str, float] | None:
+        """
+        Latentie in milliseconden over het venster.
+
+        Returns:
+            {"p50": ms, "p99": ms, "max": ms}, of None als er nog geen toetsen waren
+        """
+        if len(self.latenties) < 2:
+            return None
+        percentielen = statistics.quantiles(self.latenties, n=100)
+        return {"p50": percentielen[49] * 1000, "p99": percentielen[98] * 1000, "max": max(self.latenties) * 1000}
+
+
+    def rapport(self) -> str:
+        waarden = self.percentielen()
+        if waarden is None:
+            return "latentie: te weinig toetsen"
+        return (f"latentie ({len(self.latenties)} toetsen): p50 {waarden['p50']:.1f} ms, "
+                f"p99 {waarden['p99']:.1f} ms, max {waarden['max']:.1f} ms")
+
+
+def main():
+    # Hier pas importeren: main.py gebruikt deze module ook
+    import pygame
+    from benchmark import maak_game
+
+    parser = argparse.ArgumentParser(description="Meet de latentie van toetsen tijdens een stortvloed aan bewegingstoetsen (headless)")
+    parser.add_argument("--seconden", type=float, default=5)
+    parser.add_argument("--toetsen", type=int, default=8, help="bewegingstoetsen per frame (zoals bij key repeat)")
+    parser.add_argument("--npcs", type=int, default=100)
+    parser.add_argument("--kaart", default="200x200")
+    args = parser.parse_args()
+
+    breedte, hoogte = (int(waarde) for waarde in args.kaart.lower().split("x"))
+    richtingen = (pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP)
+    for samenvoegen in (False, True):
+        game = maak_game(args.npcs, breedte, hoogte, 60, 3)
+        game.invoer_samenvoegen = samenvoegen
+        game.latentie = LatentieMeter(venster=1_000_000)
+        frames = 0
+        einde = time.perf_counter() + args.seconden
+        while time.perf_counter() < einde:
+            # Een rondje van args.toetsen stappen per richting, de toetsen komen in groepjes binnen
+            events = []
+            for nummer in range(args.toetsen):
+                toets = richtingen[(frames * args.toetsen + nummer) // 20 % len(richtingen)]
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=toets, unicode="", mod=0, scancode=0))
+            game.stap(events=events)  # echte tijd en FPS limiet, zoals tijdens het spelen
+            frames += 1
+        print(f"{'samengevoegd' if samenvoegen else 'toets per toets'}: {frames / args.seconden:.0f} fps, {game.latentie.rapport()}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
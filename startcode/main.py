@@ -1,20 +1,81 @@
 """
 Main - Hoofdprogramma voor het RPG School spel.
 """
+import os
 import pygame
 import sys
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, COLORS, MAP_WIDTH, MAP_HEIGHT
+import time
+from config import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, SIM_STAPPEN_PER_SECONDE, MAX_SIM_STAPPEN, IDLE_MODUS, CURSOR_KNIPPER_MS, COLORS, MAP_WIDTH, MAP_HEIGHT, MAP_FILE, VIEW_WIDTH, VIEW_HEIGHT, TILE_SIZE, CHUNK_SIZE, DIRTY_RECTS, ZICHTVELD, ZICHT_STRAAL, NPC_BUDGET_MS, REGIO_SIMULATIE, REGIO_GROOTTE, REGIO_INTERVAL, REGIO_WERKERS, SAVE_FILE, AUTOSAVE_SECONDEN, OPNAME_FILE, SERVER_ADRES, PROFILER, PROFILER_TRACE_FILE, ALLOCATIE_TRACKER, LATENTIE_METEN, INVOER_SAMENVOEGEN
 from models.karakter import Karakter
+from entiteiten import EntiteitOpslag, VLAG_DWAALT
 from models.leerkracht import Leerkracht
 from models.leerling import Leerling
 from models.whiteboard import Whiteboard
 from tilemap import TileMap
+from bezetting import BezettingsIndex
+from camera import Camera
+from zichtveld import Zichtveld
+from padvinding import PadVinder
+from planner import GedragsPlanner
+from profiler import Profiler
+from allocatie_tracker import AllocatieTracker
+from latentie import LatentieMeter
+from bewaren import Bewaarbestand
+from opname import Opnemer
+from regio_simulatie import RegioSimulatie
+from client import NetwerkClient
+import protocol
+
+
+# Boven, Onder, Links, Rechts
+RICHTINGEN = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Pijltjestoets -> (dx, dy)
+BEWEGINGS_TOETSEN = {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)}
+
+
+def maak_npcs() -> list[Karakter]:
+    """Maak de NPCs van de school (ook gebruikt door de multiplayer server, zie server.py)."""
+    # POLYMORFISME: lijst bevat Karakter objecten (ook Leerkracht & Leerling)
+    # Verhaal NPCs met custom dialoog
+
+    # Whiteboard object (speciaal - heeft eigen class)
+    whiteboard = Whiteboard(2, 1)
+
+    return [
+        # Whiteboard in klaslokaal
+        whiteboard,
+
+        # OEFENING 1: Uncomment Dirk nadat je Leerkracht.beschrijf() hebt gemaakt
+        # Leerkracht("Dirk", 54, "Geschiedenis", 4, 1, 
+        #           "Iemand heeft het whiteboard verpest! Kun jij het schoonmaken?"),
+
+        # OEFENING 2: Uncomment deze Leerlingen nadat je Leerling class hebt gemaakt
+        # Leerling("Warre", 15, "3A", 4, 5,
+        #         "Psst! Ik hoorde dat je permanente marker eraf krijgt met deo."),
+
+        # Leerling("Sara", 16, "4B", 10, 9,
+        #         "Er ligt volgens mij deo in de kleedkamer van de turnzaal!"),
+
+        # Leerling("Siebe", 16, "3B", 17, 10,
+        #         "Wil je de turnzaal in? Win van mij met schaar-steen-papier! (Typ T)"),
+    ]
 
 
 class Game:
     
-    def __init__(self):
-        """Initialiseer het spel."""
+    def __init__(self, kaart_breedte: int = MAP_WIDTH, kaart_hoogte: int = MAP_HEIGHT, headless: bool = False, server: str | None = SERVER_ADRES):
+        """
+        Initialiseer het spel.
+        
+        Args:
+            kaart_breedte: Breedte van de kaart in tiles (als er geen MAP_FILE is)
+            kaart_hoogte: Hoogte van de kaart in tiles (als er geen MAP_FILE is)
+            headless: True = zonder zichtbaar venster (voor benchmarks en tests)
+            server: "host:poort" van een multiplayer server, of None om alleen te spelen
+        """
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
         pygame.init()
         
         # Scherm setup
@@ -25,79 +86,304 @@ class Game:
         # Game state
         self.game_bezig = True
         self.bericht = "OH NEE! Iemand tekende met permanente marker op het whiteboard!"
+        # Melding van de profiler toetsen: staat in de HUD tot de volgende toets, maar hoort niet
+        # bij de spellogica (wordt niet opgenomen en telt niet mee in opname.toestand_hash)
+        self.ui_bericht = None
         
         # Text input state
         self.is_typing = False
         self.input_text = ""
         self.typing_target = None  # NPC waarnaar we typen
         
-        # Maak tilemap
-        self.tilemap = TileMap(MAP_WIDTH, MAP_HEIGHT)
+        # Vaste simulatiestap: de logica loopt aan SIM_STAPPEN_PER_SECONDE, tekenen zo vaak als het lukt
+        self.opslag = EntiteitOpslag()  # posities, kleuren en vlaggen van de karakters van deze game
+        self.stap_duur = 1 / SIM_STAPPEN_PER_SECONDE
+        self.sim_stap = 0  # aantal gesimuleerde stappen
+        self.sim_tijd = 0.0  # speltijd in seconden (sim_stap * stap_duur)
+        self._accumulator = 0.0  # echte tijd die nog niet gesimuleerd is
+        self._vorige_frame = time.perf_counter()
+        self._invoer = []  # toetsen die wachten op de volgende simulatiestap
+        self.invoer_samenvoegen = INVOER_SAMENVOEGEN  # bewegingstoetsen na elkaar als één beweging uitvoeren
+        self.latentie = LatentieMeter() if LATENTIE_METEN else None  # tijd van toets tot scherm
+        self.opname = None  # Opnemer die de uitgevoerde toetsen bewaart (zie opname.py)
         
-        # POLYMORFISME: lijst bevat Karakter objecten (ook Leerkracht & Leerling)
-        # Verhaal NPCs met custom dialoog
+        # Multiplayer: de server bepaalt de kaart, de NPCs en waar iedereen staat (zie client.py)
+        self.netwerk = NetwerkClient(server) if server is not None else None
         
-        # Whiteboard object (speciaal - heeft eigen class)
-        whiteboard = Whiteboard(2, 1)
+        # Maak tilemap (of laad ze uit een kaartbestand)
+        if self.netwerk is not None:
+            self.tilemap = self.netwerk.maak_tilemap()
+        elif MAP_FILE is not None:
+            self.tilemap = TileMap.laad(MAP_FILE)
+        else:
+            self.tilemap = TileMap(kaart_breedte, kaart_hoogte)
         
-        self.npcs = [
-            # Whiteboard in klaslokaal
-            whiteboard,
-            
-            # OEFENING 1: Uncomment Dirk nadat je Leerkracht.beschrijf() hebt gemaakt
-            # Leerkracht("Dirk", 54, "Geschiedenis", 4, 1, 
-            #           "Iemand heeft het whiteboard verpest! Kun jij het schoonmaken?"),
-            
-            # OEFENING 2: Uncomment deze Leerlingen nadat je Leerling class hebt gemaakt
-            # Leerling("Warre", 15, "3A", 4, 5,
-            #         "Psst! Ik hoorde dat je permanente marker eraf krijgt met deo."),
-            
-            # Leerling("Sara", 16, "4B", 10, 9,
-            #         "Er ligt volgens mij deo in de kleedkamer van de turnzaal!"),
-            
-            # Leerling("Siebe", 16, "3B", 17, 10,
-            #         "Wil je de turnzaal in? Win van mij met schaar-steen-papier! (Typ T)"),
-        ]
+        # NPCs (zie maak_npcs); in multiplayer komen ze van de server
+        self.npcs = maak_npcs() if self.netwerk is None else []
+        for npc in self.npcs:
+            npc.verhuis(self.opslag)
+        
+        # Routes zoeken over de kaart (afstandsvelden worden gedeeld tussen NPCs)
+        self.padvinder = PadVinder(self.tilemap)
+        
+        # Index van NPC posities voor snelle collision checks
+        self.bezetting = BezettingsIndex(self.tilemap.botsing)
+        
+        # NPC gedrag wordt over de frames verdeeld
+        self.planner = GedragsPlanner(NPC_BUDGET_MS, klok=lambda: self.sim_tijd)
+        
+        for npc in self.npcs:
+            self.bezetting.voeg_toe(npc)
+            self.planner.plan(npc)
         
         # Speler start in klaslokaal
         self.speler = Karakter("Jij", 17, 3, 3, COLORS["geel"], "Dat ben jij!")
+        self.speler.verhuis(self.opslag)
+        if self.netwerk is not None:
+            self.netwerk.koppel(self)
+        
+        # Bewaren en laden (niet in headless modus: benchmarks en tests beginnen altijd vers)
+        self.bewaarbestand = None
+        self._volgende_autosave = 0.0
+        if SAVE_FILE is not None and OPNAME_FILE is None and self.netwerk is None and not headless:
+            self.bewaarbestand = Bewaarbestand(SAVE_FILE)
+            self.bewaarbestand.koppel(self)
+            try:
+                if self.bewaarbestand.laad(self):
+                    self.bericht = "Spel geladen. " + self.bericht
+            except ValueError as fout:
+                self.bericht = f"Kon het spel niet laden: {fout}"
+            self._volgende_autosave = time.perf_counter() + AUTOSAVE_SECONDEN
+        
+        # Opname van alle toetsen (om bugs opnieuw af te spelen met opname.py)
+        if OPNAME_FILE is not None and self.netwerk is None and not headless:
+            Opnemer(OPNAME_FILE, self, seed=time.time_ns())
+        
+        # Leerlingen ver van de camera wandelen rond in andere processen (niet in headless modus en niet tijdens een opname:
+        # hoe ver ze komen hangt af van hoe snel de werkers zijn, dus het resultaat is niet herhaalbaar)
+        self.regio_simulatie = None
+        if REGIO_SIMULATIE and self.opname is None and self.netwerk is None and not headless:
+            for npc in self.npcs:
+                if isinstance(npc, Leerling):
+                    npc.vlaggen |= VLAG_DWAALT
+            self.regio_simulatie = RegioSimulatie(self.bezetting, self.opslag, REGIO_GROOTTE, REGIO_INTERVAL, REGIO_WERKERS)
+        
+        # Camera volgt de speler; enkel het zichtbare stuk van de kaart wordt getekend
+        self.camera = Camera(VIEW_WIDTH, VIEW_HEIGHT, self.tilemap.breedte, self.tilemap.hoogte)
+        self.wereld_rect = pygame.Rect(0, 0, VIEW_WIDTH * TILE_SIZE, VIEW_HEIGHT * TILE_SIZE)  # stuk van het scherm boven de HUD
+        
+        # Zichtveld van de speler: wat hij niet kan zien, wordt niet getekend (mist)
+        self.zichtveld = Zichtveld(self.tilemap, ZICHT_STRAAL) if ZICHTVELD else None
+        self.zicht = None  # Zicht vanaf de huidige positie van de speler
+        
+        # Meet hoe lang elke fase van de game loop duurt (F3 = overlay, F4 = trace opslaan)
+        self.profiler = Profiler(actief=PROFILER)
+        self.allocaties = AllocatieTracker(self.profiler) if ALLOCATIE_TRACKER else None
+        if self.allocaties is not None:
+            self.allocaties.start()
+        
+        # Dirty rect modus: enkel gewijzigde stukken van het scherm hertekenen
+        self.dirty_rects = DIRTY_RECTS
+        self._getekend = None  # karakter -> (visuele staat, rect op het scherm) van de vorige frame
+        self._getekende_hud = None
+        self._getekende_camera = None
+        self._getekend_zicht = None
+        
+        # Idle modus: wachten op input in plaats van 60 keer per seconde hertekenen
+        self.idle_modus = IDLE_MODUS
+        self.cursor_zichtbaar = True
+        self._moet_tekenen = True  # eerste frame altijd tekenen
+        self._animatie_tot = 0.0  # tot dit tijdstip (time.perf_counter) draait de loop op FPS
+        if self.idle_modus:
+            # De game gebruikt geen muis of toets-loslaten: daar hoeven we niet voor wakker te worden
+            pygame.event.set_blocked([pygame.MOUSEMOTION, pygame.KEYUP])
+
+
+    def voeg_npc_toe(self, npc: Karakter):
+        """Voeg een NPC toe aan het spel."""
+        npc.verhuis(self.opslag)
+        self.npcs.append(npc)
+        self.bezetting.voeg_toe(npc)
+        self.planner.plan(npc)
+        if self.regio_simulatie is not None and isinstance(npc, Leerling):
+            npc.vlaggen |= VLAG_DWAALT
 
 
-    def verwerk_input(self):
-        for event in pygame.event.get():
+    def verwijder_npc(self, npc: Karakter):
+        """Verwijder een NPC uit het spel."""
+        self.npcs.remove(npc)
+        self.bezetting.verwijder(npc)
+        self.planner.annuleer(npc)
+
+
+    def verwerk_input(self, events: list | None = None):
+        """
+        Verwerk de input events.
+        Spel toetsen worden pas in de volgende simulatiestap uitgevoerd (zie simuleer).
+        
+        Args:
+            events: De events om te verwerken, of None om ze zelf op te halen
+        """
+        if events is None:
+            events = pygame.event.get()
+        if events:
+            self._moet_tekenen = True
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.game_bezig = False
             
             elif event.type == pygame.KEYDOWN:
-                # Als we in typing mode zijn, verwerk tekst input
-                if self.is_typing:
-                    self.verwerk_typing_input(event)
+                # Profiler toetsen werken altijd, ook tijdens het typen
+                if event.key == pygame.K_F3:
+                    self.profiler.wissel_overlay()
+                elif event.key == pygame.K_F4:
+                    self.profiler.exporteer_chrome_trace(PROFILER_TRACE_FILE)
+                    self.ui_bericht = f"Profiler trace opgeslagen in {PROFILER_TRACE_FILE}"
                 else:
-                    # Normale game input
-                    # Beweging: één stap per toets
-                    # dx = verandering in x-richting, dy = verandering in y-richting
-                    dx, dy = 0, 0       
-                    
-                    if event.key == pygame.K_LEFT:
-                        dx = -1
-                    elif event.key == pygame.K_RIGHT:
-                        dx = 1
-                    elif event.key == pygame.K_UP:
-                        dy = -1
-                    elif event.key == pygame.K_DOWN:
-                        dy = 1
-                    
-                    # Beweeg speler als er een verandering is
-                    if dx != 0 or dy != 0:
-                        self.beweeg_speler(dx, dy)
-                    
-                    # Interactie met E-toets
-                    elif event.key == pygame.K_e:
-                        self.probeer_interactie()
-                    
-                    # Typing mode activeren met T-toets
-                    elif event.key == pygame.K_t:
-                        self.probeer_typen()
+                    self.ui_bericht = None
+                    self._invoer.append(event)
+                    if self.latentie is not None:
+                        self.latentie.ontvangen()
+
+
+    def verwerk_toets(self, event):
+        """Voer één toets uit (tijdens een simulatiestap)."""
+        # Als we in typing mode zijn, verwerk tekst input
+        if self.is_typing:
+            self.verwerk_typing_input(event)
+            return
+        
+        # Normale game input
+        # Beweging: één stap per toets
+        # dx = verandering in x-richting, dy = verandering in y-richting
+        dx, dy = 0, 0       
+        
+        if event.key == pygame.K_LEFT:
+            dx = -1
+        elif event.key == pygame.K_RIGHT:
+            dx = 1
+        elif event.key == pygame.K_UP:
+            dy = -1
+        elif event.key == pygame.K_DOWN:
+            dy = 1
+        
+        # Beweeg speler als er een verandering is
+        if dx != 0 or dy != 0:
+            self.beweeg_speler(dx, dy)
+        
+        # Interactie met E-toets
+        elif event.key == pygame.K_e:
+            self.probeer_interactie()
+        
+        # Typing mode activeren met T-toets
+        elif event.key == pygame.K_t:
+            self.probeer_typen()
+
+
+    def simuleer(self):
+        """
+        Eén vaste simulatiestap: wachtende toetsen uitvoeren en NPC gedrag.
+        Elke stap duurt even lang (stap_duur), dus de logica is onafhankelijk van het tekenen.
+        """
+        self.opslag.bewaar_vorige()  # vanaf hier wordt tussen oude en nieuwe posities getekend
+        
+        invoer, self._invoer = self._invoer, []
+        stappen = []  # opeenvolgende bewegingstoetsen: samen uitgevoerd (zie beweeg_speler_stappen)
+        samenvoegen = self.invoer_samenvoegen and self.netwerk is None
+        for event in invoer:
+            if self.opname is not None:
+                self.opname.neem_op(self.sim_stap, event)
+            richting = BEWEGINGS_TOETSEN.get(event.key) if samenvoegen and not self.is_typing else None
+            if richting is not None:
+                stappen.append(richting)
+                continue
+            if stappen:
+                self.beweeg_speler_stappen(stappen)
+                stappen = []
+            self.verwerk_toets(event)
+        if stappen:
+            self.beweeg_speler_stappen(stappen)
+        if invoer and self.latentie is not None:
+            self.latentie.verwerkt(len(invoer))
+        
+        with self.profiler.fase("npc_gedrag"):
+            bijgewerkt, _ = self.planner.verwerk(self)  # binnen het tijdsbudget
+        if self.netwerk is not None:
+            with self.profiler.fase("netwerk"):
+                bijgewerkt = self.netwerk.verwerk(self) or bijgewerkt
+        if self.regio_simulatie is not None:
+            with self.profiler.fase("regio_simulatie"):
+                verplaatst = self.regio_simulatie.verplaatst
+                self.regio_simulatie.stap(self.sim_tijd, self.camera.zichtbaar_gebied(marge=REGIO_GROOTTE), NPC_BUDGET_MS)
+                bijgewerkt = bijgewerkt or self.regio_simulatie.verplaatst != verplaatst
+        if invoer or bijgewerkt:
+            self._moet_tekenen = True
+        
+        self.sim_stap += 1
+        self.sim_tijd = self.sim_stap * self.stap_duur
+
+
+    def _lege_stappen(self) -> int:
+        """Aantal volgende simulatiestappen waarin zeker niets gebeurt (geen toetsen, niemand onderweg, geen NPC beurt)."""
+        if self._invoer or self.opslag.onderweg() or (self.netwerk is not None and self.netwerk.heeft_data()):
+            return 0
+        volgende_npc = self._volgende_tijdstip()
+        if volgende_npc is None:
+            return sys.maxsize
+        return max(0, int((volgende_npc - self.sim_tijd) / self.stap_duur))
+
+
+    def _volgende_tijdstip(self) -> float | None:
+        """Speltijd waarop de planner of de regio simulatie weer iets te doen heeft (None = nooit)."""
+        tijdstippen = [self.planner.volgende_tijdstip()]
+        if self.regio_simulatie is not None:
+            tijdstippen.append(self.regio_simulatie.volgende_tijdstip())
+        tijdstippen = [tijdstip for tijdstip in tijdstippen if tijdstip is not None]
+        return min(tijdstippen) if tijdstippen else None
+
+
+    def _sla_stappen_over(self, aantal: int):
+        """Tel lege stappen mee zonder ze te simuleren (het resultaat is hetzelfde, zie _lege_stappen)."""
+        self.sim_stap += aantal
+        self.sim_tijd = self.sim_stap * self.stap_duur
+
+
+    def spoel_door(self, tot_stap: int):
+        """
+        Simuleer tot aan een bepaalde stap, zo snel mogelijk (zonder tekenen en zonder klok).
+        
+        Args:
+            tot_stap: Simulatiestap waar we moeten uitkomen
+        """
+        while self.sim_stap < tot_stap:
+            overslaan = min(tot_stap - self.sim_stap, self._lege_stappen())
+            if overslaan:
+                self._sla_stappen_over(overslaan)
+            else:
+                self.simuleer()
+
+
+    def _tel_sim_stappen(self) -> int:
+        """Hoeveel simulatiestappen er deze frame moeten gebeuren (volgens de echte tijd)."""
+        nu = time.perf_counter()
+        self._accumulator += nu - self._vorige_frame
+        self._vorige_frame = nu
+        
+        # Lege stappen (tot de volgende NPC beurt) overslaan in plaats van ze één voor één te simuleren
+        overbodig = min(int(self._accumulator / self.stap_duur) - 1, self._lege_stappen())
+        if overbodig > 0:
+            self._sla_stappen_over(overbodig)
+            self._accumulator -= overbodig * self.stap_duur
+        
+        # Frame skipping: na een trage frame meerdere stappen na elkaar zonder tussendoor te tekenen.
+        # Meer dan MAX_SIM_STAPPEN laten we vallen: dan vertraagt het spel even in plaats van vast te lopen.
+        stappen = int(self._accumulator / self.stap_duur)
+        if stappen > MAX_SIM_STAPPEN:
+            stappen = MAX_SIM_STAPPEN
+            self._accumulator = stappen * self.stap_duur
+        self._accumulator -= stappen * self.stap_duur
+        return stappen
 
 
     def probeer_typen(self):
@@ -112,8 +398,16 @@ class Game:
     def verwerk_typing_input(self, event):
         """Verwerk typing input."""
         if event.key == pygame.K_RETURN:
-            # POLYMORFISME: elk karakter reageert op eigen manier
-            self.bericht = self.typing_target.verwerk_bericht(self.input_text, self.speler.inventory)
+            if self.netwerk is not None:
+                self.netwerk.stuur(protocol.BERICHT, tekst=self.input_text)  # het antwoord komt van de server
+            else:
+                # POLYMORFISME: elk karakter reageert op eigen manier
+                inventory = self.speler.inventory
+                voor = tuple(inventory)
+                self.bericht = self.typing_target.verwerk_bericht(self.input_text, inventory)
+                if tuple(inventory) != voor:
+                    self.speler.inventory = inventory  # items gekregen of gegeven: markeer de speler als gewijzigd
+                self.planner.plan(self.typing_target)  # meteen een beurt: misschien wil het nu ergens naartoe
             
             self.is_typing = False
             self.typing_target = None
@@ -131,26 +425,66 @@ class Game:
             dx: Verandering in x-richting (tiles)
             dy: Verandering in y-richting (tiles)
         """
+        if self.netwerk is not None:
+            self.netwerk.stuur(protocol.BEWEEG, dx, dy)  # de server beslist en stuurt de nieuwe positie terug
+            return
+        
         nieuwe_x = self.speler.x_tile + dx
         nieuwe_y = self.speler.y_tile + dy
         
-        # Check collision
-        if self.tilemap.is_blokkade(nieuwe_x, nieuwe_y):
+        # Check collision (muren en NPCs in één opzoeking; pas als het niet mag, kijken we waarom)
+        if self.tilemap.botsing.is_vrij(nieuwe_x, nieuwe_y):
+            self.speler.beweeg(dx, dy)
+        elif self.tilemap.botsing.is_muur(nieuwe_x, nieuwe_y):
             self.bericht = "Je kunt niet door muren heen lopen!"
-        elif self.is_npc_op_positie(nieuwe_x, nieuwe_y):
+        else:
             self.bericht = "Je kunt niet door mensen heen lopen!"
+
+
+    def beweeg_speler_stappen(self, stappen: list[tuple[int, int]]):
+        """
+        Voer een reeks stappen uit als één beweging (bv. een stortvloed aan toetsen door key repeat).
+        Het resultaat is hetzelfde als beweeg_speler voor elke stap, maar de speler, de
+        bezetting en het scherm worden maar één keer bijgewerkt.
+        
+        Args:
+            stappen: Lijst van (dx, dy), in volgorde
+        """
+        if len(stappen) == 1:
+            self.beweeg_speler(*stappen[0])
+            return
+        
+        botsing = self.tilemap.botsing
+        start = x, y = self.speler.x_tile, self.speler.y_tile
+        assen = set()  # 0 = horizontaal, 1 = verticaal: over welke assen de speler echt bewoog
+        for dx, dy in stappen:
+            nieuwe_x, nieuwe_y = x + dx, y + dy
+            if botsing.is_vrij(nieuwe_x, nieuwe_y):
+                x, y = nieuwe_x, nieuwe_y
+                assen.add(0 if dx else 1)
+            elif botsing.is_muur(nieuwe_x, nieuwe_y):
+                self.bericht = "Je kunt niet door muren heen lopen!"
+            else:
+                self.bericht = "Je kunt niet door mensen heen lopen!"
+        
+        if (x, y) == start:
+            return
+        if len(assen) == 1:
+            self.speler.beweeg(x - start[0], y - start[1])  # rechte lijn: glijdt in één keer naar de laatste tile
         else:
-            self.speler.beweeg(dx, dy)
+            self.speler.plaats(x, y)  # de weg draaide: rechtdoor glijden zou door muren gaan
+
+
+    def is_vrij(self, x_tile: int, y_tile: int) -> bool:
+        """Of een NPC naar deze tile mag stappen (geen muur, geen ander karakter en niet de speler)."""
+        return self.tilemap.botsing.is_vrij(x_tile, y_tile) and (x_tile, y_tile) != (self.speler.x_tile, self.speler.y_tile)
 
 
     def is_npc_op_positie(self, x_tile: int, y_tile: int) -> bool:
         """
         Check of er een NPC of object op een bepaalde positie staat; geeft True als dat het geval is.
         """
-        for npc in self.npcs:
-            if npc.x_tile == x_tile and npc.y_tile == y_tile:
-                return True
-        return False
+        return self.bezetting.is_bezet(x_tile, y_tile)
 
 
     def vind_aangrenzende_npc(self) -> Karakter | None:
@@ -161,16 +495,14 @@ class Game:
             Het NPC object, of None als er geen naast staat
         """
         # Check alle vier richtingen
-        richtingen = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # Boven, Onder, Links, Rechts
-        
-        for dx, dy in richtingen:
+        for dx, dy in RICHTINGEN:
             check_x = self.speler.x_tile + dx
             check_y = self.speler.y_tile + dy
             
             # Check of er een NPC op die positie staat
-            for npc in self.npcs:
-                if npc.x_tile == check_x and npc.y_tile == check_y:
-                    return npc
+            npc = self.bezetting.op_positie(check_x, check_y)
+            if npc is not None:
+                return npc
         
         return None
 
@@ -182,6 +514,10 @@ class Game:
         # POLYMORFISME: Roep interact() aan op een Karakter object, kies juiste versie:
         # Bv. als het een Leerkracht is -> Leerkracht.interact()
         """
+        if self.netwerk is not None:
+            self.netwerk.stuur(protocol.INTERACTIE)
+            return
+        
         npc = self.vind_aangrenzende_npc()
         
         if npc:
@@ -193,28 +529,331 @@ class Game:
 
 
     def teken(self):
+        self.camera.volg(self.speler)
+        
+        # Houd enkel de stukken van de kaart rond de camera in het geheugen
+        # (eerst: het zichtveld heeft de muren van deze chunks nodig)
+        self.tilemap.tiles.houd_geladen(*self.camera.zichtbaar_gebied(marge=CHUNK_SIZE))
+        
+        # Zichtveld: enkel opnieuw berekend als de speler op een nieuwe tile staat of er een tile of chunk veranderde
+        if self.zichtveld is not None:
+            with self.profiler.fase("zichtveld"):
+                self.zicht = self.zichtveld.zicht(self.speler.x_tile, self.speler.y_tile)
+                self.zichtveld.onthoud(self.zicht)
+        
+        if self.dirty_rects:
+            self.teken_gewijzigd()
+        else:
+            self.teken_alles()
+
+
+    def teken_alles(self):
+        """Teken het volledige scherm opnieuw."""
         self.scherm.fill(COLORS["wit"])
+        offset = self.camera.offset
         
-        self.tilemap.teken(self.scherm, self.bericht, self.is_typing, self.input_text, self.speler.inventory)
+        with self.profiler.fase("TileMap.teken"):
+            self._teken_tiles(self.wereld_rect, offset)
         
         # POLYMORFISME: alle NPCs worden op dezelfde manier getekend
-        for npc in self.npcs:
-            npc.teken(self.scherm)
+        # Elk karakter is één sprite, dus alles gaat in één blits() oproep.
+        # Karakters mogen niet over de HUD getekend worden.
+        self.scherm.set_clip(self.wereld_rect)
+        self._teken_karakters(self._zichtbare_karakters(), offset)
+        self.scherm.set_clip(None)
+        
+        with self.profiler.fase("_teken_hud"):
+            self.tilemap.teken_hud(self.scherm, self.getoond_bericht, self.is_typing, self.input_text, self.speler.inventory, self.cursor_zichtbaar)
+        
+        if self.profiler.overlay_zichtbaar:
+            self.profiler.teken_overlay(self.scherm)
+        
+        with self.profiler.fase("display"):
+            pygame.display.flip()
+        if self.latentie is not None:
+            self.latentie.getoond()
+        
+        if self.dirty_rects:
+            self._getekend = {karakter: (karakter.visuele_staat(), karakter.geef_rect().move(offset)) for karakter in self._zichtbare_karakters()}
+            self._getekende_hud = self._hud_staat()
+            self._getekende_camera = (self.camera.x, self.camera.y)
+            self._getekend_zicht = self.zicht
+            self.tilemap.neem_gewijzigde_rects()
+
+
+    def teken_gewijzigd(self):
+        """
+        Teken enkel de stukken van het scherm die veranderd zijn sinds de vorige frame.
+        Als er niets veranderd is, wordt er ook niets getekend.
+        """
+        # Eerste frame, de camera is verschoven, de speler ziet iets anders of de profiler overlay staat aan: alles hertekenen
+        if (self._getekend is None or self._getekende_camera != (self.camera.x, self.camera.y)
+                or self._getekend_zicht is not self.zicht or self.profiler.overlay_zichtbaar):
+            self.teken_alles()
+            return
+        
+        offset = self.camera.offset
+        
+        # 1. Verzamel de gewijzigde stukken (in scherm pixels)
+        rects = [rect.move(offset) for rect in self.tilemap.neem_gewijzigde_rects()]
+        
+        getekend = {}
+        for karakter in self._zichtbare_karakters():
+            staat = karakter.visuele_staat()
+            vorige = self._getekend.pop(karakter, None)
+            if vorige is not None and vorige[0] == staat:
+                getekend[karakter] = vorige
+                continue
+            
+            # Karakter is nieuw of veranderd: oude en nieuwe plek hertekenen
+            rect = karakter.geef_rect().move(offset)
+            getekend[karakter] = (staat, rect)
+            rects.append(rect)
+            if vorige is not None:
+                rects.append(vorige[1])
+        
+        # Karakters die verdwenen zijn (of niet meer zichtbaar)
+        for _, rect in self._getekend.values():
+            rects.append(rect)
+        self._getekend = getekend
+        
+        hud_staat = self._hud_staat()
+        if hud_staat != self._getekende_hud:
+            rects.append(self.tilemap.hud_rect)
+            self._getekende_hud = hud_staat
+        
+        if not rects:
+            # Niets te tekenen: wat de uitgevoerde toetsen deden, staat dus al op het scherm
+            if self.latentie is not None:
+                self.latentie.getoond()
+            return
+        
+        # 2. Herteken elk gewijzigd stuk
+        for rect in rects:
+            wereld_deel = rect.clip(self.wereld_rect)
+            if wereld_deel.width and wereld_deel.height:
+                self.scherm.set_clip(wereld_deel)
+                with self.profiler.fase("TileMap.teken"):
+                    self._teken_tiles(wereld_deel, offset)
+                self._teken_karakters(self._karakters_in(wereld_deel), offset)
+            if rect.colliderect(self.tilemap.hud_rect):
+                self.scherm.set_clip(rect)
+                with self.profiler.fase("_teken_hud"):
+                    self.tilemap.teken_hud(self.scherm, self.getoond_bericht, self.is_typing, self.input_text, self.speler.inventory, self.cursor_zichtbaar)
+        self.scherm.set_clip(None)
+        
+        # 3. Toon enkel de gewijzigde stukken
+        with self.profiler.fase("display"):
+            pygame.display.update(rects)
+        if self.latentie is not None:
+            self.latentie.getoond()
+
+
+    def _teken_karakters(self, karakters: list[Karakter], offset: tuple[int, int]):
+        """Teken karakters met zo weinig mogelijk blits() oproepen (elk karakter is één sprite)."""
+        if self.profiler.actief and self.profiler.details:
+            # Tijdens het profilen meten we elk karakter apart
+            for karakter in karakters:
+                with self.profiler.fase("Karakter.teken", karakter.naam):
+                    karakter.teken_op_scherm(self.scherm, offset)
+            return
+        with self.profiler.fase("npcs"):
+            sprites = []
+            for karakter in karakters:
+                if type(karakter).teken is Karakter.teken:
+                    sprites.append(karakter.sprite_en_positie(offset))
+                    continue
+                # Een subklasse met een eigen teken(): eerst wat eronder hoort blitten, zodat de volgorde klopt
+                if sprites:
+                    self.scherm.blits(sprites, False)
+                    sprites = []
+                karakter.teken_op_scherm(self.scherm, offset)
+            if sprites:
+                self.scherm.blits(sprites, False)
+
+
+    def _teken_tiles(self, gebied: pygame.Rect, offset: tuple[int, int]):
+        """Teken de tiles in een stuk van het scherm, met mist over wat de speler niet ziet."""
+        self.tilemap.teken_tiles(self.scherm, gebied, offset)
+        if self.zicht is not None:
+            self.zichtveld.teken_mist(self.scherm, self.zicht, gebied, offset)
+
+
+    def _kan_zien(self, karakter: Karakter) -> bool:
+        """Of de speler een karakter kan zien (altijd True zonder zichtveld)."""
+        return self.zicht is None or karakter is self.speler or self.zicht.ziet(karakter.x_tile, karakter.y_tile)
+
+
+    def _zichtbare_npcs(self) -> list[Karakter]:
+        """Geef de NPCs die (deels) binnen de camera staan en die de speler kan zien."""
+        # Eén tile marge: sommige karakters (zoals het whiteboard) zijn breder dan hun tile
+        npcs = self.bezetting.in_rechthoek(*self.camera.zichtbaar_gebied(marge=1))
+        if self.zicht is None:
+            return npcs
+        return [npc for npc in npcs if self.zicht.ziet(npc.x_tile, npc.y_tile)]
+
+
+    def _zichtbare_karakters(self) -> list[Karakter]:
+        """Alle zichtbare karakters in de volgorde waarin ze getekend worden (speler bovenaan)."""
+        karakters = self._zichtbare_npcs()
+        karakters.append(self.speler)
+        return karakters
+
+
+    def _karakters_in(self, rect: pygame.Rect) -> list[Karakter]:
+        """
+        Geef de karakters die (deels) in een rechthoek getekend worden.
+        
+        Args:
+            rect: Rechthoek in scherm pixels
+        """
+        wereld = rect.move(-self.camera.offset[0], -self.camera.offset[1])
+        
+        # Eén tile marge: sommige karakters (zoals het whiteboard) zijn breder dan hun tile
+        karakters = self.bezetting.in_rechthoek(
+            wereld.left // TILE_SIZE - 1, wereld.top // TILE_SIZE - 1,
+            (wereld.right - 1) // TILE_SIZE + 1, (wereld.bottom - 1) // TILE_SIZE + 1,
+        )
+        karakters.append(self.speler)
+        return [karakter for karakter in karakters if karakter.geef_rect().colliderect(wereld) and self._kan_zien(karakter)]
+
+
+    @property
+    def getoond_bericht(self) -> str:
+        """Het bericht in de HUD: een melding van de profiler gaat voor."""
+        return self.ui_bericht or self.bericht
+
+
+    def _hud_staat(self) -> tuple:
+        """Alles wat bepaalt hoe de HUD eruitziet."""
+        return (self.getoond_bericht, self.is_typing, self.input_text, tuple(self.speler.inventory), self.cursor_zichtbaar)
+
+
+    def _werk_cursor_bij(self):
+        """Laat de typ-cursor knipperen (hertekenen als hij van toestand wisselt)."""
+        zichtbaar = not self.is_typing or (pygame.time.get_ticks() // CURSOR_KNIPPER_MS) % 2 == 0
+        if zichtbaar != self.cursor_zichtbaar:
+            self.cursor_zichtbaar = zichtbaar
+            self._moet_tekenen = True
+
+
+    def animeer(self, seconden: float):
+        """Laat de game loop een tijdje op de volle FPS draaien (bv. voor een animatie)."""
+        self._animatie_tot = max(self._animatie_tot, time.perf_counter() + seconden)
+
+
+    def is_geanimeerd(self) -> bool:
+        """Of de loop nu op de volle FPS moet draaien in plaats van te wachten op input."""
+        return (self.profiler.overlay_zichtbaar or time.perf_counter() < self._animatie_tot
+                or bool(self._invoer) or self.opslag.onderweg()
+                or (self.netwerk is not None and self.netwerk.heeft_data()))
+
+
+    def _wachttijd_ms(self) -> int | None:
+        """
+        Hoe lang de loop mag wachten tot de volgende timer afgaat.
+        
+        Returns:
+            Aantal milliseconden, of None als er geen timer is (wachten tot er input komt)
+        """
+        wachttijden = []
+        if self.is_typing:
+            wachttijden.append(CURSOR_KNIPPER_MS - pygame.time.get_ticks() % CURSOR_KNIPPER_MS)
+        volgende_npc = self._volgende_tijdstip()
+        if volgende_npc is not None:
+            # De stap op speltijd sim_tijd volgt zodra de accumulator een hele stap vol is
+            wachttijden.append((max(volgende_npc, self.sim_tijd) - self.sim_tijd + self.stap_duur - self._accumulator) * 1000)
+        if not wachttijden:
+            return None
+        return max(0, int(min(wachttijden)) + 1)  # +1: liever net te laat dan net te vroeg wakker worden
+
+
+    def wacht_op_events(self) -> list:
+        """
+        Slaap tot er input is of tot de volgende timer afgaat.
+        
+        Returns:
+            De events die binnenkwamen (leeg als een timer afging)
+        """
+        wachttijd = self._wachttijd_ms()
+        if wachttijd == 0:
+            return pygame.event.get()
+        
+        # pygame.event.wait() blokkeert zonder CPU te gebruiken
+        event = pygame.event.wait() if wachttijd is None else pygame.event.wait(wachttijd)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events.extend(pygame.event.get())
+        return events
+
+
+    def stap(self, fps: int = FPS, events: list | None = None, sim_stappen: int | None = None):
+        """
+        Eén keer door de game loop.
+        
+        Args:
+            fps: Maximum aantal frames per seconde (0 = zo snel mogelijk)
+            events: Al opgehaalde input events (zie wacht_op_events), of None
+            sim_stappen: Precies zoveel simulatiestappen doen (bv. 1 voor benchmarks),
+                         of None om de echte tijd te volgen
+        """
+        self.profiler.begin_frame()
+        
+        with self.profiler.fase("verwerk_input"):
+            self.verwerk_input(events)  # 1. Verwerk input
+        
+        # 2. Simulatie in vaste stappen (0, 1 of meer per frame)
+        if sim_stappen is None:
+            sim_stappen = self._tel_sim_stappen()
+            self.opslag.alpha = self._accumulator / self.stap_duur
+        else:
+            self.opslag.alpha = 1.0
+        with self.profiler.fase("simulatie"):
+            for _ in range(sim_stappen):
+                self.simuleer()
+        self._werk_cursor_bij()
+        
+        # 3. Teken alles (in idle modus enkel als er iets veranderd kan zijn)
+        if self._moet_tekenen or not self.idle_modus or self.is_geanimeerd():
+            with self.profiler.fase("teken"):
+                self.teken()
+            self._moet_tekenen = False
+        with self.profiler.fase("klok.tick"):
+            self.klok.tick(fps)       # 4. Klok tick (wachten = idle tijd)
         
-        self.speler.teken(self.scherm)
+        # 5. Autosave: enkel de deltas, het schrijven gebeurt op de achtergrond
+        if self.bewaarbestand is not None and time.perf_counter() >= self._volgende_autosave:
+            with self.profiler.fase("autosave"):
+                self.bewaarbestand.bewaar(self)
+            self._volgende_autosave = time.perf_counter() + AUTOSAVE_SECONDEN
         
-        pygame.display.flip()
+        self.profiler.einde_frame()
 
 
     def run(self):
         while self.game_bezig:       # Game loop
-            self.verwerk_input()      # 1. Verwerk input
-            self.teken()              # 2. Teken alles
-            self.klok.tick(FPS)       # 3. Klok tick
+            events = None
+            if self.idle_modus and not self.is_geanimeerd():
+                events = self.wacht_op_events()  # slapen tot er input is of een timer afgaat
+            self.stap(events=events)
         
+        if self.opname is not None:
+            self.opname.sluit(self)
+        if self.bewaarbestand is not None:
+            self.bewaarbestand.bewaar(self, volledig=True)
+            self.bewaarbestand.sluit()
+        if self.regio_simulatie is not None:
+            self.regio_simulatie.sluit()
+        if self.netwerk is not None:
+            self.netwerk.sluit()
+        if self.allocaties is not None:
+            self.allocaties.stop()
+            print(self.allocaties.rapport())
+        if self.latentie is not None:
+            print(self.latentie.rapport())
         pygame.quit()
-        sys.exit()
 
 
-game = Game()
-game.run()
+if __name__ == "__main__":
+    game = Game()
+    game.run()
+    sys.exit()
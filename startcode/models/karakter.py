@@ -2,16 +2,45 @@
 Karakter - Superklasse voor alle personages in het spel.
 Demonstreert basis voor overerving.
 """
+import functools
+import inspect
 import pygame
 from config import TILE_SIZE, COLORS
+from tekst_cache import tekst_cache
+from entiteiten import standaard_opslag
+from sprites import sprite_cache
+from intenties import herkenner_voor
+
+
+@functools.cache
+def _kent_offset(teken) -> bool:
+    """Of een teken() methode een offset aanneemt, of enkel teken(self, scherm) is (zoals vroeger)."""
+    parameters = inspect.signature(teken).parameters.values()
+    return len(parameters) >= 3 or any(parameter.kind is parameter.VAR_POSITIONAL for parameter in parameters)
 
 
 class Karakter:
     """
     Basisklasse voor alle karakters (speler en NPCs).
     Dit is de SUPERKLASSE: gemeenschappelijke eigenschappen en methoden komen hier.
+    
+    # Positie en kleur staan niet in het object zelf maar in een EntiteitOpslag
+    # (zie entiteiten.py); x_tile, y_tile en kleur zijn properties die daar lezen.
+    # __slots__ houdt elk karakter klein: geen __dict__ per object. Wil je in een
+    # subklasse eigen attributen toevoegen, zet ze dan in de __slots__ van die
+    # subklasse (of laat daar __slots__ weg: enkel die subklasse krijgt dan een __dict__).
     """
     
+    __slots__ = ("naam", "leeftijd", "dialoog", "bezetting", "doel", "_inventory", "_opslag", "_index", "__weakref__")
+    
+    # Trefwoorden in getypte berichten waarop dit karakter reageert: trefwoord -> naam van een methode
+    # die (bericht, speler_inventory) krijgt en een antwoord teruggeeft, bv. {"hallo": "groet"}.
+    # Subklassen vullen dit aan; alles wordt per klasse één keer omgezet naar een IntentieHerkenner.
+    INTENTIES = {}
+    
+    # Seconden per stap als het karakter ergens naartoe wandelt (zie ga_naar)
+    STAP_SECONDEN = 0.25
+    
     def __init__(self, naam: str, leeftijd: int, x_tile: int, y_tile: int, kleur: tuple[int, int, int], dialoog: str):
         """
         Initialiseer een karakter.
@@ -24,13 +53,102 @@ class Karakter:
             kleur: RGB kleur tuple
             dialoog: Dialoog voor dit karakter
         """
+        self._opslag = standaard_opslag
+        self._index = self._opslag.nieuw(self, x_tile, y_tile, kleur)
         self.naam = naam
         self.leeftijd = leeftijd
-        self.x_tile = x_tile
-        self.y_tile = y_tile
-        self.kleur = kleur
         self.dialoog = dialoog
-        self.inventory = []  # Simpel inventory systeem
+        self._inventory = None  # Simpel inventory systeem (lijst wordt pas gemaakt als hij nodig is)
+        self.bezetting = None  # BezettingsIndex waarin dit karakter staat (indien van toepassing)
+        self.doel = None  # tile (x, y) waar het karakter naartoe wandelt, of None
+
+
+    @property
+    def index(self) -> int:
+        """Plaats van dit karakter in de EntiteitOpslag (uniek zolang het karakter bestaat)."""
+        return self._index
+
+
+    def verhuis(self, opslag):
+        """
+        Zet dit karakter in een andere EntiteitOpslag (bv. die van de Game waar het bij hoort).
+        Zijn index verandert daarbij.
+        
+        Raises:
+            ValueError: Als het karakter nog in een BezettingsIndex staat (die kent het op zijn oude index)
+        """
+        if opslag is self._opslag:
+            return
+        if self.bezetting is not None:
+            raise ValueError(f"{self.naam} staat nog in een BezettingsIndex: eerst verwijderen, dan verhuizen")
+        self._index = opslag.neem_over(self, self._opslag, self._index)
+        self._opslag = opslag
+
+
+    @property
+    def x_tile(self) -> int:
+        """X-positie in tiles (kolom)."""
+        return self._opslag.x[self._index]
+    
+    @x_tile.setter
+    def x_tile(self, waarde: int):
+        self._opslag.x[self._index] = waarde
+        self._opslag.gewijzigd.add(self._index)
+
+
+    @property
+    def y_tile(self) -> int:
+        """Y-positie in tiles (rij)."""
+        return self._opslag.y[self._index]
+    
+    @y_tile.setter
+    def y_tile(self, waarde: int):
+        self._opslag.y[self._index] = waarde
+        self._opslag.gewijzigd.add(self._index)
+
+
+    @property
+    def kleur(self) -> tuple[int, int, int]:
+        """RGB kleur tuple."""
+        return self._opslag.kleur[self._index]
+    
+    @kleur.setter
+    def kleur(self, waarde: tuple[int, int, int]):
+        self._opslag.kleur[self._index] = waarde
+        self._opslag.gewijzigd.add(self._index)
+
+
+    @property
+    def vlaggen(self) -> int:
+        """Bits met de toestand van dit karakter (zie de VLAG_ constanten in entiteiten.py)."""
+        return self._opslag.vlaggen[self._index]
+    
+    @vlaggen.setter
+    def vlaggen(self, waarde: int):
+        self._opslag.vlaggen[self._index] = waarde
+        self._opslag.gewijzigd.add(self._index)
+
+
+    @property
+    def inventory(self) -> list:
+        """
+        Inventory lijst van dit karakter.
+        Lezen markeert het karakter niet als gewijzigd: pas je de lijst zelf aan (bv. append),
+        zet hem dan terug met karakter.inventory = lijst zodat bewaren het merkt.
+        """
+        if self._inventory is None:
+            self._inventory = []
+        return self._inventory
+    
+    @inventory.setter
+    def inventory(self, waarde: list):
+        self._inventory = waarde
+        self._opslag.gewijzigd.add(self._index)
+
+
+    def inventory_inhoud(self) -> tuple:
+        """De items in de inventory als tuple (zonder het karakter als gewijzigd te markeren, bv. om te bewaren)."""
+        return tuple(self._inventory) if self._inventory else ()
 
 
     def beschrijf(self) -> str:
@@ -52,7 +170,7 @@ class Karakter:
     def verwerk_bericht(self, bericht: str, speler_inventory: list) -> str:
         """
         Verwerk een getypt bericht en geef een reactie terug.
-        Dit is de basis implementatie die gewoon echo't.
+        Dit is de basis implementatie die gewoon echo't (tenzij er een trefwoord uit INTENTIES in staat).
         Subklassen kunnen hun eigen reactie implementeren.
         
         Args:
@@ -62,27 +180,177 @@ class Karakter:
         Returns:
             De reactie van het karakter
         """
+        antwoord = self.reageer_op_intentie(bericht, speler_inventory)
+        if antwoord is not None:
+            return antwoord
         return f"{self.naam} echo't: {bericht}"
 
 
-    def teken(self, scherm: pygame.Surface):
+    def herken_intentie(self, bericht: str) -> tuple[str, str] | None:
         """
-        Teken dit karakter op het scherm.
+        Zoek het eerste trefwoord uit INTENTIES in een bericht (hoofdletters en accenten maken niet uit).
+        
+        Returns:
+            (trefwoord, naam van de methode), of None als er geen trefwoord in staat
+        """
+        return herkenner_voor(type(self)).eerste(bericht)
+
+
+    def reageer_op_intentie(self, bericht: str, speler_inventory: list) -> str | None:
+        """
+        Roep de methode op die hoort bij het eerste trefwoord in het bericht.
+        
+        Returns:
+            Het antwoord van die methode, of None als er geen trefwoord in staat
+        """
+        intentie = self.herken_intentie(bericht)
+        if intentie is None:
+            return None
+        _, methode = intentie
+        return getattr(self, methode)(bericht, speler_inventory)
+
+
+    def ga_naar(self, x_tile: int, y_tile: int):
+        """
+        Laat dit karakter langs de kortste weg naar een tile wandelen (één stap per beurt, zie update).
+        Het vertrekt bij zijn volgende beurt in de GedragsPlanner.
+        """
+        self.doel = (x_tile, y_tile)
+
+
+    def update(self, game) -> float | None:
         """
-        # Bereken pixel positie
-        x_px = self.x_tile * TILE_SIZE
-        y_px = self.y_tile * TILE_SIZE
+        Gedrag van dit karakter, opgeroepen door de GedragsPlanner als het zijn beurt is.
+        Standaard wandelt een karakter naar zijn doel (zie ga_naar) en doet het verder niets.
+        Subklassen kunnen hier bv. rondwandelen.
+        
+        # De weg komt uit het afstandsveld van game.padvinder: alle karakters
+        # met hetzelfde doel delen één veld, een stap kost dus enkel een opzoeking.
+        
+        Args:
+            game: Het Game object (of de SpelServer)
+            
+        Returns:
+            Aantal seconden tot de volgende beurt, of None om geen beurten meer te krijgen
+        """
+        if self.doel is None:
+            return None
+        stap = game.padvinder.volgende_stap(self.x_tile, self.y_tile, self.doel)
+        if stap is None:
+            self.doel = None  # aangekomen, of het doel is niet (meer) bereikbaar
+            return None
+        dx, dy = stap
+        if game.is_vrij(self.x_tile + dx, self.y_tile + dy):
+            self.beweeg(dx, dy)
+        return self.STAP_SECONDEN  # stond er iemand in de weg: volgende beurt opnieuw proberen
+
+
+    def sprite_sleutel(self) -> tuple:
+        """
+        Alles wat bepaalt hoe dit karakter eruitziet, los van zijn positie.
+        Karakters met dezelfde sleutel delen dezelfde sprite (zie SpriteCache).
+        """
+        return (type(self).__name__, self.kleur, self.naam[:5])
+
+
+    def visuele_staat(self) -> tuple:
+        """
+        Alles wat bepaalt hoe en waar dit karakter getekend wordt.
+        Als dit niet verandert, hoeft het karakter niet opnieuw getekend te worden.
+        """
+        return self.pixel_positie() + self.sprite_sleutel()
+
+
+    def pixel_positie(self) -> tuple[int, int]:
+        """
+        Linkerbovenhoek van de tile van dit karakter in wereld pixels.
+        
+        # Tijdens een stap tekenen we het karakter tussen zijn vorige en zijn
+        # huidige tile (opslag.alpha), zo glijdt het van tile naar tile.
+        """
+        opslag, index = self._opslag, self._index
+        x, y = opslag.x[index], opslag.y[index]
+        vorige_x, vorige_y = opslag.vorige_x[index], opslag.vorige_y[index]
+        if x == vorige_x and y == vorige_y:
+            return x * TILE_SIZE, y * TILE_SIZE
+        alpha = opslag.alpha
+        return (round((vorige_x + (x - vorige_x) * alpha) * TILE_SIZE),
+                round((vorige_y + (y - vorige_y) * alpha) * TILE_SIZE))
+
+
+    def geef_rect(self) -> pygame.Rect:
+        """Geef de rechthoek (in wereld pixels) waarin dit karakter getekend wordt."""
+        return pygame.Rect(self.pixel_positie(), (TILE_SIZE, TILE_SIZE))
+
+
+    def maak_sprite(self) -> pygame.Surface:
+        """
+        Teken dit karakter één keer op een eigen surface.
+        De SpriteCache bewaart het resultaat zolang sprite_sleutel() niet verandert.
+        """
+        sprite = pygame.Surface((TILE_SIZE, TILE_SIZE))
         
         # Teken karakter als rechthoek
-        rect = pygame.Rect(x_px, y_px, TILE_SIZE, TILE_SIZE)
-        pygame.draw.rect(scherm, self.kleur, rect)
-        pygame.draw.rect(scherm, COLORS["zwart"], rect, 2)  # Rand
+        rect = sprite.get_rect()
+        pygame.draw.rect(sprite, self.kleur, rect)
+        pygame.draw.rect(sprite, COLORS["zwart"], rect, 2)  # Rand
         
         # Teken naam label
-        font = pygame.font.Font(None, 14)
-        tekst = font.render(self.naam[:5], True, COLORS["zwart"])
-        tekst_rect = tekst.get_rect(center=(x_px + TILE_SIZE // 2, y_px + TILE_SIZE // 2))
-        scherm.blit(tekst, tekst_rect)
+        tekst = tekst_cache.render(self.naam[:5], 14, COLORS["zwart"])
+        tekst_rect = tekst.get_rect(center=rect.center)
+        sprite.blit(tekst, tekst_rect)
+        return sprite
+
+
+    def sprite_en_positie(self, offset: tuple[int, int] = (0, 0)) -> tuple[pygame.Surface, tuple[int, int]]:
+        """
+        Geef de sprite en de plaats op het scherm, klaar voor scherm.blit() of scherm.blits().
+        
+        Args:
+            offset: Verschuiving in pixels van wereld naar scherm (zie Camera.offset)
+        """
+        rect = self.geef_rect()
+        return sprite_cache.geef(self), (rect.x + offset[0], rect.y + offset[1])
+
+
+    def teken(self, scherm: pygame.Surface, offset: tuple[int, int] = (0, 0)):
+        """
+        Teken dit karakter op het scherm.
+        
+        Args:
+            scherm: Pygame scherm surface
+            offset: Verschuiving in pixels van wereld naar scherm (zie Camera.offset)
+        """
+        scherm.blit(*self.sprite_en_positie(offset))
+
+
+    def teken_op_scherm(self, scherm: pygame.Surface, offset: tuple[int, int]):
+        """
+        Roep teken() op, ook als een subklasse die nog schrijft als teken(self, scherm).
+        
+        # Zo'n teken() tekent in wereld pixels en kent de camera niet. We zetten het
+        # karakter dan even op zijn plaats op het scherm (de camera schuift per hele
+        # tile) en daarna terug. De opslag merkt daar niets van: niets wordt gewijzigd.
+        """
+        if _kent_offset(type(self).teken):
+            self.teken(scherm, offset)
+            return
+        dx, dy = offset[0] // TILE_SIZE, offset[1] // TILE_SIZE
+        if not dx and not dy:
+            self.teken(scherm)
+            return
+        opslag, index = self._opslag, self._index
+        opslag.x[index] += dx
+        opslag.y[index] += dy
+        opslag.vorige_x[index] += dx
+        opslag.vorige_y[index] += dy
+        try:
+            self.teken(scherm)
+        finally:
+            opslag.x[index] -= dx
+            opslag.y[index] -= dy
+            opslag.vorige_x[index] -= dx
+            opslag.vorige_y[index] -= dy
 
 
     def beweeg(self, dx: int, dy: int):
@@ -93,6 +361,29 @@ class Karakter:
             dx: Verandering in x-richting (tiles)
             dy: Verandering in y-richting (tiles)
         """
-        self.x_tile += dx
-        self.y_tile += dy
+        opslag, index = self._opslag, self._index
+        oude_x, oude_y = opslag.x[index], opslag.y[index]
+        opslag.x[index] = oude_x + dx
+        opslag.y[index] = oude_y + dy
+        opslag.gewijzigd.add(index)
+        
+        # Laat de bezettingsindex weten dat we verplaatst zijn
+        if self.bezetting is not None:
+            self.bezetting.verplaats(self, oude_x, oude_y)
+
 
+    def plaats(self, x_tile: int, y_tile: int):
+        """
+        Zet het karakter meteen op een tile (zonder van zijn vorige tile te glijden).
+        
+        Args:
+            x_tile: X-positie in tiles
+            y_tile: Y-positie in tiles
+        """
+        opslag, index = self._opslag, self._index
+        oude_x, oude_y = opslag.x[index], opslag.y[index]
+        opslag.x[index] = opslag.vorige_x[index] = x_tile
+        opslag.y[index] = opslag.vorige_y[index] = y_tile
+        opslag.gewijzigd.add(index)
+        if self.bezetting is not None:
+            self.bezetting.verplaats(self, oude_x, oude_y)
@@ -4,6 +4,7 @@ Demonstreert overerving en method overriding.
 """
 from models.karakter import Karakter
 from config import COLORS
+from tilemap import TileMap
 
 
 class Leerkracht(Karakter):
@@ -12,6 +13,14 @@ class Leerkracht(Karakter):
     Dit is een SUBKLASSE: erft alles van Karakter, maar kan aanpassen en uitbreiden.
     """
     
+    __slots__ = ("vak",)
+    
+    # Typ "turnzaal" of "klaslokaal" en de leerkracht wandelt naar die deur
+    INTENTIES = {
+        "turnzaal": "naar_turnzaal",
+        "klaslokaal": "naar_klaslokaal",
+    }
+    
     def __init__(self, naam: str, leeftijd: int, vak: str, x_tile: int, y_tile: int, dialoog: str):
         """
         Initialiseer een leerkracht.
@@ -28,4 +37,15 @@ class Leerkracht(Karakter):
         """
         # TODO Oefening 1: Roep super().beschrijf() aan en voeg vakinformatie toe
         pass
-
+    
+    
+    def naar_turnzaal(self, bericht: str, speler_inventory: list) -> str:
+        """Wandel naar de deur van de turnzaal."""
+        self.ga_naar(*TileMap.DEUREN["turnzaal"])
+        return f"{self.naam}: Goed, ik loop mee naar de turnzaal."
+    
+    
+    def naar_klaslokaal(self, bericht: str, speler_inventory: list) -> str:
+        """Wandel naar de deur van het klaslokaal."""
+        self.ga_naar(*TileMap.DEUREN["klaslokaal"])
+        return f"{self.naam}: Ik ga terug naar het klaslokaal."
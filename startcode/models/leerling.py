@@ -13,6 +13,8 @@ class Leerling(Karakter):
     Dit is nog een SUBKLASSE: net als Leerkracht, maar met eigen uniek gedrag.
     """
     
+    __slots__ = ("klas", "spel")
+    
     def __init__(self, naam: str, leeftijd: int, klas: str, x_tile: int, y_tile: int, dialoog: str):
         """
         Initialiseer een leerling.
@@ -4,6 +4,7 @@ Whiteboard - Een speciaal object in het spel.
 import pygame
 from models.karakter import Karakter
 from config import TILE_SIZE, COLORS
+from entiteiten import VLAG_SCHOON
 
 
 class Whiteboard(Karakter):
@@ -12,12 +13,28 @@ class Whiteboard(Karakter):
     Erft van Karakter maar gedraagt zich anders (geen dialoog, andere tekening).
     """
     
+    __slots__ = ()
+    
     def __init__(self, x_tile: int, y_tile: int):
         """Initialiseer het whiteboard."""
         super().__init__("Whiteboard", 0, x_tile, y_tile, COLORS["rood"], "")
         self.is_schoon = False
     
     
+    @property
+    def is_schoon(self) -> bool:
+        """Of het whiteboard schoongemaakt is (bewaard als vlag in de EntiteitOpslag)."""
+        return bool(self._opslag.vlaggen[self._index] & VLAG_SCHOON)
+    
+    @is_schoon.setter
+    def is_schoon(self, waarde: bool):
+        if waarde:
+            self._opslag.vlaggen[self._index] |= VLAG_SCHOON
+        else:
+            self._opslag.vlaggen[self._index] &= ~VLAG_SCHOON
+        self._opslag.gewijzigd.add(self._index)
+    
+    
     def beschrijf(self) -> str:
         """Beschrijving van het whiteboard."""
         if self.is_schoon:
@@ -46,45 +63,48 @@ class Whiteboard(Karakter):
         pass
     
     
-    def teken(self, scherm: pygame.Surface):
-        """Teken het whiteboard - gecentreerd in de tile."""
-        # Bereken pixel positie (centrum van tile)
-        tile_x = self.x_tile * TILE_SIZE
-        tile_y = self.y_tile * TILE_SIZE
-        
+    def sprite_sleutel(self) -> tuple:
+        """Het whiteboard ziet er anders uit als het schoon is."""
+        return super().sprite_sleutel() + (self.is_schoon,)
+    
+    
+    def geef_rect(self) -> pygame.Rect:
+        """Het whiteboard is iets breder dan een tile, en gecentreerd in de tile."""
         # Whiteboard grootte (iets kleiner dan tile voor mooie look)
         breedte = int(TILE_SIZE * 1.1)
         hoogte = int(TILE_SIZE * 0.8)
-        
-        # Centreer whiteboard in de tile
-        x_px = tile_x + (TILE_SIZE - breedte) // 2
-        y_px = tile_y
-        
-        rect = pygame.Rect(x_px, y_px, breedte, hoogte)
+        x_px, y_px = self.pixel_positie()
+        return pygame.Rect(x_px + (TILE_SIZE - breedte) // 2, y_px, breedte, hoogte)
+    
+    
+    def maak_sprite(self) -> pygame.Surface:
+        """Teken het whiteboard (vuil of schoon) één keer op een eigen surface."""
+        rect = self.geef_rect()
+        sprite = pygame.Surface(rect.size)
+        rect = sprite.get_rect()
         
         # Teken witte achtergrond (het whiteboard zelf)
-        pygame.draw.rect(scherm, COLORS["wit"], rect)
+        pygame.draw.rect(sprite, COLORS["wit"], rect)
         
         # Teken rand (zwart frame)
-        pygame.draw.rect(scherm, COLORS["zwart"], rect, 2)
+        pygame.draw.rect(sprite, COLORS["zwart"], rect, 2)
         
         # Bereken centrum voor tekeningen
-        cx = x_px + breedte // 2
-        cy = y_px + hoogte // 2
+        cx, cy = rect.center
         
         # Teken "tekening" relatief aan centrum
         if not self.is_schoon:
             # Krabbels (rode lijnen) - simpel gezichtje
             # Ogen
-            pygame.draw.circle(scherm, self.kleur, (cx - 8, cy - 5), 3, 2)
-            pygame.draw.circle(scherm, self.kleur, (cx + 8, cy - 5), 3, 2)
+            pygame.draw.circle(sprite, self.kleur, (cx - 8, cy - 5), 3, 2)
+            pygame.draw.circle(sprite, self.kleur, (cx + 8, cy - 5), 3, 2)
             # Mond (lachje)
-            pygame.draw.arc(scherm, self.kleur, 
+            pygame.draw.arc(sprite, self.kleur, 
                           (cx - 10, cy - 5, 20, 15), 0, 3.14, 2)
         else:
             # Vinkje (groen) als schoon
-            pygame.draw.line(scherm, self.kleur,
+            pygame.draw.line(sprite, self.kleur,
                            (cx - 8, cy), (cx - 2, cy + 8), 3)
-            pygame.draw.line(scherm, self.kleur,
+            pygame.draw.line(sprite, self.kleur,
                            (cx - 2, cy + 8), (cx + 10, cy - 8), 3)
-
+        return sprite
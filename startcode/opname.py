@@ -0,0 +1,203 @@
+"""
+Opname - Neem de toetsen van een sessie op en speel ze later opnieuw af.
+
+Afspelen gebeurt zonder venster en zonder FPS limiet: lege stukken van de
+sessie worden overgeslagen, dus een opname van minuten speelt in een
+fractie van een seconde. Handig om een bug opnieuw te laten gebeuren, of
+als benchmark van de spellogica.
+
+Opbouw van een opnamebestand:
+    header:  magic b"RPGO", versie, random seed, kaart breedte, kaart hoogte
+    toetsen: per toets de simulatiestap waarin hij uitgevoerd werd, de toets en de tekst
+    einde:   de laatste simulatiestap en een hash van de eindtoestand
+
+Gebruik:
+    python opname.py sessie.rpgo                  # afspelen en de eindtoestand controleren
+    python opname.py sessie.rpgo --herhaal 1000   # hoeveel sessies per minuut?
+"""
+import argparse
+import hashlib
+from itertools import groupby
+from operator import itemgetter
+import random
+import struct
+import time
+import weakref
+import pygame
+
+MAGIC = b"RPGO"
+VERSIE = 2
+HEADER = struct.Struct("<4sHQII")  # magic, versie, random seed, kaart breedte, kaart hoogte
+SOORT_TOETS = 1
+SOORT_EINDE = 2
+TOETS = struct.Struct("<BQiH")  # soort, simulatiestap, toets, lengte van de utf-8 tekst
+EINDE = struct.Struct("<BQ32s")  # soort, laatste simulatiestap, hash van de eindtoestand
+TILE = struct.Struct("<iiB")  # x, y, code
+
+# Per TileMap: (x, y) -> code van elke tile die veranderde sinds volg_tiles
+_gewijzigde_tiles = weakref.WeakKeyDictionary()
+
+
+def volg_tiles(tilemap):
+    """
+    Onthoud welke tiles veranderen (voor toestand_hash).
+    Opname en afspelen beginnen van dezelfde kaart, dus enkel de veranderingen moeten in de hash:
+    zo hoeft de hash niet de hele kaart te lezen (en dus niet elke chunk van een kaartbestand te laden).
+    """
+    if tilemap in _gewijzigde_tiles:
+        return
+    tiles = _gewijzigde_tiles[tilemap] = {}
+    tilemap.luisteraars.append(lambda x_tile, y_tile, code: tiles.__setitem__((x_tile, y_tile), code))
+
+
+def toestand_hash(game) -> bytes:
+    """
+    Hash van alles wat de spellogica bepaalt (posities, vlaggen, inventory, HUD tekst, tiles).
+    Van de tiles telt enkel wat veranderde sinds volg_tiles (zie daar).
+    """
+    h = hashlib.blake2b(digest_size=32)
+    for karakter in [game.speler] + game.npcs:
+        h.update(struct.pack("<iiB", karakter.x_tile, karakter.y_tile, karakter.vlaggen))
+        h.update("\0".join(karakter.inventory_inhoud()).encode("utf-8") + b"\1")
+    h.update(f"{game.bericht}\0{game.is_typing}\0{game.input_text}".encode("utf-8"))
+    tilemap = game.tilemap
+    h.update(struct.pack("<Q", tilemap.versie))
+    for (x, y), code in sorted(_gewijzigde_tiles.get(tilemap, {}).items()):
+        h.update(TILE.pack(x, y, code))
+    return h.digest()
+
+
+class Opnemer:
+    """
+    Schrijft elke toets die de game uitvoert naar een opnamebestand.
+
+    # We bewaren de simulatiestap en niet de echte tijd: de spellogica loopt
+    # in vaste stappen, dus dezelfde toetsen in dezelfde stappen geven
+    # altijd dezelfde eindtoestand (ook op een snellere of tragere computer).
+    """
+
+    def __init__(self, pad: str, game, seed: int = 0):
+        """
+        Begin met opnemen.
+
+        Args:
+            pad: Pad van het opnamebestand
+            game: Het Game object (moet net gestart zijn)
+            seed: Seed voor de random module, zodat toeval bij het afspelen hetzelfde is
+        """
+        random.seed(seed)
+        self._bestand = open(pad, "wb")
+        self._bestand.write(HEADER.pack(MAGIC, VERSIE, seed, game.tilemap.breedte, game.tilemap.hoogte))
+        volg_tiles(game.tilemap)
+        game.opname = self
+
+
+    def neem_op(self, stap: int, event):
+        """Bewaar één toets (wordt opgeroepen door Game.simuleer)."""
+        tekst = event.unicode.encode("utf-8")
+        self._bestand.write(TOETS.pack(SOORT_TOETS, stap, event.key, len(tekst)) + tekst)
+
+
+    def sluit(self, game):
+        """Stop met opnemen en bewaar de eindtoestand (om het afspelen te controleren)."""
+        self._bestand.write(EINDE.pack(SOORT_EINDE, game.sim_stap, toestand_hash(game)))
+        self._bestand.close()
+        game.opname = None
+
+
+class Opname:
+    """Een ingelezen opname."""
+
+    def __init__(self, pad: str):
+        """
+        Lees een opnamebestand.
+
+        Raises:
+            ValueError: Als het bestand geen (geldige) opname is
+        """
+        with open(pad, "rb") as bestand:
+            data = bestand.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{pad} is geen opname")
+        magic, versie, self.seed, self.breedte, self.hoogte = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or versie != VERSIE:
+            raise ValueError(f"{pad} is geen opname (versie {VERSIE})")
+
+        self.toetsen = []  # lijst van (simulatiestap, toets, tekst)
+        self.einde_stap = None
+        self.eind_hash = None  # None als de opname niet netjes afgesloten werd (bv. na een crash)
+
+        positie = HEADER.size
+        while positie < len(data):
+            soort = data[positie]
+            if soort == SOORT_TOETS and positie + TOETS.size <= len(data):
+                _, stap, toets, lengte = TOETS.unpack_from(data, positie)
+                positie += TOETS.size
+                self.toetsen.append((stap, toets, data[positie:positie + lengte].decode("utf-8")))
+                positie += lengte
+            elif soort == SOORT_EINDE and positie + EINDE.size <= len(data):
+                _, self.einde_stap, self.eind_hash = EINDE.unpack_from(data, positie)
+                positie += EINDE.size
+            else:
+                break  # half geschreven laatste record
+        if self.einde_stap is None:
+            self.einde_stap = self.toetsen[-1][0] + 1 if self.toetsen else 0
+
+
+def speel_af(opname: Opname):
+    """
+    Speel een opname af in een nieuwe headless game, zo snel mogelijk.
+
+    # Er wordt niet getekend en er is geen klok.tick(): de toetsen gaan
+    # rechtstreeks naar Game.verwerk_toets (dus beweeg_speler,
+    # probeer_interactie, verwerk_typing_input, ...) in dezelfde
+    # simulatiestap als tijdens de opname.
+
+    Returns:
+        Het Game object in zijn eindtoestand
+    """
+    from main import Game  # hier pas importeren: main importeert de game en alles wat erbij hoort
+
+    game = Game(opname.breedte, opname.hoogte, headless=True)
+    volg_tiles(game.tilemap)
+    random.seed(opname.seed)
+    for stap, toetsen in groupby(opname.toetsen, key=itemgetter(0)):
+        game.spoel_door(stap)
+        game.verwerk_input([
+            pygame.event.Event(pygame.KEYDOWN, key=toets, unicode=tekst, mod=0, scancode=0)
+            for _, toets, tekst in toetsen
+        ])
+        game.simuleer()  # alle toetsen van deze stap, net als tijdens de opname
+    game.spoel_door(opname.einde_stap)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speel een opgenomen sessie af zonder venster")
+    parser.add_argument("opname")
+    parser.add_argument("--herhaal", type=int, default=1, help="aantal keer afspelen (als benchmark)")
+    args = parser.parse_args()
+
+    opname = Opname(args.opname)
+    print(f"{len(opname.toetsen)} toetsen in {opname.einde_stap} simulatiestappen")
+
+    start = time.perf_counter()
+    verschillend = 0
+    for _ in range(args.herhaal):
+        game = speel_af(opname)
+        if opname.eind_hash is not None and toestand_hash(game) != opname.eind_hash:
+            verschillend += 1
+    duur = time.perf_counter() - start
+
+    print(f"{args.herhaal} keer afgespeeld in {duur:.2f} s ({args.herhaal / duur * 60:.0f} sessies per minuut)")
+    if opname.eind_hash is None:
+        print("Geen eindtoestand in de opname: niets om te vergelijken")
+    elif verschillend:
+        print(f"FOUT: {verschillend} keer een andere eindtoestand dan tijdens de opname")
+    else:
+        print("Eindtoestand identiek aan de opname")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Padvinding - Routes zoeken over de TileMap.
+"""
+from collections import deque
+import heapq
+
+# Boven, Onder, Links, Rechts (karakters bewegen één tile per stap)
+RICHTINGEN = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def zoek_pad(tilemap, start: tuple[int, int], doel: tuple[int, int], max_stappen: int | None = None) -> list[tuple[int, int]] | None:
+    """
+    Zoek het kortste pad van start naar doel met A*.
+
+    Args:
+        tilemap: De TileMap (muren volgens tilemap.botsing)
+        start: Start positie (x, y)
+        doel: Doel positie (x, y)
+        max_stappen: Stop met zoeken als het pad langer zou worden, of None
+
+    Returns:
+        Lijst van posities van start tot en met doel, of None als er geen pad is
+    """
+    if start == doel:
+        return [start]
+    if tilemap.is_blokkade(*doel) or not tilemap.botsing.in_kaart(*start):
+        return None
+
+    doel_x, doel_y = doel
+    is_muur = tilemap.botsing.is_muur  # buren van tiles op de kaart: geen bounds checks nodig
+    afkomst = {start: None}
+    kosten = {start: 0}
+    teller = 0  # zorgt voor een vaste volgorde bij gelijke schattingen
+    open_lijst = [(abs(start[0] - doel_x) + abs(start[1] - doel_y), teller, start)]
+
+    while open_lijst:
+        _, _, positie = heapq.heappop(open_lijst)
+        if positie == doel:
+            return _maak_pad(afkomst, doel)
+
+        nieuwe_kosten = kosten[positie] + 1
+        if max_stappen is not None and nieuwe_kosten > max_stappen:
+            continue
+
+        x, y = positie
+        for dx, dy in RICHTINGEN:
+            buur = (x + dx, y + dy)
+            if nieuwe_kosten >= kosten.get(buur, nieuwe_kosten + 1) or is_muur(*buur):
+                continue
+            kosten[buur] = nieuwe_kosten
+            afkomst[buur] = positie
+            teller += 1
+            schatting = nieuwe_kosten + abs(buur[0] - doel_x) + abs(buur[1] - doel_y)
+            heapq.heappush(open_lijst, (schatting, teller, buur))
+
+    return None
+
+
+def _maak_pad(afkomst: dict, doel: tuple[int, int]) -> list[tuple[int, int]]:
+    """Volg de afkomst terug van doel naar start."""
+    pad = []
+    positie = doel
+    while positie is not None:
+        pad.append(positie)
+        positie = afkomst[positie]
+    pad.reverse()
+    return pad
+
+
+class AfstandsVeld:
+    """
+    Afstand (in stappen) van elke bereikbare tile tot één doel.
+
+    # Eén keer breadth-first zoeken vanaf het doel geeft de afstand voor
+    # alle tiles tegelijk. Elke NPC die naar dit doel wil, kijkt dan enkel
+    # welke buur dichter bij het doel ligt: geen zoektocht per NPC meer.
+    """
+
+    def __init__(self, tilemap, doel: tuple[int, int], max_afstand: int | None = None):
+        """
+        Bereken het afstandsveld.
+
+        Args:
+            tilemap: De TileMap (muren volgens tilemap.botsing)
+            doel: Doel positie (x, y)
+            max_afstand: Tiles verder dan dit worden niet berekend, of None voor de hele kaart
+        """
+        self.doel = doel
+        self.max_afstand = max_afstand
+        self.versie = tilemap.versie
+        self.afstanden = {}
+
+        # Enkel vrije tiles komen in de wachtrij, dus hun buren liggen hoogstens in de rand van de BotsingsKaart
+        is_muur = tilemap.botsing.is_muur
+        wachtrij = deque()
+        if tilemap.botsing.in_kaart(*doel) and not is_muur(*doel):  # een muur is voor niemand bereikbaar (zoals bij zoek_pad)
+            self.afstanden[doel] = 0
+            wachtrij.append(doel)
+        while wachtrij:
+            positie = wachtrij.popleft()
+            afstand = self.afstanden[positie] + 1
+            if max_afstand is not None and afstand > max_afstand:
+                continue
+            x, y = positie
+            for dx, dy in RICHTINGEN:
+                buur = (x + dx, y + dy)
+                if buur not in self.afstanden and not is_muur(*buur):
+                    self.afstanden[buur] = afstand
+                    wachtrij.append(buur)
+
+
+    def afstand(self, x_tile: int, y_tile: int) -> int | None:
+        """Aantal stappen tot het doel, of None als het doel niet bereikbaar is."""
+        return self.afstanden.get((x_tile, y_tile))
+
+
+    def volgende_stap(self, x_tile: int, y_tile: int) -> tuple[int, int] | None:
+        """
+        Geef de stap (dx, dy) die dichter bij het doel brengt.
+
+        Returns:
+            (dx, dy), of None als we al op het doel staan of het doel niet bereikbaar is
+        """
+        huidige = self.afstanden.get((x_tile, y_tile))
+        if not huidige:
+            return None
+        for dx, dy in RICHTINGEN:
+            if self.afstanden.get((x_tile + dx, y_tile + dy)) == huidige - 1:
+                return (dx, dy)
+        return None
+
+
+class PadVinder:
+    """
+    Zoekt routes over een TileMap en bewaart afstandsvelden voor gedeelde doelen.
+
+    # Afstandsvelden worden bewaard per doel. Als er een tile verandert
+    # (TileMap.versie gaat omhoog) wordt een veld bij het volgende gebruik
+    # opnieuw berekend.
+    """
+
+    def __init__(self, tilemap, max_afstand: int | None = None):
+        """
+        Initialiseer de padvinder.
+
+        Args:
+            tilemap: De TileMap om over te zoeken
+            max_afstand: Maximum afstand voor afstandsvelden, of None voor de hele kaart
+        """
+        self.tilemap = tilemap
+        self.max_afstand = max_afstand
+        self._velden = {}  # doel -> AfstandsVeld
+
+
+    def zoek_pad(self, start: tuple[int, int], doel: tuple[int, int]) -> list[tuple[int, int]] | None:
+        """Zoek het kortste pad van start naar doel (zie zoek_pad)."""
+        return zoek_pad(self.tilemap, start, doel, self.max_afstand)
+
+
+    def veld(self, doel: tuple[int, int]) -> AfstandsVeld:
+        """Geef het afstandsveld naar een doel; bereken het als het nog niet (of niet meer) klopt."""
+        veld = self._velden.get(doel)
+        if veld is None or veld.versie != self.tilemap.versie:
+            veld = AfstandsVeld(self.tilemap, doel, self.max_afstand)
+            self._velden[doel] = veld
+        return veld
+
+
+    def volgende_stap(self, x_tile: int, y_tile: int, doel: tuple[int, int]) -> tuple[int, int] | None:
+        """Geef de stap (dx, dy) van (x_tile, y_tile) richting doel, of None."""
+        return self.veld(doel).volgende_stap(x_tile, y_tile)
+
+
+    def vergeet(self, doel: tuple[int, int] | None = None):
+        """Verwijder het afstandsveld van één doel, of van alle doelen."""
+        if doel is None:
+            self._velden.clear()
+        else:
+            self._velden.pop(doel, None)
@@ -0,0 +1,122 @@
+"""
+GedragsPlanner - Verdeelt het NPC gedrag over de frames.
+"""
+import heapq
+import time
+
+
+class GedragsPlanner:
+    """
+    Roept Karakter.update() enkel op voor NPCs die aan de beurt zijn.
+
+    # Elke NPC zegt zelf wanneer hij weer iets wil doen (update() geeft het
+    # aantal seconden tot de volgende beurt terug). NPCs die moeten wachten
+    # kosten dus niets. Per frame is er een tijdsbudget: wat niet meer past,
+    # schuift door naar de volgende frame in plaats van de frame te vertragen.
+    """
+
+    def __init__(self, budget_ms: float = 2.0, klok=time.perf_counter):
+        """
+        Initialiseer de planner.
+
+        Args:
+            budget_ms: Maximum tijd per frame (in milliseconden) voor NPC gedrag
+            klok: Functie die de huidige speltijd in seconden geeft (bv. de simulatietijd)
+        """
+        self.budget_ms = budget_ms
+        self.klok = klok
+        self._wachtend = []  # heap van (tijdstip, prioriteit, volgnummer, karakter)
+        self._klaar = []  # heap van (prioriteit, tijdstip, volgnummer, karakter): aan de beurt
+        self._geplande = {}  # karakter -> volgnummer van zijn geldige planning
+        self._klaar_geldig = set()  # volgnummers in _klaar die nog gelden (plan() en annuleer() halen ze eruit)
+        self._volgnummer = 0
+
+        # Statistieken van de laatste frame
+        self.bijgewerkt = 0
+        self.uitgesteld = 0
+
+
+    def __len__(self) -> int:
+        return len(self._geplande)
+
+
+    def plan(self, karakter, wachttijd: float = 0.0, prioriteit: int = 0, nu: float | None = None):
+        """
+        Plan de volgende update van een karakter (vervangt een vorige planning).
+
+        Args:
+            karakter: Het karakter
+            wachttijd: Aantal seconden tot de update
+            prioriteit: Lager = eerder aan de beurt als er meerdere tegelijk wachten
+            nu: Huidige speltijd, of None om de klok te gebruiken
+        """
+        if nu is None:
+            nu = self.klok()
+        self._volgnummer += 1
+        self._klaar_geldig.discard(self._geplande.get(karakter))
+        self._geplande[karakter] = self._volgnummer
+        heapq.heappush(self._wachtend, (nu + wachttijd, prioriteit, self._volgnummer, karakter))
+
+
+    def annuleer(self, karakter):
+        """Plan een karakter niet meer in (oude planningen worden later overgeslagen)."""
+        self._klaar_geldig.discard(self._geplande.pop(karakter, None))
+
+
+    def volgende_tijdstip(self) -> float | None:
+        """
+        Geef het tijdstip (speltijd, zie klok) waarop de eerste NPC aan de beurt is.
+
+        Returns:
+            Het tijdstip, of None als er niets gepland is
+        """
+        if self._klaar_geldig:
+            return 0.0  # uitgestelde NPCs zijn nu al aan de beurt
+        if self._wachtend:
+            return self._wachtend[0][0]  # kan een geannuleerde planning zijn: dan worden we gewoon iets te vroeg wakker
+        return None
+
+
+    def verwerk(self, game, nu: float | None = None) -> tuple[int, int]:
+        """
+        Roep update() op voor de NPCs die aan de beurt zijn, binnen het tijdsbudget.
+
+        Args:
+            game: Het Game object (wordt doorgegeven aan update())
+            nu: Huidige speltijd, of None om de klok te gebruiken
+
+        Returns:
+            (aantal bijgewerkte NPCs, aantal NPCs uitgesteld naar de volgende frame)
+        """
+        if nu is None:
+            nu = self.klok()
+        einde = time.perf_counter() + self.budget_ms / 1000  # het budget is altijd echte tijd
+
+        # NPCs waarvan de tijd gekomen is, gaan naar de klaar-rij
+        while self._wachtend and self._wachtend[0][0] <= nu:
+            tijdstip, prioriteit, volgnummer, karakter = heapq.heappop(self._wachtend)
+            if self._geplande.get(karakter) == volgnummer:
+                heapq.heappush(self._klaar, (prioriteit, tijdstip, volgnummer, karakter))
+                self._klaar_geldig.add(volgnummer)
+
+        bijgewerkt = 0
+        while self._klaar:
+            if bijgewerkt and time.perf_counter() >= einde:
+                break
+            prioriteit, _, volgnummer, karakter = heapq.heappop(self._klaar)
+            if volgnummer not in self._klaar_geldig:
+                continue
+            self._klaar_geldig.remove(volgnummer)
+
+            del self._geplande[karakter]
+            wachttijd = karakter.update(game)
+            bijgewerkt += 1
+            if wachttijd is not None and karakter not in self._geplande:
+                self.plan(karakter, wachttijd, prioriteit, nu)
+
+        self.bijgewerkt = bijgewerkt
+        # Enkel geldige planningen tellen (na plan() of annuleer() blijven oude in de rij staan)
+        self.uitgesteld = len(self._klaar_geldig)
+        if not self.uitgesteld:
+            self._klaar.clear()  # wat er nog in staat, geldt niet meer
+        return self.bijgewerkt, self.uitgesteld
@@ -0,0 +1,290 @@
+"""
+Vloot - Simuleer heel veel voertuigen tegelijk, op twee manieren.
+
+1. Objecten: een lijst van Voertuig, Fiets en Auto objecten. Voor elk
+   voertuig wordt beweeg() opgeroepen (polymorfisme: Python zoekt bij elke
+   oproep de juiste methode) en elk voertuig maakt elke stap een tekst.
+2. Vloot: per soort voertuig één array per eigenschap (snelheid,
+   brandstof). Een stap is een paar bewerkingen op hele arrays. Teksten
+   worden pas gemaakt als iemand ze opvraagt.
+
+Gebruik:
+    python vloot.py --aantal 1000000 --stappen 10
+"""
+from array import array
+import argparse
+import random
+import time
+import tracemalloc
+from voertuig import Voertuig
+from fiets import Fiets
+from auto import Auto
+
+try:
+    import numpy
+except ImportError:  # numpy is optioneel: zonder numpy rekent de Vloot met gewone lussen over arrays
+    numpy = None
+
+SOORTEN = (Voertuig, Fiets, Auto)
+
+# Dezelfde teksten als beweeg() van elke klasse (Auto: rijdt / staat stil)
+TEKSTEN = {
+    Voertuig: "{naam} beweegt aan {snelheid} km/u",
+    Fiets: "{naam} fietst aan {snelheid} km/u",
+    Auto: "{naam} rijdt aan {snelheid} km/u",
+}
+TEKST_STIL = "{naam} staat stil (geen brandstof)"
+
+
+def maak_voertuigen(aantal: int, seed: int = 0) -> list[Voertuig]:
+    """Een willekeurige vloot als lijst van objecten (om de beurt Voertuig, Fiets, Auto)."""
+    toeval = random.Random(seed)
+    voertuigen = []
+    for nummer in range(aantal):
+        soort = SOORTEN[nummer % len(SOORTEN)]
+        naam = f"{soort.__name__} {nummer}"
+        if soort is Auto:
+            voertuigen.append(Auto(naam, toeval.randint(10, 120), toeval.randint(0, 20)))
+        else:
+            voertuigen.append(soort(naam, toeval.randint(10, 120)))
+    return voertuigen
+
+
+def beweeg_allemaal(voertuigen: list[Voertuig]) -> list[str]:
+    """Eén stap voor elk object (de manier van polymorf.py)."""
+    return [voertuig.beweeg() for voertuig in voertuigen]
+
+
+class Groep:
+    """Alle voertuigen van één soort, als arrays."""
+
+    def __init__(self, soort: type, indexen, snelheid, brandstof=None):
+        self.soort = soort
+        self.indexen = indexen  # plaats van elk voertuig in de hele vloot
+        self.snelheid = snelheid
+        self.brandstof = brandstof  # enkel voor Auto
+        self.rijdt = None  # enkel voor Auto: wie reed er in de laatste stap (de rest stond stil)
+
+
+class Vloot:
+    """
+    Veel voertuigen als arrays per soort, zonder een object per voertuig.
+
+    # Voertuigen van onbekende subklassen (bv. een Boot die je zelf maakt)
+    # kunnen niet in arrays: die blijven objecten en krijgen gewoon beweeg().
+    """
+
+    def __init__(self, groepen: list[Groep], aantal: int, namen: list[str] | None = None, overige=()):
+        """
+        Initialiseer de vloot (gebruik van_voertuigen of willekeurig).
+
+        Args:
+            groepen: Eén Groep per soort
+            aantal: Aantal voertuigen in totaal
+            namen: Naam per voertuig, of None voor "Soort nummer"
+            overige: (index, object) voor voertuigen die niet in een groep passen
+        """
+        self.groepen = groepen
+        self.aantal = aantal
+        self.stappen = 0
+        self._namen = namen
+        self._overige = list(overige)
+        self._overige_teksten = {}  # index -> tekst van de laatste stap
+
+        # Per voertuig: in welke groep en op welke plaats in die groep
+        self._groep_van = bytearray([255]) * aantal
+        self._plaats = array("i", bytes(4 * aantal))
+        for nummer, groep in enumerate(groepen):
+            for plaats, index in enumerate(groep.indexen):
+                self._groep_van[index] = nummer
+                self._plaats[index] = plaats
+
+
+    @classmethod
+    def van_voertuigen(cls, voertuigen: list[Voertuig]) -> "Vloot":
+        """Zet een lijst van objecten om naar een vloot (de objecten zelf worden niet meer gebruikt)."""
+        per_soort = {soort: [] for soort in SOORTEN}
+        overige = []
+        for index, voertuig in enumerate(voertuigen):
+            lijst = per_soort.get(type(voertuig))
+            if lijst is None:
+                overige.append((index, voertuig))
+            else:
+                lijst.append(index)
+
+        groepen = []
+        for soort, indexen in per_soort.items():
+            if not indexen:
+                continue
+            snelheid = [voertuigen[index].snelheid for index in indexen]
+            brandstof = [voertuigen[index].brandstof for index in indexen] if soort is Auto else None
+            groepen.append(cls._maak_groep(soort, indexen, snelheid, brandstof))
+        return cls(groepen, len(voertuigen), [voertuig.naam for voertuig in voertuigen], overige)
+
+
+    @classmethod
+    def willekeurig(cls, aantal: int, seed: int = 0) -> "Vloot":
+        """Een willekeurige vloot zoals maak_voertuigen, maar meteen als arrays (zonder objecten)."""
+        if numpy is None:
+            return cls.van_voertuigen(maak_voertuigen(aantal, seed))
+        toeval = numpy.random.default_rng(seed)
+        groepen = []
+        for nummer, soort in enumerate(SOORTEN):
+            indexen = numpy.arange(nummer, aantal, len(SOORTEN), dtype=numpy.int64)
+            snelheid = toeval.integers(10, 121, len(indexen), dtype=numpy.int32)
+            brandstof = toeval.integers(0, 21, len(indexen), dtype=numpy.int32) if soort is Auto else None
+            groepen.append(Groep(soort, indexen, snelheid, brandstof))
+        return cls(groepen, aantal)
+
+
+    @staticmethod
+    def _maak_groep(soort: type, indexen: list[int], snelheid: list[int], brandstof: list[int] | None) -> Groep:
+        if numpy is not None:
+            return Groep(
+                soort, numpy.array(indexen, dtype=numpy.int64), numpy.array(snelheid, dtype=numpy.int32),
+                None if brandstof is None else numpy.array(brandstof, dtype=numpy.int32),
+            )
+        return Groep(soort, array("q", indexen), array("i", snelheid), None if brandstof is None else array("i", brandstof))
+
+
+    def stap(self):
+        """Eén stap voor alle voertuigen (Auto verbruikt brandstof als hij nog rijdt)."""
+        for groep in self.groepen:
+            if groep.brandstof is None:
+                continue  # Voertuig en Fiets veranderen niet
+            if numpy is not None:
+                groep.rijdt = groep.brandstof > 0
+                groep.brandstof -= groep.rijdt
+            else:
+                brandstof = groep.brandstof
+                groep.rijdt = bytearray(len(brandstof))
+                for plaats, liter in enumerate(brandstof):
+                    if liter > 0:
+                        groep.rijdt[plaats] = 1
+                        brandstof[plaats] = liter - 1
+        for index, voertuig in self._overige:
+            self._overige_teksten[index] = voertuig.beweeg()
+        self.stappen += 1
+
+
+    def aantal_bijgewerkt(self) -> int:
+        """Aantal voertuigen dat stap() echt aanpast (Auto's en voertuigen die objecten bleven)."""
+        return sum(len(groep.indexen) for groep in self.groepen if groep.brandstof is not None) + len(self._overige)
+
+
+    def aantal_stil(self) -> int:
+        """Aantal auto's dat in de laatste stap stilstond."""
+        stil = 0
+        for groep in self.groepen:
+            if groep.rijdt is not None:
+                stil += len(groep.rijdt) - int(sum(groep.rijdt) if numpy is None else groep.rijdt.sum())
+        return stil
+
+
+    def naam(self, index: int) -> str:
+        if self._namen is not None:
+            return self._namen[index]
+        return f"{self.groepen[self._groep_van[index]].soort.__name__} {index}"
+
+
+    def brandstof(self, index: int) -> int | None:
+        """Brandstof van een voertuig (None als het geen Auto is)."""
+        nummer = self._groep_van[index]
+        if nummer == 255 or self.groepen[nummer].brandstof is None:
+            return None
+        return int(self.groepen[nummer].brandstof[self._plaats[index]])
+
+
+    def bericht(self, index: int) -> str | None:
+        """
+        De tekst die beweeg() in de laatste stap zou teruggeven (pas nu gemaakt).
+
+        Returns:
+            De tekst, of None als er nog geen stap geweest is
+        """
+        if not self.stappen:
+            return None
+        nummer = self._groep_van[index]
+        if nummer == 255:
+            return self._overige_teksten[index]
+        groep = self.groepen[nummer]
+        plaats = self._plaats[index]
+        tekst = TEKSTEN[groep.soort] if groep.rijdt is None or groep.rijdt[plaats] else TEKST_STIL
+        return tekst.format(naam=self.naam(index), snelheid=int(groep.snelheid[plaats]))
+
+
+    def berichten(self):
+        """Alle teksten van de laatste stap, één voor één (lazy)."""
+        if not self.stappen:
+            return
+        # Eén keer per groep naar gewone lijsten: veel sneller dan numpy element per element lezen
+        per_groep = []
+        for groep in self.groepen:
+            rijdt = None if groep.rijdt is None else list(groep.rijdt) if numpy is None else groep.rijdt.tolist()
+            snelheid = list(groep.snelheid) if numpy is None else groep.snelheid.tolist()
+            per_groep.append((TEKSTEN[groep.soort], groep.soort.__name__, snelheid, rijdt))
+        plaatsen = self._plaats
+        for index, nummer in enumerate(self._groep_van):
+            if nummer == 255:
+                yield self._overige_teksten[index]
+                continue
+            tekst, soort, snelheid, rijdt = per_groep[nummer]
+            plaats = plaatsen[index]
+            naam = self._namen[index] if self._namen is not None else f"{soort} {index}"
+            yield (tekst if rijdt is None or rijdt[plaats] else TEKST_STIL).format(naam=naam, snelheid=snelheid[plaats])
+
+
+def _meet(functie, herhaal: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(herhaal):
+        functie()
+    return (time.perf_counter() - start) / herhaal
+
+
+def _geheugen(maak):
+    tracemalloc.start()
+    resultaat = maak()
+    grootte = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultaat, grootte
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: objecten met beweeg() tegenover een vloot van arrays")
+    parser.add_argument("--aantal", type=int, default=1_000_000)
+    parser.add_argument("--stappen", type=int, default=10)
+    args = parser.parse_args()
+
+    # Controle: beide manieren geven dezelfde teksten en dezelfde brandstof
+    proef = maak_voertuigen(3000, seed=1)
+    proef_vloot = Vloot.van_voertuigen(maak_voertuigen(3000, seed=1))
+    for _ in range(25):
+        teksten = beweeg_allemaal(proef)
+        proef_vloot.stap()
+        assert teksten == list(proef_vloot.berichten())
+    assert [getattr(voertuig, "brandstof", None) for voertuig in proef] == [proef_vloot.brandstof(index) for index in range(len(proef))]
+
+    print(f"{args.aantal} voertuigen, {args.stappen} stappen{'' if numpy is not None else ' (zonder numpy)'}")
+    voertuigen, geheugen_objecten = _geheugen(lambda: maak_voertuigen(args.aantal))
+    vloot, geheugen_vloot = _geheugen(lambda: Vloot.willekeurig(args.aantal))
+    print(f"geheugen: objecten {geheugen_objecten / 1e6:.0f} MB, vloot {geheugen_vloot / 1e6:.1f} MB")
+
+    def rij(naam: str, seconden: float, bijgewerkt: int):
+        """bijgewerkt: aantal voertuigen dat in één stap echt iets doet (bij de vloot enkel de auto's)."""
+        print(f"  {naam:<42} {seconden * 1000:9.2f} ms per stap  {bijgewerkt / seconden / 1e6:9.1f} M bijgewerkt/s")
+
+    # Objecten maken bij elke stap een tekst per voertuig; de vloot enkel als je ze leest.
+    # "stap" tegenover "objecten" is dus zonder teksten tegenover met teksten;
+    # eerlijk vergelijken (allebei met teksten) doe je met "stap + alle teksten".
+    bijgewerkt = vloot.aantal_bijgewerkt()
+    print("met teksten:")
+    rij("objecten: beweeg() (alle voertuigen)", _meet(lambda: beweeg_allemaal(voertuigen), args.stappen), args.aantal)
+    rij("vloot: stap + alle teksten lezen", _meet(lambda: (vloot.stap(), list(vloot.berichten())), max(1, args.stappen // 5)), args.aantal)
+    print(f"zonder teksten (enkel de {bijgewerkt} auto's veranderen):")
+    rij("vloot: stap", _meet(vloot.stap, args.stappen), bijgewerkt)
+    rij("vloot: stap + 10 teksten lezen", _meet(lambda: (vloot.stap(), [vloot.bericht(index) for index in range(10)]), args.stappen), bijgewerkt)
+    print(f"na {vloot.stappen} stappen staan {vloot.aantal_stil()} auto's stil")
+
+
+if __name__ == "__main__":
+    main()
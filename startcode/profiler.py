@@ -0,0 +1,208 @@
+"""
+Profiler - Meet hoe lang elke fase van de game loop duurt.
+
+Toon de metingen op het scherm met F3 en schrijf ze weg als Chrome trace
+(te openen in chrome://tracing of https://ui.perfetto.dev) met F4.
+"""
+from collections import deque, defaultdict
+import json
+import time
+import pygame
+from config import COLORS
+from tekst_cache import tekst_cache
+
+
+class _Meting:
+    """Context manager die één fase meet (zie Profiler.fase)."""
+
+    __slots__ = ("profiler", "naam", "detail", "start")
+
+    def __init__(self, profiler, naam: str, detail: str | None):
+        self.profiler = profiler
+        self.naam = naam
+        self.detail = detail
+
+
+    def __enter__(self):
+        if self.profiler.allocaties is not None:
+            self.profiler.allocaties.begin_fase(self.naam)
+        self.start = time.perf_counter_ns()
+        return self
+
+
+    def __exit__(self, *args):
+        einde = time.perf_counter_ns()
+        if self.profiler.allocaties is not None:
+            self.profiler.allocaties.einde_fase()
+        self.profiler._registreer(self.naam, self.detail, self.start, einde)
+
+
+class _GeenMeting:
+    """Context manager die niets doet: zo kost de profiler bijna niets als hij uit staat."""
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        pass
+
+
+_GEEN_METING = _GeenMeting()
+
+
+class Profiler:
+    """
+    Houdt per frame bij hoeveel tijd elke fase kost.
+
+    # Gebruik: with profiler.fase("teken"): ...
+    # Per frame bewaren we de totale tijd per fase; over de laatste frames
+    # berekenen we gemiddelden en zoeken we de traagste frames.
+    """
+
+    def __init__(self, venster: int = 120, actief: bool = False, details: bool = True, max_trace_frames: int = 600):
+        """
+        Initialiseer de profiler.
+
+        Args:
+            venster: Aantal frames voor de gemiddelden en slechtste frames
+            actief: Of er meteen gemeten wordt
+            details: Of elk karakter apart gemeten wordt (trager, maar toont welk karakter traag is)
+            max_trace_frames: Aantal frames dat bewaard wordt voor de Chrome trace
+        """
+        self.actief = actief
+        self.details = details
+        self.overlay_zichtbaar = False
+        self.frames = deque(maxlen=venster)  # per frame: (totale tijd in ns, {fase: ns})
+        self.aantal_frames = 0  # alle gemeten frames (self.frames houdt enkel de laatste bij)
+        self.trace = deque(maxlen=max_trace_frames)  # per frame: lijst van (naam, detail, start_ns, einde_ns)
+
+        self._frame_start = 0
+        self._frame_fasen = defaultdict(int)
+        self._frame_events = []
+        self._overlay_regels = []
+        self.allocaties = None  # AllocatieTracker die ook per fase meet (zie allocatie_tracker.py), of None
+
+
+    def fase(self, naam: str, detail: str | None = None):
+        """
+        Meet de tijd van een blok code.
+
+        Args:
+            naam: Naam van de fase
+            detail: Extra info voor de Chrome trace (bv. de naam van een NPC)
+        """
+        if not self.actief:
+            return _GEEN_METING
+        return _Meting(self, naam, detail)
+
+
+    def _registreer(self, naam: str, detail: str | None, start: int, einde: int):
+        self._frame_fasen[naam] += einde - start
+        self._frame_events.append((naam, detail, start, einde))
+
+
+    def begin_frame(self):
+        """Markeer het begin van een frame."""
+        if self.actief:
+            if self.allocaties is not None:
+                self.allocaties.begin_frame()
+            self._frame_start = time.perf_counter_ns()
+
+
+    def einde_frame(self):
+        """Markeer het einde van een frame en bewaar zijn metingen."""
+        if not self.actief:
+            return
+        einde = time.perf_counter_ns()
+        if self.allocaties is not None:
+            self.allocaties.einde_frame()
+        self.frames.append((einde - self._frame_start, dict(self._frame_fasen)))
+        self.aantal_frames += 1
+        self._frame_events.append(("frame", None, self._frame_start, einde))
+        self.trace.append(self._frame_events)
+        self._frame_fasen.clear()
+        self._frame_events = []
+
+
+    def gemiddelden(self) -> dict[str, float]:
+        """Gemiddelde tijd per fase in milliseconden per frame (over het venster)."""
+        if not self.frames:
+            return {}
+        totalen = defaultdict(int)
+        for _, fasen in self.frames:
+            for naam, duur in fasen.items():
+                totalen[naam] += duur
+        return {naam: totaal / len(self.frames) / 1_000_000 for naam, totaal in totalen.items()}
+
+
+    def slechtste_frames(self, aantal: int = 3) -> list[tuple[float, dict[str, float]]]:
+        """
+        Geef de traagste frames in het venster.
+
+        Returns:
+            Lijst van (frametijd in ms, {fase: ms}), traagste eerst
+        """
+        slechtste = sorted(self.frames, key=lambda frame: frame[0], reverse=True)[:aantal]
+        return [
+            (totaal / 1_000_000, {naam: duur / 1_000_000 for naam, duur in fasen.items()})
+            for totaal, fasen in slechtste
+        ]
+
+
+    def wissel_overlay(self):
+        """Toon of verberg de overlay (meten gaat aan zodra de overlay getoond wordt)."""
+        self.overlay_zichtbaar = not self.overlay_zichtbaar
+        if self.overlay_zichtbaar:
+            self.actief = True
+
+
+    def teken_overlay(self, scherm: pygame.Surface):
+        """Teken de gemiddelden en de traagste frame linksboven op het scherm."""
+        # Tekst maar een paar keer per seconde vernieuwen, anders is ze onleesbaar
+        if not self._overlay_regels or self.aantal_frames % 15 == 0:
+            self._overlay_regels = self._maak_overlay_regels()
+
+        breedte = max(tekst_cache.render(regel, 18, COLORS["wit"]).get_width() for regel in self._overlay_regels) + 12
+        achtergrond = pygame.Rect(4, 4, breedte, len(self._overlay_regels) * 16 + 8)
+        pygame.draw.rect(scherm, COLORS["zwart"], achtergrond)
+        for nummer, regel in enumerate(self._overlay_regels):
+            scherm.blit(tekst_cache.render(regel, 18, COLORS["wit"]), (10, 8 + nummer * 16))
+
+
+    def _maak_overlay_regels(self) -> list[str]:
+        regels = ["Profiler (ms/frame, F4 = trace opslaan)"]
+        for naam, ms in sorted(self.gemiddelden().items(), key=lambda item: item[1], reverse=True):
+            regels.append(f"{naam}: {ms:.2f}")
+        slechtste = self.slechtste_frames(1)
+        if slechtste:
+            totaal, fasen = slechtste[0]
+            traagste_fase = max(fasen, key=fasen.get) if fasen else "-"
+            regels.append(f"slechtste frame: {totaal:.2f} ({traagste_fase})")
+        return regels
+
+
+    def exporteer_chrome_trace(self, pad: str):
+        """
+        Schrijf de bewaarde frames weg als Chrome trace-event JSON.
+
+        Args:
+            pad: Pad van het JSON bestand
+        """
+        events = []
+        for frame in self.trace:
+            for naam, detail, start, einde in frame:
+                event = {
+                    "name": naam,
+                    "ph": "X",  # "complete" event: begin + duur
+                    "ts": start / 1000,  # microseconden
+                    "dur": (einde - start) / 1000,
+                    "pid": 1,
+                    "tid": 1,
+                }
+                if detail is not None:
+                    event["args"] = {"detail": detail}
+                events.append(event)
+
+        with open(pad, "w") as bestand:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, bestand)
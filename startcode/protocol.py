@@ -0,0 +1,131 @@
+"""
+Protocol - Binaire berichten tussen de multiplayer server en de clients.
+
+Alles wat over de verbinding gaat, zit in frames: een lengte (4 bytes)
+gevolgd door één of meer records. Elk record begint met één byte die
+zegt welk soort record het is.
+
+Clients sturen enkel wat de speler wil doen (bewegen, interactie, een
+getypt bericht). De server beslist wat er gebeurt en stuurt enkel wat er
+veranderd is (deltas): wie bewoog, wie van kleur veranderde, welke tile
+veranderde, ... Enkel bij
+het verbinden krijgt een client één keer de volledige toestand (WELKOM
+en een NIEUW record per karakter).
+"""
+import struct
+import zlib
+
+FRAME = struct.Struct("<I")  # lengte van de records die volgen
+TEKST = struct.Struct("<H")  # lengte van een utf-8 tekst
+
+# Client -> server
+BEWEEG = 1
+INTERACTIE = 2
+BERICHT = 3
+
+# Server -> client
+WELKOM = 10
+NIEUW = 11
+WEG = 12
+BEWOGEN = 13
+VLAGGEN = 14
+TILE = 15
+TEKST_VOOR_SPELER = 16
+TICK = 17
+KLEUR = 18
+
+RECORDS = {
+    BEWEEG: struct.Struct("<Bbb"),  # soort, dx, dy
+    INTERACTIE: struct.Struct("<B"),  # soort
+    BERICHT: struct.Struct("<B"),  # soort (gevolgd door een tekst)
+    WELKOM: struct.Struct("<BIHHI"),  # soort, nummer van je eigen karakter, kaart breedte, hoogte, lengte van de tiles (zlib)
+    NIEUW: struct.Struct("<BIHHBBBB"),  # soort, nummer, x, y, kleur (r, g, b), vlaggen (gevolgd door "klasse/naam")
+    WEG: struct.Struct("<BI"),  # soort, nummer
+    BEWOGEN: struct.Struct("<BIHH"),  # soort, nummer, x, y
+    VLAGGEN: struct.Struct("<BIB"),  # soort, nummer, vlaggen
+    TILE: struct.Struct("<BHHB"),  # soort, x, y, code
+    TEKST_VOOR_SPELER: struct.Struct("<B"),  # soort (gevolgd door een tekst)
+    TICK: struct.Struct("<BI"),  # soort, nummer van de simulatiestap op de server
+    KLEUR: struct.Struct("<BIBBB"),  # soort, nummer, kleur (r, g, b)
+}
+MET_TEKST = {BERICHT, NIEUW, TEKST_VOOR_SPELER}
+
+MAX_FRAME = 16 * 1024 * 1024  # grotere frames zijn een fout (of een aanval)
+
+
+def record(soort: int, *velden, tekst: str | None = None) -> bytes:
+    """Maak één record (zonder frame)."""
+    data = RECORDS[soort].pack(soort, *velden)
+    if soort in MET_TEKST:
+        tekst_data = (tekst or "").encode("utf-8")[:0xFFFF]
+        data += TEKST.pack(len(tekst_data)) + tekst_data
+    return data
+
+
+def frame(*records: bytes) -> bytes:
+    """Zet records in een frame, klaar om te versturen."""
+    data = b"".join(records)
+    return FRAME.pack(len(data)) + data
+
+
+def welkom(nummer: int, tiles, breedte: int, hoogte: int) -> bytes:
+    """WELKOM record met alle tiles van de kaart (gecomprimeerd)."""
+    gecomprimeerd = zlib.compress(b"".join(tiles.rij(0, y, breedte) for y in range(hoogte)))
+    return RECORDS[WELKOM].pack(WELKOM, nummer, breedte, hoogte, len(gecomprimeerd)) + gecomprimeerd
+
+
+def _controleer_lengte(data, positie: int, lengte: int):
+    # Een slice van een te kort frame geeft gewoon minder bytes: dat moet een fout zijn
+    if positie + lengte > len(data):
+        raise struct.error(f"{lengte} bytes nodig, maar er zijn er nog {len(data) - positie}")
+
+
+def lees_records(data):
+    """
+    Lees alle records uit de inhoud van een frame.
+
+    Yields:
+        Tuples (soort, velden...); records met tekst hebben de tekst als laatste veld,
+        WELKOM heeft de (uitgepakte) tiles als laatste veld
+
+    Raises:
+        ValueError: Bij een onbekend of afgekapt record
+    """
+    data = memoryview(data)
+    positie = 0
+    while positie < len(data):
+        soort = data[positie]
+        formaat = RECORDS.get(soort)
+        if formaat is None:
+            raise ValueError(f"onbekend record {soort} op positie {positie}")
+        try:
+            velden = formaat.unpack_from(data, positie)
+            positie += formaat.size
+            if soort in MET_TEKST:
+                (lengte,) = TEKST.unpack_from(data, positie)
+                positie += TEKST.size
+                _controleer_lengte(data, positie, lengte)
+                velden += (bytes(data[positie:positie + lengte]).decode("utf-8"),)
+                positie += lengte
+            elif soort == WELKOM:
+                lengte = velden[-1]
+                _controleer_lengte(data, positie, lengte)
+                velden = velden[:-1] + (zlib.decompress(data[positie:positie + lengte]),)
+                positie += lengte
+        except (struct.error, zlib.error) as fout:
+            raise ValueError(f"afgekapt record {soort} op positie {positie}") from fout
+        yield velden
+
+
+async def lees_frame(reader) -> bytes:
+    """
+    Lees één frame van een asyncio StreamReader.
+
+    Raises:
+        asyncio.IncompleteReadError: Als de verbinding gesloten werd
+        ValueError: Als het frame te groot is
+    """
+    (lengte,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if lengte > MAX_FRAME:
+        raise ValueError(f"frame van {lengte} bytes is te groot")
+    return await reader.readexactly(lengte)
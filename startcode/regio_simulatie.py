@@ -0,0 +1,412 @@
+"""
+RegioSimulatie - Laat NPCs ver van de speler rondwandelen in andere processen.
+
+De kaart wordt verdeeld in vierkante regio's. NPCs met VLAG_DWAALT in
+regio's rond de camera doen niets bijzonders; in alle andere regio's
+wandelen ze willekeurig rond. Dat rekenwerk gebeurt in een pool van
+werker processen, zodat het over alle cores verdeeld wordt en de game
+loop vrij blijft om te tekenen.
+
+De werkers lezen de BotsingsKaart en de posities uit shared memory (geen
+kopie per taak) en sturen enkel de verplaatsingen terug. Het hoofdproces
+voegt die in blokken samen binnen een tijdsbudget per simulatiestap,
+rechtstreeks in de arrays en de BezettingsIndex (zonder Karakter.beweeg). Een NPC blijft
+tijdens een ronde in zijn eigen regio, dus werkers zitten elkaar nooit
+in de weg.
+
+Gebruik als benchmark:
+    python regio_simulatie.py --kaart 1000x1000 --npcs 100000 --werkers 1 2 4 8
+"""
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import argparse
+import os
+import random
+import time
+from botsing import BEZET
+from entiteiten import VLAG_DWAALT, EntiteitOpslag
+from padvinding import RICHTINGEN
+
+try:
+    import numpy
+except ImportError:  # numpy is optioneel: zonder numpy verdelen we de NPCs over de regio's met een gewone lus
+    numpy = None
+
+
+# ---- In de werker processen ----
+
+_gekoppeld = {}  # naam -> SharedMemory (per werker proces)
+
+
+def _koppel(namen: tuple[str, ...]) -> list:
+    """Open de shared memory blokken (en sluit blokken die niet meer gebruikt worden)."""
+    for naam in list(_gekoppeld):
+        if naam not in namen:
+            _gekoppeld.pop(naam).close()
+    blokken = []
+    for naam in namen:
+        if naam not in _gekoppeld:
+            _gekoppeld[naam] = shared_memory.SharedMemory(name=naam)
+        blokken.append(_gekoppeld[naam])
+    return blokken
+
+
+def _simuleer_regios(botsing_naam: str, posities_naam: str, capaciteit: int, rij_breedte: int, taken: list, ronde: int) -> bytes:
+    """
+    Laat de NPCs in een paar regio's één stap rondwandelen (draait in een werker proces).
+
+    Args:
+        taken: Lijst van (regio nummer, x_min, y_min, x_max, y_max, indexen als bytes)
+        ronde: Nummer van de ronde (seed voor het toeval, zodat een ronde herhaalbaar is)
+
+    Returns:
+        Verplaatsingen als bytes van een array("i"): index, oude x, oude y, nieuwe x, nieuwe y
+    """
+    botsing, posities = _koppel((botsing_naam, posities_naam))
+    kaart = botsing.buf
+    xs = posities.buf[:capaciteit * 4].cast("i")
+    ys = posities.buf[capaciteit * 4:capaciteit * 8].cast("i")
+    try:
+        gewijzigd = {}  # index in de kaart -> nieuwe waarde (de kaart zelf is van het hoofdproces)
+        verplaatsingen = array("i")
+        for regio, x_min, y_min, x_max, y_max, indexen in taken:
+            toeval = random.Random(ronde * 1_000_003 + regio)
+            for index in array("i", indexen):
+                richting = toeval.randrange(len(RICHTINGEN) + 1)
+                if richting == len(RICHTINGEN):
+                    continue  # blijven staan
+                x, y = xs[index], ys[index]
+                dx, dy = RICHTINGEN[richting]
+                nieuwe_x, nieuwe_y = x + dx, y + dy
+                if not (x_min <= nieuwe_x <= x_max and y_min <= nieuwe_y <= y_max):
+                    continue
+                doel = (nieuwe_y + 1) * rij_breedte + nieuwe_x + 1
+                if gewijzigd.get(doel, kaart[doel]) != 0:
+                    continue
+                bron = (y + 1) * rij_breedte + x + 1
+                gewijzigd[bron] = gewijzigd.get(bron, kaart[bron]) & ~BEZET
+                gewijzigd[doel] = BEZET
+                verplaatsingen.extend((index, x, y, nieuwe_x, nieuwe_y))
+        return verplaatsingen.tobytes()
+    finally:
+        xs.release()
+        ys.release()
+
+
+# ---- In het hoofdproces ----
+
+class RegioSimulatie:
+    """
+    Verdeelt de rondwandelende NPCs over regio's en laat werkers ze simuleren.
+
+    # Elke ronde:
+    # 1. werk de kopie van de BotsingsKaart in shared memory bij (enkel de
+    #    bytes die veranderd zijn) en kopieer de posities,
+    # 2. geef elke werker een paar regio's (ver van de camera),
+    # 3. voeg de verplaatsingen die terugkomen blok per blok samen.
+    # Een nieuwe ronde start pas als de vorige helemaal samengevoegd is.
+    """
+
+    BLOK = 2048  # verplaatsingen per blok bij het samenvoegen
+
+    def __init__(self, bezetting, opslag, regio_grootte: int = 32, interval: float = 0.5, werkers: int | None = None):
+        """
+        Start de werker processen.
+
+        Args:
+            bezetting: De BezettingsIndex van de NPCs (met de BotsingsKaart van de tilemap)
+            opslag: De EntiteitOpslag met de karakters
+            regio_grootte: Aantal tiles per zijde van een regio
+            interval: Seconden (speltijd) tussen twee rondes
+            werkers: Aantal processen, of None voor het aantal cores
+        """
+        self.bezetting = bezetting
+        self.botsing = botsing = bezetting.botsing
+        self.opslag = opslag
+        self.regio_grootte = regio_grootte
+        self.interval = interval
+        self.werkers = werkers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.werkers)
+
+        # De kaart staat één keer volledig in shared memory; daarna kopiëren we enkel wat verandert
+        self._botsing_geheugen = shared_memory.SharedMemory(create=True, size=len(botsing.data))
+        self._botsing_geheugen.buf[:len(botsing.data)] = botsing.data
+        botsing.volg_wijzigingen()
+        self._posities_geheugen = None
+        self._capaciteit = 0
+
+        self._lopend = []  # futures van de huidige ronde
+        self._samen_te_voegen = deque()  # blokken van verplaatsingen: index, oude x, oude y, nieuwe x, nieuwe y
+        self._volgende_ronde = 0.0
+        self._nu = 0.0  # speltijd van de laatste stap
+        self._ronde_start = 0.0  # speltijd waarop de lopende ronde startte
+        self._ronde_klok = 0.0  # time.perf_counter() op dat moment
+        self._ronde_duur = 0.0  # seconden tot de werkers van de vorige ronde klaar waren
+        self.ronde = 0
+
+        # Statistieken
+        self.verplaatst = 0
+        self.geweigerd = 0  # verplaatsingen die niet meer pasten (bv. de tile werd intussen bezet)
+
+
+    def volgende_tijdstip(self) -> float:
+        """
+        Speltijd waarop er weer werk is.
+
+        # Wachten er nog verplaatsingen, dan is dat de volgende stap (we geven
+        # de tijd van de laatste stap: die is al voorbij). Rekenen de werkers
+        # nog, dan het moment waarop ze klaar zijn als deze ronde even lang
+        # duurt als de vorige (zijn ze later, dan kijken we elke stap opnieuw).
+        """
+        if self._samen_te_voegen:
+            return self._nu
+        if self._lopend:
+            return max(self._nu, self._ronde_start + self._ronde_duur)
+        return self._volgende_ronde
+
+
+    def stap(self, nu: float, dichtbij: tuple[int, int, int, int], budget_ms: float = 2.0):
+        """
+        Roep dit op in elke simulatiestap.
+
+        Args:
+            nu: Huidige speltijd
+            dichtbij: (x_min, y_min, x_max, y_max) in tiles: regio's die dit raken worden niet gesimuleerd
+            budget_ms: Maximum tijd om verplaatsingen samen te voegen
+        """
+        self._nu = nu
+        if self._lopend and all(taak.done() for taak in self._lopend):
+            self._ronde_duur = time.perf_counter() - self._ronde_klok
+            blok = 5 * self.BLOK
+            for taak in self._lopend:
+                if numpy is not None:
+                    verplaatsingen = numpy.frombuffer(taak.result(), dtype=numpy.int32)
+                else:
+                    verplaatsingen = array("i")
+                    verplaatsingen.frombytes(taak.result())
+                self._samen_te_voegen.extend(verplaatsingen[start:start + blok] for start in range(0, len(verplaatsingen), blok))
+            self._lopend = []
+
+        if self._samen_te_voegen:
+            self._voeg_samen(budget_ms)
+
+        if not self._lopend and not self._samen_te_voegen and nu >= self._volgende_ronde:
+            self._ronde_start, self._ronde_klok = nu, time.perf_counter()
+            self._start_ronde(dichtbij)
+            self._volgende_ronde = nu + self.interval
+
+
+    def _voeg_samen(self, budget_ms: float):
+        """Voeg blokken verplaatsingen samen tot het budget op is (de rest volgt in de volgende stap)."""
+        einde = time.perf_counter() + budget_ms / 1000
+        while self._samen_te_voegen:
+            self._voeg_blok_samen(self._samen_te_voegen.popleft())
+            if time.perf_counter() >= einde:
+                break
+
+
+    def _voeg_blok_samen(self, blok):
+        """
+        Pas één blok verplaatsingen toe.
+
+        # Overslaan wie intussen in het hoofdproces verplaatst is of verdwenen
+        # (dan is VLAG_DWAALT weg), en wie naar een tile wil die niet meer vrij is.
+        """
+        opslag, data, rij_breedte = self.opslag, self.botsing.data, self.botsing.rij_breedte
+        aantal = len(blok) // 5
+        verplaatst = 0
+        if numpy is not None:
+            index, oude_x, oude_y, x, y = blok.reshape(-1, 5).T
+            xs = numpy.frombuffer(opslag.x, dtype=numpy.int32)
+            ys = numpy.frombuffer(opslag.y, dtype=numpy.int32)
+            vlaggen = numpy.frombuffer(opslag.vlaggen, dtype=numpy.uint8)
+            geldig = (xs[index] == oude_x) & (ys[index] == oude_y) & (vlaggen[index] & VLAG_DWAALT != 0)
+            del xs, ys, vlaggen  # de arrays van de opslag mogen weer groeien
+            index, x, y = index[geldig], x[geldig], y[geldig]
+            doel = (y.astype(numpy.intp) + 1) * rij_breedte + x + 1
+            raster = numpy.frombuffer(data, dtype=numpy.uint8)
+            # Een NPC mag naar een tile die een andere NPC in dezelfde ronde verlaat, maar pas als
+            # die eerst verplaatst is: herhaal tot er niets meer bij kan (meestal een paar keer)
+            while len(index):
+                nummers = numpy.flatnonzero(raster[doel] == 0)
+                if not len(nummers):
+                    break
+                nummers = nummers[numpy.unique(doel[nummers], return_index=True)[1]]  # elke tile maar één keer
+                verplaatst += self.bezetting.verplaats_indexen(opslag, index[nummers], x[nummers], y[nummers])
+                rest = numpy.ones(len(index), dtype=bool)
+                rest[nummers] = False
+                index, x, y, doel = index[rest], x[rest], y[rest], doel[rest]
+        else:
+            xs, ys, vlaggen, verplaats = opslag.x, opslag.y, opslag.vlaggen, self.bezetting.verplaats_indexen
+            for start in range(0, len(blok), 5):
+                index, oude_x, oude_y, x, y = blok[start:start + 5]
+                if xs[index] != oude_x or ys[index] != oude_y or not vlaggen[index] & VLAG_DWAALT:
+                    continue
+                if data[(y + 1) * rij_breedte + x + 1] == 0:
+                    verplaatst += verplaats(opslag, (index,), (x,), (y,))
+        self.verplaatst += verplaatst
+        self.geweigerd += aantal - verplaatst
+
+
+    def _start_ronde(self, dichtbij: tuple[int, int, int, int]):
+        # Geen enkele werker leest nu (de vorige ronde is klaar): breng de kaart in shared memory bij
+        self._werk_botsing_bij()
+        regios = self._verdeel(dichtbij)
+        if not regios:
+            return
+
+        aantal = len(self.opslag.x)
+        if aantal > self._capaciteit:
+            self._maak_posities_geheugen(max(1024, 2 * aantal))
+        buffer = self._posities_geheugen.buf
+        buffer[:aantal * 4] = memoryview(self.opslag.x).cast("B")
+        buffer[self._capaciteit * 4:(self._capaciteit + aantal) * 4] = memoryview(self.opslag.y).cast("B")
+
+        # Een paar taken per werker, zodat een werker met drukke regio's de rest niet ophoudt
+        aantal_taken = min(len(regios), self.werkers * 4)
+        taken = [regios[nummer::aantal_taken] for nummer in range(aantal_taken)]
+        self.ronde += 1
+        self._lopend = [
+            self._pool.submit(
+                _simuleer_regios, self._botsing_geheugen.name, self._posities_geheugen.name,
+                self._capaciteit, self.botsing.rij_breedte, deel, self.ronde,
+            )
+            for deel in taken
+        ]
+
+
+    def _werk_botsing_bij(self):
+        """Kopieer de bytes van de BotsingsKaart die veranderd zijn sinds de vorige ronde naar shared memory."""
+        data, buffer = self.botsing.data, self._botsing_geheugen.buf
+        for stuk in self.botsing.neem_wijzigingen():
+            if isinstance(stuk, int):
+                buffer[stuk] = data[stuk]
+            elif isinstance(stuk, range):
+                buffer[stuk.start:stuk.stop] = data[stuk.start:stuk.stop]
+            else:  # numpy array van indexen (van BezettingsIndex.verplaats_indexen)
+                numpy.frombuffer(buffer, dtype=numpy.uint8, count=len(data))[stuk] = numpy.frombuffer(data, dtype=numpy.uint8)[stuk]
+
+
+    def _maak_posities_geheugen(self, capaciteit: int):
+        if self._posities_geheugen is not None:
+            self._posities_geheugen.close()
+            self._posities_geheugen.unlink()
+        self._posities_geheugen = shared_memory.SharedMemory(create=True, size=capaciteit * 8)
+        self._capaciteit = capaciteit
+
+
+    def _verdeel(self, dichtbij: tuple[int, int, int, int]) -> list[tuple]:
+        """
+        Zoek de rondwandelende NPCs per regio.
+
+        Returns:
+            Lijst van (regio nummer, x_min, y_min, x_max, y_max, indexen als bytes)
+        """
+        grootte = self.regio_grootte
+        regios_breed = (self.botsing.breedte + grootte - 1) // grootte
+        dicht_x_min, dicht_y_min, dicht_x_max, dicht_y_max = dichtbij
+        # Regio's die het gebied rond de camera raken, blijven in het hoofdproces
+        regio_x_min, regio_y_min = dicht_x_min // grootte, dicht_y_min // grootte
+        regio_x_max, regio_y_max = dicht_x_max // grootte, dicht_y_max // grootte
+
+        per_regio = {}
+        if numpy is not None:
+            xs = numpy.frombuffer(self.opslag.x, dtype=numpy.int32)
+            ys = numpy.frombuffer(self.opslag.y, dtype=numpy.int32)
+            vlaggen = numpy.frombuffer(self.opslag.vlaggen, dtype=numpy.uint8)
+            indexen = numpy.flatnonzero(vlaggen & VLAG_DWAALT)
+            regio_x, regio_y = xs[indexen] // grootte, ys[indexen] // grootte
+            ver = ~((regio_x >= regio_x_min) & (regio_x <= regio_x_max) & (regio_y >= regio_y_min) & (regio_y <= regio_y_max))
+            indexen, nummers = indexen[ver], (regio_y * regios_breed + regio_x)[ver]
+            volgorde = numpy.argsort(nummers, kind="stable")
+            indexen, nummers = indexen[volgorde], nummers[volgorde]
+            grenzen = numpy.flatnonzero(numpy.diff(nummers)) + 1
+            for groep, nummer in zip(numpy.split(indexen.astype(numpy.int32), grenzen), nummers[numpy.r_[0, grenzen]] if len(nummers) else []):
+                per_regio[int(nummer)] = groep.tobytes()
+        else:
+            groepen = {}
+            x, y, vlaggen = self.opslag.x, self.opslag.y, self.opslag.vlaggen
+            for index in range(len(vlaggen)):
+                if vlaggen[index] & VLAG_DWAALT:
+                    regio_x, regio_y = x[index] // grootte, y[index] // grootte
+                    if regio_x_min <= regio_x <= regio_x_max and regio_y_min <= regio_y <= regio_y_max:
+                        continue
+                    groepen.setdefault(regio_y * regios_breed + regio_x, array("i")).append(index)
+            per_regio = {nummer: groep.tobytes() for nummer, groep in groepen.items()}
+
+        regios = []
+        for nummer, indexen in per_regio.items():
+            regio_y, regio_x = divmod(nummer, regios_breed)
+            x_min, y_min = regio_x * grootte, regio_y * grootte
+            x_max = min(x_min + grootte, self.botsing.breedte) - 1
+            y_max = min(y_min + grootte, self.botsing.hoogte) - 1
+            regios.append((nummer, x_min, y_min, x_max, y_max, indexen))
+        return regios
+
+
+    def sluit(self):
+        """Stop de werkers en geef het shared memory vrij."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.botsing.wijzigingen = None
+        for geheugen in (self._botsing_geheugen, self._posities_geheugen):
+            if geheugen is not None:
+                geheugen.close()
+                geheugen.unlink()
+        self._posities_geheugen = None
+
+
+def main():
+    from tilemap import TileMap
+    from bezetting import BezettingsIndex
+    from models.karakter import Karakter
+    from config import COLORS
+
+    parser = argparse.ArgumentParser(description="Benchmark van de regio simulatie met meerdere processen")
+    parser.add_argument("--kaart", default="1000x1000", help="kaartgrootte in tiles, bv. 1000x1000")
+    parser.add_argument("--npcs", type=int, default=100_000)
+    parser.add_argument("--werkers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--rondes", type=int, default=10)
+    args = parser.parse_args()
+
+    breedte, hoogte = (int(getal) for getal in args.kaart.lower().split("x"))
+    tilemap = TileMap(breedte, hoogte)
+    bezetting = BezettingsIndex(tilemap.botsing)
+    opslag = EntiteitOpslag()
+    toeval = random.Random(1)
+    npcs = []
+    while len(npcs) < args.npcs:
+        x, y = toeval.randrange(breedte), toeval.randrange(hoogte)
+        if tilemap.botsing.is_vrij(x, y):
+            npc = Karakter("NPC", 15, x, y, COLORS["groen"], "")
+            npc.verhuis(opslag)
+            npc.vlaggen |= VLAG_DWAALT
+            bezetting.voeg_toe(npc)
+            npcs.append(npc)
+
+    print(f"{'werkers':>8} {'rondes/s':>9} {'NPC stappen/s':>14}  (samenvoegen in het hoofdproces)")
+    geen_camera = (0, 0, -1, -1)  # alles wordt in de werkers gesimuleerd
+    for werkers in args.werkers:
+        simulatie = RegioSimulatie(bezetting, opslag, werkers=werkers, interval=0)
+        simulatie.stap(0, geen_camera)  # eerste ronde: werkers opstarten
+        for taak in simulatie._lopend:
+            taak.result()
+
+        start = time.perf_counter()
+        samenvoegen = 0.0
+        verplaatst = simulatie.verplaatst
+        for _ in range(args.rondes):
+            begin = time.perf_counter()
+            simulatie.stap(0, geen_camera, budget_ms=10_000)  # vorige ronde samenvoegen en de volgende starten
+            samenvoegen += time.perf_counter() - begin
+            for taak in simulatie._lopend:
+                taak.result()
+        duur = time.perf_counter() - start
+        print(f"{werkers:>8} {args.rondes / duur:>9.1f} {args.rondes * len(npcs) / duur:>14.0f}  "
+              f"({samenvoegen / args.rondes * 1000:.1f} ms per ronde, {simulatie.verplaatst - verplaatst} verplaatst)")
+        simulatie.sluit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+SpelServer - Multiplayer server: één gedeelde school voor een hele klas.
+
+De server is de baas over de kaart, de NPCs (en dus ook het whiteboard)
+en de posities van alle spelers. Clients sturen enkel wat hun speler wil
+doen. De server voert dat uit in vaste simulatiestappen en stuurt na elke
+stap één frame met enkel wat er veranderd is naar alle spelers.
+
+Gebruik:
+    python server.py                      # luistert op localhost:5555
+    python server.py --poort 6000 --kaart 200x200 --statistiek
+
+Spelen: zet SERVER_ADRES in config.py op "localhost:5555" en start main.py
+(één keer per speler). Belasting meten: zie belastingstest.py.
+"""
+from collections import deque
+import argparse
+import asyncio
+import statistics
+import time
+from config import COLORS, MAP_WIDTH, MAP_HEIGHT, MAP_FILE, SIM_STAPPEN_PER_SECONDE, NPC_BUDGET_MS
+from entiteiten import EntiteitOpslag
+from tilemap import TileMap
+from bezetting import BezettingsIndex
+from padvinding import PadVinder, RICHTINGEN
+from planner import GedragsPlanner
+from models.karakter import Karakter
+import protocol
+
+SPELER_KLEUREN = ("geel", "blauw", "groen", "rood")
+MAX_INTENTIES = 16  # per speler; wat meer binnenkomt voor de volgende stap, wordt genegeerd
+MAX_BUFFER = 1024 * 1024  # een client die zoveel bytes achterloopt, wordt afgesloten
+
+
+class Verbinding:
+    """Eén verbonden speler."""
+
+    def __init__(self, karakter: Karakter, writer: asyncio.StreamWriter):
+        self.karakter = karakter
+        self.writer = writer
+        self.intenties = deque()  # ontvangen records (BEWEEG, INTERACTIE, BERICHT) voor de volgende stap
+        self.teksten = []  # TEKST_VOOR_SPELER records die enkel voor deze speler zijn
+
+
+class SpelServer:
+    """
+    Speelt de game voor alle verbonden spelers.
+
+    # Na elke stap zoeken we wat er veranderd is: posities via de
+    # EntiteitOpslag (x tegenover vorige_x), vlaggen door de vorige stap te
+    # vergelijken en tiles via TileMap.luisteraars. Dat wordt één frame dat
+    # naar iedereen gaat; de bytes worden maar één keer gemaakt.
+    """
+
+    def __init__(self, tilemap: TileMap, npcs: list[Karakter], stappen_per_seconde: int = SIM_STAPPEN_PER_SECONDE):
+        """
+        Initialiseer de server.
+
+        Args:
+            tilemap: De gedeelde kaart
+            npcs: De NPCs (inclusief het whiteboard)
+            stappen_per_seconde: Aantal simulatiestappen per seconde
+        """
+        self.tilemap = tilemap
+        self.npcs = npcs
+        self.opslag = EntiteitOpslag()  # eigen opslag: de NPCs verhuizen hierheen
+        self.stap_duur = 1 / stappen_per_seconde
+        self.sim_stap = 0
+        self.sim_tijd = 0.0
+
+        # Dezelfde hulpmiddelen als Game, zodat NPC gedrag (Karakter.update) ook op de server werkt
+        self.padvinder = PadVinder(tilemap)
+        self.bezetting = BezettingsIndex(tilemap.botsing)
+        self.planner = GedragsPlanner(NPC_BUDGET_MS, klok=lambda: self.sim_tijd)
+        for npc in npcs:
+            npc.verhuis(self.opslag)
+            self.bezetting.voeg_toe(npc)
+            self.planner.plan(npc)
+
+        self.verbindingen = []
+        self._aantal_spelers = 0
+        self._nieuw = []  # karakters die sinds de vorige stap verschenen zijn
+        self._weg = []  # nummers van karakters die sinds de vorige stap verdwenen zijn
+        self._tiles = {}  # (x, y) -> code, tiles die in deze stap veranderd zijn
+        self._vlaggen = bytes(self.opslag.vlaggen)
+        self._kleuren = list(self.opslag.kleur)
+        tilemap.luisteraars.append(self._tile_gewijzigd)
+
+        # Statistieken
+        self.stap_tijden = deque(maxlen=1000)  # seconden per simulatiestap (verwerken + versturen)
+        self.verstuurde_bytes = 0
+
+
+    def _tile_gewijzigd(self, x_tile: int, y_tile: int, code: int):
+        self._tiles[(x_tile, y_tile)] = code
+
+
+    # ---- Verbindingen ----
+
+    async def verbinding(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Eén speler, van verbinden tot afsluiten (asyncio.start_server maakt er één per client)."""
+        self._aantal_spelers += 1
+        x, y = self._vrije_plek(3, 3)
+        kleur = COLORS[SPELER_KLEUREN[self._aantal_spelers % len(SPELER_KLEUREN)]]
+        karakter = Karakter(f"Speler {self._aantal_spelers}", 17, x, y, kleur, "Hallo!")
+        karakter.verhuis(self.opslag)
+        self.bezetting.voeg_toe(karakter)
+        verbinding = Verbinding(karakter, writer)
+
+        # Begintoestand: de kaart en alle karakters (vanaf nu enkel nog deltas)
+        karakters = [self.opslag.karakter(index) for index in range(len(self.opslag.karakters))]
+        self._stuur(verbinding, protocol.frame(
+            protocol.welkom(karakter.index, self.tilemap.tiles, self.tilemap.breedte, self.tilemap.hoogte),
+            *(self._nieuw_record(ander) for ander in karakters if ander is not None and ander.bezetting is self.bezetting),
+        ))
+        self._nieuw.append(karakter)
+        self.verbindingen.append(verbinding)
+
+        try:
+            while True:
+                for velden in protocol.lees_records(await protocol.lees_frame(reader)):
+                    if velden[0] in (protocol.BEWEEG, protocol.INTERACTIE, protocol.BERICHT) and len(verbinding.intenties) < MAX_INTENTIES:
+                        verbinding.intenties.append(velden)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # verbinding gesloten, of de client stuurde onzin
+        finally:
+            self._verbreek(verbinding)
+
+
+    def _verbreek(self, verbinding: Verbinding):
+        if verbinding not in self.verbindingen:
+            return
+        self.verbindingen.remove(verbinding)
+        self.bezetting.verwijder(verbinding.karakter)
+        self._weg.append(verbinding.karakter.index)
+        if verbinding.karakter in self._nieuw:
+            self._nieuw.remove(verbinding.karakter)
+        verbinding.writer.close()
+
+
+    def _stuur(self, verbinding: Verbinding, data: bytes):
+        verbinding.writer.write(data)
+        self.verstuurde_bytes += len(data)
+        if verbinding.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self._verbreek(verbinding)  # te traag: wachten zou de stap voor iedereen ophouden
+
+
+    def _vrije_plek(self, x_tile: int, y_tile: int) -> tuple[int, int]:
+        """Dichtste vrije tile bij (x_tile, y_tile), breedte eerst."""
+        botsing = self.tilemap.botsing
+        gezien = {(x_tile, y_tile)}
+        rij = deque(gezien)
+        while rij:
+            x, y = rij.popleft()
+            if botsing.in_kaart(x, y) and botsing.is_vrij(x, y):
+                return x, y
+            for dx, dy in RICHTINGEN:
+                buur = (x + dx, y + dy)
+                if buur not in gezien and botsing.in_kaart(*buur) and not botsing.is_muur(*buur):
+                    gezien.add(buur)
+                    rij.append(buur)
+        return x_tile, y_tile  # de kaart is vol: dan maar op elkaar
+
+
+    @staticmethod
+    def _nieuw_record(karakter: Karakter) -> bytes:
+        r, g, b = karakter.kleur
+        return protocol.record(
+            protocol.NIEUW, karakter.index, karakter.x_tile, karakter.y_tile, r, g, b, karakter.vlaggen,
+            tekst=f"{type(karakter).__name__}/{karakter.naam}",
+        )
+
+
+    # ---- Simulatie ----
+
+    def simuleer(self):
+        """Eén simulatiestap: intenties van alle spelers, NPC gedrag en dan de deltas versturen."""
+        start = time.perf_counter()
+        self.opslag.bewaar_vorige()
+
+        for verbinding in self.verbindingen:
+            while verbinding.intenties:
+                self._voer_uit(verbinding, verbinding.intenties.popleft())
+        self.planner.verwerk(self)
+
+        self.sim_stap += 1
+        self.sim_tijd = self.sim_stap * self.stap_duur
+        self._verstuur_deltas()
+        self.stap_tijden.append(time.perf_counter() - start)
+
+
+    def _voer_uit(self, verbinding: Verbinding, velden: tuple):
+        """Voer één intentie van een speler uit, met dezelfde regels als Game."""
+        karakter = verbinding.karakter
+        soort = velden[0]
+        if soort == protocol.BEWEEG:
+            dx, dy = velden[1:]
+            if (dx, dy) not in RICHTINGEN:
+                return  # enkel één stap tegelijk
+            nieuwe_x, nieuwe_y = karakter.x_tile + dx, karakter.y_tile + dy
+            if self.tilemap.botsing.is_vrij(nieuwe_x, nieuwe_y):
+                karakter.beweeg(dx, dy)
+            elif self.tilemap.botsing.is_muur(nieuwe_x, nieuwe_y):
+                self._tekst(verbinding, "Je kunt niet door muren heen lopen!")
+            else:
+                self._tekst(verbinding, "Je kunt niet door mensen heen lopen!")
+            return
+
+        npc = self._aangrenzend(karakter)
+        if npc is None:
+            self._tekst(verbinding, "Er is niemand om mee te praten. Ga naast iemand staan!")
+        elif soort == protocol.INTERACTIE:
+            self._tekst(verbinding, f"{npc.beschrijf()}: {npc.interact()}")
+        else:  # BERICHT
+            inventory = karakter.inventory
+            voor = tuple(inventory)
+            self._tekst(verbinding, npc.verwerk_bericht(velden[1], inventory) or "")
+            if tuple(inventory) != voor:
+                karakter.inventory = inventory  # items gekregen of gegeven: markeer de speler als gewijzigd
+            self.planner.plan(npc)  # meteen een beurt: misschien wil de NPC nu ergens naartoe
+
+
+    def is_vrij(self, x_tile: int, y_tile: int) -> bool:
+        """Of een NPC naar deze tile mag stappen (de spelers staan zelf in de bezetting)."""
+        return self.tilemap.botsing.is_vrij(x_tile, y_tile)
+
+
+    def _aangrenzend(self, karakter: Karakter) -> Karakter | None:
+        for dx, dy in RICHTINGEN:
+            ander = self.bezetting.op_positie(karakter.x_tile + dx, karakter.y_tile + dy)
+            if ander is not None:
+                return ander
+        return None
+
+
+    def _tekst(self, verbinding: Verbinding, tekst: str):
+        verbinding.teksten.append(protocol.record(protocol.TEKST_VOOR_SPELER, tekst=tekst))
+
+
+    def _verstuur_deltas(self):
+        records = [protocol.record(protocol.WEG, nummer) for nummer in self._weg]
+        records += [self._nieuw_record(karakter) for karakter in self._nieuw]
+        self._weg.clear()
+        self._nieuw.clear()
+
+        opslag = self.opslag
+        for index in opslag.bewogen():
+            records.append(protocol.record(protocol.BEWOGEN, index, opslag.x[index], opslag.y[index]))
+
+        vlaggen = bytes(opslag.vlaggen)
+        if vlaggen != self._vlaggen:
+            for index, waarde in enumerate(vlaggen):
+                if index >= len(self._vlaggen) or waarde != self._vlaggen[index]:
+                    if opslag.karakters[index] is not None:
+                        records.append(protocol.record(protocol.VLAGGEN, index, waarde))
+            self._vlaggen = vlaggen
+
+        # De kleuren zijn meestal dezelfde tuples (uit COLORS): de vergelijking is dan snel
+        if opslag.kleur != self._kleuren:
+            for index, kleur in enumerate(opslag.kleur):
+                if (index >= len(self._kleuren) or kleur != self._kleuren[index]) and opslag.karakters[index] is not None:
+                    records.append(protocol.record(protocol.KLEUR, index, *kleur[:3]))
+            self._kleuren = list(opslag.kleur)
+
+        for (x, y), code in self._tiles.items():
+            records.append(protocol.record(protocol.TILE, x, y, code))
+        self._tiles.clear()
+
+        # Eén frame voor iedereen; enkel spelers met een eigen tekst krijgen een aparte kopie
+        gedeeld = protocol.frame(protocol.record(protocol.TICK, self.sim_stap), *records) if records else None
+        for verbinding in list(self.verbindingen):
+            if verbinding.teksten:
+                self._stuur(verbinding, protocol.frame(protocol.record(protocol.TICK, self.sim_stap), *records, *verbinding.teksten))
+                verbinding.teksten.clear()
+            elif gedeeld is not None:
+                self._stuur(verbinding, gedeeld)
+
+
+    async def draai(self, host: str = "localhost", poort: int = 5555, statistiek: float | None = None):
+        """
+        Start de server en simuleer tot het programma stopt.
+
+        Args:
+            host: Adres om op te luisteren
+            poort: TCP poort
+            statistiek: Elke zoveel seconden de statistieken tonen, of None
+        """
+        server = await asyncio.start_server(self.verbinding, host, poort)
+        print(f"Server luistert op {host}:{poort} ({1 / self.stap_duur:.0f} stappen per seconde)")
+        loop = asyncio.get_running_loop()
+        volgende = loop.time()
+        volgende_statistiek = volgende + (statistiek or 0)
+        async with server:
+            while True:
+                self.simuleer()
+                volgende += self.stap_duur
+                nu = loop.time()
+                if nu > volgende + self.stap_duur:
+                    volgende = nu  # te ver achter (bv. de computer sliep): niet alle gemiste stappen inhalen
+                if statistiek and nu >= volgende_statistiek:
+                    print(self.statistiek(statistiek))
+                    volgende_statistiek = nu + statistiek
+                await asyncio.sleep(max(0.0, volgende - nu))
+
+
+    def statistiek(self, seconden: float) -> str:
+        """Eén regel met de statistieken sinds de vorige keer (en zet de tellers terug op nul)."""
+        tijden = sorted(self.stap_tijden) or [0.0]
+        p99 = tijden[min(len(tijden) - 1, int(len(tijden) * 0.99))]
+        tekst = (f"{len(self.verbindingen)} spelers, stap {statistics.median(tijden) * 1000:.2f} ms (p99 {p99 * 1000:.2f} ms), "
+                 f"{self.verstuurde_bytes / seconden / 1024:.1f} KB/s verstuurd")
+        self.stap_tijden.clear()
+        self.verstuurde_bytes = 0
+        return tekst
+
+
+def main():
+    from main import maak_npcs  # hier pas importeren: main importeert de game en alles wat erbij hoort
+
+    parser = argparse.ArgumentParser(description="Multiplayer server voor RPG School")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--poort", type=int, default=5555)
+    parser.add_argument("--kaart", help="kaartgrootte in tiles, bv. 200x200 (standaard MAP_FILE of MAP_WIDTH x MAP_HEIGHT)")
+    parser.add_argument("--statistiek", type=float, nargs="?", const=5.0, default=None,
+                        help="toon elke zoveel seconden de duur van een stap en de bandbreedte")
+    args = parser.parse_args()
+
+    if args.kaart:
+        breedte, hoogte = (int(getal) for getal in args.kaart.lower().split("x"))
+        tilemap = TileMap(breedte, hoogte)
+    elif MAP_FILE is not None:
+        tilemap = TileMap.laad(MAP_FILE)
+    else:
+        tilemap = TileMap(MAP_WIDTH, MAP_HEIGHT)
+    server = SpelServer(tilemap, maak_npcs())
+    try:
+        asyncio.run(server.draai(args.host, args.poort, args.statistiek))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+SpriteCache - Bewaart de getekende versie van elk karakter per visuele toestand.
+"""
+from collections import OrderedDict
+import pygame
+
+
+class SpriteCache:
+    """
+    Cache van sprites (kant-en-klare surfaces) voor karakters.
+
+    # Een karakter tekenen met pygame.draw en een naam label kost telkens
+    # opnieuw tijd. Zolang een karakter er hetzelfde uitziet (zelfde
+    # Karakter.sprite_sleutel()) hergebruiken we de sprite: tekenen is dan
+    # één blit. Verandert de toestand (bv. het whiteboard wordt schoon),
+    # dan verandert de sleutel en wordt er vanzelf een nieuwe sprite gemaakt.
+    """
+
+    def __init__(self, max_items: int = 512):
+        """
+        Initialiseer de cache.
+
+        Args:
+            max_items: Maximum aantal sprites dat bewaard blijft
+        """
+        self.max_items = max_items
+        self._sprites = OrderedDict()  # sprite sleutel -> Surface (LRU volgorde)
+        self.hits = 0
+        self.misses = 0
+
+
+    def geef(self, karakter) -> pygame.Surface:
+        """Geef de sprite van een karakter; maak hem als hij nog niet bestaat."""
+        sleutel = karakter.sprite_sleutel()
+        sprite = self._sprites.get(sleutel)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(sleutel)
+            return sprite
+
+        self.misses += 1
+        sprite = karakter.maak_sprite()
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()  # zelfde pixelformaat als het scherm = snellere blit
+        self._sprites[sleutel] = sprite
+
+        # Gooi de langst niet gebruikte sprite weg als de cache vol zit
+        if len(self._sprites) > self.max_items:
+            self._sprites.popitem(last=False)
+        return sprite
+
+
+    def vergeet(self, sleutel: tuple | None = None):
+        """Verwijder één sprite, of alle sprites als er geen sleutel gegeven is."""
+        if sleutel is None:
+            self._sprites.clear()
+        else:
+            self._sprites.pop(sleutel, None)
+
+
+# Gedeelde cache voor alle karakters
+sprite_cache = SpriteCache()
@@ -0,0 +1,84 @@
+"""
+TekstCache - Hergebruikt fonts en gerenderde tekst tussen frames.
+"""
+from collections import OrderedDict
+import pygame
+
+
+class TekstCache:
+    """
+    Centrale plek voor fonts en gerenderde tekst.
+
+    # Een font laden en tekst renderen is duur. De meeste tekst (instructies,
+    # bericht, inventory, namen) verandert bijna nooit, dus bewaren we het
+    # resultaat en geven we dezelfde surface terug zolang de tekst gelijk blijft.
+    """
+
+    def __init__(self, max_items: int = 256):
+        """
+        Initialiseer de cache.
+
+        Args:
+            max_items: Maximum aantal gerenderde teksten dat bewaard blijft
+        """
+        self.max_items = max_items
+        self.fonts = {}  # (font naam, grootte) -> pygame.font.Font
+        self._teksten = OrderedDict()  # sleutel -> gerenderde surface (LRU volgorde)
+        self.hits = 0
+        self.misses = 0
+
+
+    def geef_font(self, grootte: int, naam: str | None = None) -> pygame.font.Font:
+        """
+        Geef een font terug; elk font wordt maar één keer geladen.
+
+        Args:
+            grootte: Lettergrootte in pixels
+            naam: Pad naar een fontbestand, of None voor het standaard font
+        """
+        sleutel = (naam, grootte)
+        font = self.fonts.get(sleutel)
+        if font is None:
+            font = pygame.font.Font(naam, grootte)
+            self.fonts[sleutel] = font
+        return font
+
+
+    def render(self, tekst: str, grootte: int, kleur: tuple[int, int, int], antialias: bool = True, naam: str | None = None) -> pygame.Surface:
+        """
+        Geef een gerenderde tekst terug, uit de cache als dat kan.
+
+        Args:
+            tekst: De tekst om te renderen
+            grootte: Lettergrootte in pixels
+            kleur: RGB kleur tuple
+            antialias: Of de tekst vloeiend gerenderd wordt
+            naam: Pad naar een fontbestand, of None voor het standaard font
+
+        Returns:
+            Surface met de gerenderde tekst (niet aanpassen, wordt gedeeld!)
+        """
+        sleutel = (naam, grootte, tekst, kleur, antialias)
+        surface = self._teksten.get(sleutel)
+        if surface is not None:
+            self.hits += 1
+            self._teksten.move_to_end(sleutel)
+            return surface
+
+        self.misses += 1
+        surface = self.geef_font(grootte, naam).render(tekst, antialias, kleur)
+        self._teksten[sleutel] = surface
+
+        # Gooi de langst niet gebruikte tekst weg als de cache vol zit
+        if len(self._teksten) > self.max_items:
+            self._teksten.popitem(last=False)
+        return surface
+
+
+    def leegmaken(self):
+        """Verwijder alle gerenderde teksten (fonts blijven geladen)."""
+        self._teksten.clear()
+
+
+# Gedeelde cache voor HUD, input veld en karakter labels
+tekst_cache = TekstCache()
@@ -0,0 +1,11 @@
+"""
+Gedeelde instellingen voor de tests.
+
+De modules staan in de map boven deze (main.py importeert ze zonder package),
+dus die map moet op sys.path staan. Pygame tekent zonder venster.
+"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+"""
+Test met de AllocatieTracker: idle frames mogen netto niets aanmaken.
+"""
+from allocatie_tracker import AllocatieTracker, nep_klok, speel_idle
+
+
+def test_idle_frames_maken_niets_aan(monkeypatch):
+    import main
+    from benchmark import maak_game
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+    game = maak_game(20, 60, 40, 60, 3)
+    game.idle_modus = True
+
+    tracker = AllocatieTracker(game.profiler, venster=60)
+    with nep_klok() as klok:
+        speel_idle(game, 30, klok)  # caches vullen
+        tracker.start()
+        try:
+            speel_idle(game, 60, klok)
+        finally:
+            tracker.stop()
+    assert len(tracker.regels) == 59  # de eerste frame neemt enkel de eerste snapshot
+    # Een lek is minstens één blok per frame; een paar losse blokken (een object dat net
+    # voor het meten gemaakt en tijdens het meten opgeruimd werd, of omgekeerd) mogen
+    tracker.controleer_geen_allocaties(tolerantie=0.05)
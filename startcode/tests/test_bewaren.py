@@ -0,0 +1,94 @@
+"""
+Tests voor bewaren.py: snapshot + deltas terug inladen, en wat er gebeurt met een kapot bestand.
+"""
+import os
+import pytest
+from bewaren import Bewaarbestand, HEADER
+from models.karakter import Karakter
+
+
+@pytest.fixture
+def maak_game(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+
+    def maak():
+        game = main.Game(headless=True, server=None)
+        for nummer in range(20):
+            game.voeg_npc_toe(Karakter(f"N{nummer}", 10, 2 + nummer % 5, 5 + nummer // 5, (0, 255, 0), ""))
+        return game
+    return maak
+
+
+def _toestand(game) -> list:
+    return [(karakter.x_tile, karakter.y_tile, karakter.vlaggen, tuple(karakter.kleur[:3]), karakter.inventory_inhoud())
+            for karakter in [game.speler] + game.npcs]
+
+
+def test_snapshot_en_deltas_komen_terug(maak_game, tmp_path):
+    pad = str(tmp_path / "spel.rpgs")
+    game = maak_game()
+    bewaarbestand = Bewaarbestand(pad)
+    bewaarbestand.koppel(game)
+    assert not bewaarbestand.laad(game)
+    bewaarbestand.bewaar(game).result()
+    grootte = os.path.getsize(pad)
+
+    game.npcs[3].beweeg(1, 0)
+    game.npcs[4].vlaggen = 5
+    game.npcs[5].kleur = (9, 8, 7)
+    inventory = game.speler.inventory
+    inventory.append("sleutel")
+    game.speler.inventory = inventory
+    game.tilemap.set_tile(3, 3, 1)
+    bewaarbestand.bewaar(game).result()
+    assert os.path.getsize(pad) > grootte  # enkel deltas achteraan
+    game.npcs[3].beweeg(0, 1)
+    bewaarbestand.bewaar(game)
+    bewaarbestand.sluit()
+
+    geladen = maak_game()
+    opnieuw = Bewaarbestand(pad)
+    opnieuw.koppel(geladen)
+    assert opnieuw.laad(geladen)
+    opnieuw.sluit()
+    assert _toestand(geladen) == _toestand(game)
+    assert geladen.tilemap.tiles.geef(3, 3) == 1
+
+
+def test_kapot_bestand_wordt_opzij_gezet(maak_game, tmp_path):
+    pad = str(tmp_path / "spel.rpgs")
+    with open(pad, "wb") as bestand:
+        bestand.write(b"RPGX" + bytes(HEADER.size))
+
+    game = maak_game()
+    bewaarbestand = Bewaarbestand(pad)
+    bewaarbestand.koppel(game)
+    with pytest.raises(ValueError, match="opzij gezet"):
+        bewaarbestand.laad(game)
+    assert not os.path.exists(pad)
+    assert os.path.exists(pad + ".bad")
+
+    # De volgende autosave begint een nieuw bestand en laat het kapotte staan
+    bewaarbestand.bewaar(game)
+    bewaarbestand.sluit()
+    with open(pad + ".bad", "rb") as bestand:
+        assert bestand.read(4) == b"RPGX"
+    assert Bewaarbestand(pad).laad(maak_game())
+
+
+def test_half_geschreven_laatste_delta_wordt_genegeerd(maak_game, tmp_path):
+    pad = str(tmp_path / "spel.rpgs")
+    game = maak_game()
+    bewaarbestand = Bewaarbestand(pad)
+    bewaarbestand.koppel(game)
+    bewaarbestand.bewaar(game)
+    game.npcs[0].beweeg(1, 0)
+    bewaarbestand.bewaar(game)
+    bewaarbestand.sluit()
+    with open(pad, "ab") as bestand:
+        bestand.write(b"\x01\x00")  # begin van een positie record
+
+    geladen = maak_game()
+    assert Bewaarbestand(pad).laad(geladen)
+    assert _toestand(geladen) == _toestand(game)
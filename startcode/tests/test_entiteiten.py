@@ -0,0 +1,44 @@
+"""
+Tests voor de EntiteitOpslag en de karakters die erin staan.
+"""
+from entiteiten import EntiteitOpslag
+from models.karakter import Karakter
+
+
+def _karakter(opslag: EntiteitOpslag, x: int = 2, y: int = 3) -> Karakter:
+    karakter = Karakter("Bob", 10, x, y, (1, 2, 3), "hoi")
+    karakter.verhuis(opslag)
+    opslag.neem_gewijzigd()
+    return karakter
+
+
+def test_inventory_lezen_markeert_niet_als_gewijzigd():
+    opslag = EntiteitOpslag()
+    karakter = _karakter(opslag)
+    assert karakter.inventory == []
+    assert not opslag.gewijzigd
+
+    inventory = karakter.inventory
+    inventory.append("sleutel")
+    karakter.inventory = inventory
+    assert opslag.neem_gewijzigd() == {karakter.index}
+    assert karakter.inventory_inhoud() == ("sleutel",)
+
+
+def test_verplaats_markeert_als_gewijzigd():
+    opslag = EntiteitOpslag()
+    karakters = [_karakter(opslag, x) for x in range(3)]
+    opslag.verplaats([karakters[0].index, karakters[2].index], 1, 0)
+    assert opslag.neem_gewijzigd() == {karakters[0].index, karakters[2].index}
+    assert [karakter.x_tile for karakter in karakters] == [1, 1, 3]
+
+
+def test_verhuis_neemt_alles_mee():
+    oud, nieuw = EntiteitOpslag(), EntiteitOpslag()
+    karakter = _karakter(oud, 4, 5)
+    karakter.vlaggen = 3
+    karakter.verhuis(nieuw)
+    assert (karakter.x_tile, karakter.y_tile, karakter.vlaggen, tuple(karakter.kleur[:3])) == (4, 5, 3, (1, 2, 3))
+    assert nieuw.karakter(karakter.index) is karakter
+    assert len(oud) == 0
+    assert not oud.gewijzigd
@@ -0,0 +1,47 @@
+"""
+Tests voor de intentieherkenning (intenties.py) en de INTENTIES van de karakters.
+"""
+from intenties import IntentieHerkenner, herkenner_voor, normaliseer
+from models.karakter import Karakter
+from models.leerkracht import Leerkracht
+
+
+class Sportleraar(Leerkracht):
+    __slots__ = ()
+
+    # Overschrijft "turnzaal" van Leerkracht en voegt een trefwoord toe
+    INTENTIES = {
+        "turnzaal": "naar_klaslokaal",
+        "fluit": "naar_turnzaal",
+    }
+
+
+def test_normaliseer_negeert_hoofdletters_en_accenten():
+    assert normaliseer("Reinig DÉ bord") == "reinig de bord"
+    assert normaliseer("Ëén Çafé") == "een cafe"
+
+
+def test_herkenner_vindt_het_eerste_en_langste_trefwoord():
+    herkenner = IntentieHerkenner({"nig": 1, "reinig": 2, "bord": 3})
+    assert herkenner.eerste("Wil je het bord reinigen?") == ("bord", 3)
+    assert herkenner.eerste("REINIG het") == ("reinig", 2)
+    assert [zin for _, zin, _ in herkenner.zoek("reinig")] == ["reinig", "nig"]
+    assert herkenner.eerste("niets") is None
+
+
+def test_herkenner_voor_voegt_de_intenties_van_superklassen_samen():
+    assert herkenner_voor(Karakter).eerste("turnzaal") is None
+    assert herkenner_voor(Leerkracht).eerste("Naar de TÜRNZAAL!") == ("turnzaal", "naar_turnzaal")
+
+    sport = herkenner_voor(Sportleraar)
+    assert sport.eerste("turnzaal") == ("turnzaal", "naar_klaslokaal")  # de subklasse wint
+    assert sport.eerste("Klaslokaal") == ("klaslokaal", "naar_klaslokaal")  # geërfd
+    assert sport.eerste("waar is je fluit") == ("fluit", "naar_turnzaal")
+    assert herkenner_voor(Sportleraar) is sport  # één keer gebouwd
+
+
+def test_leerkracht_reageert_op_een_intentie():
+    leerkracht = Leerkracht("Dirk", 54, "Geschiedenis", 4, 1, "")
+    antwoord = leerkracht.verwerk_bericht("Gaan we naar het KLASLOKAAL?", [])
+    assert "klaslokaal" in antwoord
+    assert leerkracht.doel is not None
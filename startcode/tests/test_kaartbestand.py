@@ -0,0 +1,73 @@
+"""
+Tests voor kaartbestand.py: een kaart wegschrijven en via mmap terug inlezen.
+"""
+import os
+import random
+import pytest
+from kaartbestand import GechunktRaster, schrijf_kaart, HEADER, INDEX_ITEM
+from tileraster import TileRaster
+
+
+@pytest.fixture
+def kaart(tmp_path):
+    """Een kaart van 50x37 tiles (geen veelvoud van de chunks): links willekeurig, rechts lege vloer."""
+    tiles = TileRaster(50, 37, 0)
+    willekeurig = random.Random(3)
+    for y in range(37):
+        for x in range(24):
+            tiles.zet(x, y, willekeurig.choice((0, 0, 1, 2)))
+    pad = str(tmp_path / "test.kaart")
+    schrijf_kaart(pad, tiles, chunk_grootte=8)
+    return pad, tiles
+
+
+def test_alle_tiles_komen_terug(kaart):
+    pad, tiles = kaart
+    with GechunktRaster(pad) as raster:
+        assert (raster.breedte, raster.hoogte, raster.chunk_grootte) == (50, 37, 8)
+        for y in range(tiles.hoogte):
+            assert raster.rij(0, y, tiles.breedte) == tiles.rij(0, y, tiles.breedte)
+
+
+def test_lege_chunks_hebben_geen_data(kaart):
+    pad, _ = kaart
+    # 7 x 5 chunks. Enkel vloer: x = 24 tot 47 en y = 0 tot 31 (3 x 4 chunks). De chunks op de rand
+    # rechts en onderaan zijn opgevuld met muur, dus die hebben wel data.
+    assert os.path.getsize(pad) == HEADER.size + 35 * INDEX_ITEM.size + (35 - 12) * 8 * 8
+
+
+def test_zet_verandert_het_bestand_niet(kaart):
+    pad, _ = kaart
+    with open(pad, "rb") as bestand:
+        voor = bestand.read()
+    with GechunktRaster(pad) as raster:
+        raster.zet(3, 3, 1)
+        raster.zet(30, 3, 2)
+        assert raster.geef(3, 3) == 1
+        assert raster.geef(30, 3) == 2
+        assert raster.geef(31, 3) == 0  # de gedeelde vulchunk is niet mee veranderd
+        # Gewijzigde chunks blijven bewaard, ook als ze ver van het geladen gebied liggen
+        raster.houd_geladen(40, 30, 49, 36)
+        assert raster.geef(3, 3) == 1
+    with open(pad, "rb") as bestand:
+        assert bestand.read() == voor
+
+
+def test_houd_geladen_meldt_geladen_en_vergeten_chunks(kaart):
+    pad, tiles = kaart
+    gemeld = []
+    with GechunktRaster(pad) as raster:
+        raster.luisteraars.append(lambda chunk_x, chunk_y, codes: gemeld.append((chunk_x, chunk_y, codes is not None)))
+        raster.houd_geladen(0, 0, 7, 7)
+        assert gemeld == [(0, 0, True)]
+        raster.houd_geladen(8, 0, 15, 7)
+        assert gemeld[1:] == [(0, 0, False), (1, 0, True)]
+        assert raster.geef(0, 0) == tiles.geef(0, 0)  # weer ingeladen als hij nodig is
+
+
+def test_geen_kaartbestand(tmp_path):
+    pad = str(tmp_path / "leeg.kaart")
+    with open(pad, "wb") as bestand:
+        bestand.write(b"RPGX" + bytes(HEADER.size))
+    with pytest.raises(ValueError, match="geen geldig kaartbestand"):
+        GechunktRaster(pad)
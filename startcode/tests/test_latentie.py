@@ -0,0 +1,32 @@
+"""
+Tests voor de LatentieMeter en hoe de game hem gebruikt.
+"""
+import pygame
+from latentie import LatentieMeter
+
+
+def test_meter_telt_enkel_getoonde_toetsen():
+    meter = LatentieMeter()
+    meter.ontvangen()
+    meter.ontvangen()
+    meter.verwerkt(1)
+    meter.getoond()
+    assert len(meter.latenties) == 1
+    meter.verwerkt(5)
+    meter.getoond()
+    assert len(meter.latenties) == 2
+    assert all(latentie >= 0 for latentie in meter.latenties)
+
+
+def test_toets_die_niets_verandert_wordt_ook_gemeten(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+    monkeypatch.setattr(main, "LATENTIE_METEN", True)
+    game = main.Game(headless=True, server=None)
+    game.dirty_rects = True
+    game.teken()  # eerste frame: alles
+
+    game.verwerk_input([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_x, unicode="x", mod=0, scancode=0)])
+    game.simuleer()
+    game.teken()  # niets veranderd, dus niets getekend
+    assert len(game.latentie.latenties) == 1
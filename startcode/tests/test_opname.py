@@ -0,0 +1,50 @@
+"""
+Tests voor opname.py: een opgenomen sessie afspelen geeft dezelfde eindtoestand.
+"""
+import pygame
+import pytest
+from opname import Opnemer, Opname, speel_af, toestand_hash, volg_tiles
+
+
+@pytest.fixture
+def game(monkeypatch, tmp_path):
+    import main
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+    monkeypatch.setattr(main, "PROFILER_TRACE_FILE", str(tmp_path / "trace.json"))
+    return main.Game(headless=True, server=None)
+
+
+def _toets(toets: int, tekst: str = "") -> pygame.event.Event:
+    return pygame.event.Event(pygame.KEYDOWN, key=toets, unicode=tekst, mod=0, scancode=0)
+
+
+def test_afspelen_geeft_dezelfde_eindtoestand(game, tmp_path):
+    pad = str(tmp_path / "sessie.rpgo")
+    Opnemer(pad, game, seed=42)
+    toetsen = [pygame.K_RIGHT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_e, pygame.K_t]
+    for toets in toetsen:
+        game.verwerk_input([_toets(toets)])
+        game.simuleer()
+    for letter in "hallo":
+        game.verwerk_input([_toets(ord(letter), letter)])
+        game.simuleer()
+    game.verwerk_input([_toets(pygame.K_F4)])  # profiler trace: wordt niet opgenomen
+    assert "Profiler trace" in game.getoond_bericht
+    game.simuleer()
+    game.opname.sluit(game)
+
+    opname = Opname(pad)
+    assert len(opname.toetsen) == len(toetsen) + len("hallo")
+    afgespeeld = speel_af(opname)
+    assert toestand_hash(afgespeeld) == opname.eind_hash
+    assert (afgespeeld.speler.x_tile, afgespeeld.speler.y_tile) == (game.speler.x_tile, game.speler.y_tile)
+
+
+def test_hash_volgt_gewijzigde_tiles(game):
+    volg_tiles(game.tilemap)
+    voor = toestand_hash(game)
+    game.tilemap.set_tile(3, 3, 1)
+    na = toestand_hash(game)
+    assert na != voor
+    game.tilemap.set_tile(3, 3, 0)
+    assert toestand_hash(game) not in (voor, na)  # versie telt mee: terug naar vloer is niet hetzelfde als nooit veranderd
@@ -0,0 +1,72 @@
+"""
+Tests voor padvinding.py (A* en afstandsvelden) en NPCs die met de padvinder wandelen.
+"""
+import pygame
+from tilemap import TileMap
+from padvinding import PadVinder, AfstandsVeld, zoek_pad, RICHTINGEN
+from models.leerkracht import Leerkracht
+
+
+def _is_geldig_pad(tilemap, pad):
+    stappen = zip(pad, pad[1:])
+    return all((bx - ax, by - ay) in RICHTINGEN for (ax, ay), (bx, by) in stappen) and \
+        not any(tilemap.is_blokkade(x, y) for x, y in pad)
+
+
+def test_zoek_pad_is_even_lang_als_het_afstandsveld():
+    tilemap = TileMap(30, 20)
+    doel = TileMap.DEUREN["turnzaal"]
+    pad = zoek_pad(tilemap, (3, 3), doel)
+
+    assert pad[0] == (3, 3) and pad[-1] == doel
+    assert _is_geldig_pad(tilemap, pad)
+    assert len(pad) - 1 == AfstandsVeld(tilemap, doel).afstand(3, 3)
+
+
+def test_zoek_pad_naar_een_muur_of_te_ver():
+    tilemap = TileMap(30, 20)
+    assert zoek_pad(tilemap, (3, 3), (0, 0)) is None
+    assert zoek_pad(tilemap, (3, 3), TileMap.DEUREN["turnzaal"], max_stappen=5) is None
+    assert zoek_pad(tilemap, (3, 3), (3, 3)) == [(3, 3)]
+
+
+def test_volgende_stap_brengt_dichter_bij_het_doel():
+    tilemap = TileMap(30, 20)
+    veld = AfstandsVeld(tilemap, TileMap.DEUREN["klaslokaal"])
+    x, y = 10, 12
+    while (x, y) != veld.doel:
+        dx, dy = veld.volgende_stap(x, y)
+        assert veld.afstand(x + dx, y + dy) == veld.afstand(x, y) - 1
+        x, y = x + dx, y + dy
+    assert veld.volgende_stap(x, y) is None
+
+
+def test_padvinder_bewaart_velden_tot_er_een_tile_verandert():
+    tilemap = TileMap(30, 20)
+    padvinder = PadVinder(tilemap)
+    doel = TileMap.DEUREN["klaslokaal"]
+    veld = padvinder.veld(doel)
+    assert padvinder.veld(doel) is veld
+
+    tilemap.set_tile(*doel, 1)  # deur dichtmetselen
+    assert padvinder.veld(doel) is not veld
+    assert padvinder.volgende_stap(3, 3, doel) is None
+
+
+def test_leerkracht_wandelt_naar_de_turnzaal(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+    game = main.Game(headless=True, server=None)
+    leerkracht = Leerkracht("Dirk", 54, "Geschiedenis", 4, 1, "")
+    game.voeg_npc_toe(leerkracht)
+
+    game.typing_target = leerkracht
+    game.is_typing = True
+    game.input_text = "Kom mee naar de TURNZAAL"
+    game.verwerk_typing_input(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, unicode="\r"))
+    assert "turnzaal" in game.bericht
+
+    game.spoel_door(game.sim_stap + 60 * main.SIM_STAPPEN_PER_SECONDE)
+    assert (leerkracht.x_tile, leerkracht.y_tile) == TileMap.DEUREN["turnzaal"]
+    assert leerkracht.doel is None
+    assert game.bezetting.op_positie(*TileMap.DEUREN["turnzaal"]) is leerkracht
@@ -0,0 +1,68 @@
+"""
+Tests voor de GedragsPlanner: wie wanneer aan de beurt is, het budget en het uitstellen.
+"""
+from planner import GedragsPlanner
+
+
+class NepNpc:
+    """Een NPC die telt hoe vaak hij aan de beurt was en daarna wachttijd seconden wacht."""
+
+    def __init__(self, naam: str, wachttijd: float | None = None):
+        self.naam = naam
+        self.wachttijd = wachttijd
+        self.beurten = 0
+
+    def update(self, game):
+        self.beurten += 1
+        game.append(self.naam)
+        return self.wachttijd
+
+
+def test_enkel_npcs_die_aan_de_beurt_zijn():
+    planner = GedragsPlanner(budget_ms=1000)
+    a, b = NepNpc("a", 1.0), NepNpc("b")
+    planner.plan(a, 0.5, nu=0.0)
+    planner.plan(b, 2.0, nu=0.0)
+    assert planner.volgende_tijdstip() == 0.5
+
+    volgorde = []
+    assert planner.verwerk(volgorde, nu=0.4) == (0, 0)
+    assert planner.verwerk(volgorde, nu=0.5) == (1, 0)
+    assert planner.verwerk(volgorde, nu=2.0) == (2, 0)  # a opnieuw (na 1 s), b één keer (geeft None)
+    assert sorted(volgorde) == ["a", "a", "b"]
+    assert len(planner) == 1  # enkel a is nog gepland
+    assert planner.volgende_tijdstip() == 3.0
+
+
+def test_budget_stelt_uit_naar_de_volgende_frame():
+    planner = GedragsPlanner(budget_ms=0)  # geen budget: één NPC per frame (minstens één, anders komt er nooit iets van)
+    npcs = [NepNpc(str(nummer)) for nummer in range(5)]
+    for prioriteit, npc in enumerate(npcs):
+        planner.plan(npc, prioriteit=4 - prioriteit, nu=0.0)
+
+    volgorde = []
+    assert planner.verwerk(volgorde, nu=0.0) == (1, 4)
+    assert planner.volgende_tijdstip() == 0.0  # uitgestelde NPCs zijn meteen weer aan de beurt
+    assert planner.verwerk(volgorde, nu=0.0) == (1, 3)
+    for _ in range(3):
+        planner.verwerk(volgorde, nu=0.0)
+    assert volgorde == ["4", "3", "2", "1", "0"]  # laagste prioriteit eerst
+    assert planner.uitgesteld == 0
+    assert planner.volgende_tijdstip() is None
+
+
+def test_uitgestelde_npc_opnieuw_plannen_of_annuleren():
+    planner = GedragsPlanner(budget_ms=0)
+    a, b, c = NepNpc("a"), NepNpc("b"), NepNpc("c")
+    for npc in (a, b, c):
+        planner.plan(npc, nu=0.0)
+
+    volgorde = []
+    assert planner.verwerk(volgorde, nu=0.0) == (1, 2)
+    planner.plan(b, 5.0, nu=0.0)  # b wacht nu toch nog even
+    planner.annuleer(c)
+    assert planner.verwerk(volgorde, nu=0.0) == (0, 0)  # de oude planningen van b en c tellen niet meer
+    assert planner.volgende_tijdstip() == 5.0
+    assert planner.verwerk(volgorde, nu=5.0) == (1, 0)
+    assert volgorde == ["a", "b"]
+    assert (a.beurten, b.beurten, c.beurten) == (1, 1, 0)
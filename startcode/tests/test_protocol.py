@@ -0,0 +1,69 @@
+"""
+Tests voor protocol.py: elk record komt terug zoals het verstuurd werd.
+"""
+import asyncio
+import pytest
+import protocol
+from tileraster import TileRaster
+
+
+@pytest.mark.parametrize("soort, velden, tekst", [
+    (protocol.BEWEEG, (-1, 1), None),
+    (protocol.INTERACTIE, (), None),
+    (protocol.BERICHT, (), "Reinig het bord, AUB! é"),
+    (protocol.NIEUW, (7, 12, 34, 255, 128, 0, 3), "Leerkracht/Dirk"),
+    (protocol.WEG, (7,), None),
+    (protocol.BEWOGEN, (7, 13, 34), None),
+    (protocol.VLAGGEN, (7, 5), None),
+    (protocol.TILE, (3, 4, 1), None),
+    (protocol.TEKST_VOOR_SPELER, (), ""),
+    (protocol.TICK, (123456,), None),
+    (protocol.KLEUR, (7, 1, 2, 3), None),
+])
+def test_record_heen_en_terug(soort, velden, tekst):
+    data = protocol.record(soort, *velden, tekst=tekst)
+    verwacht = (soort, *velden) + ((tekst,) if soort in protocol.MET_TEKST else ())
+    assert list(protocol.lees_records(data)) == [verwacht]
+
+
+def test_welkom_bevat_de_kaart():
+    tiles = TileRaster(20, 10, 0)
+    tiles.rand(1)
+    tiles.zet(5, 5, 1)
+    data = protocol.welkom(3, tiles, 20, 10) + protocol.record(protocol.TICK, 9)
+    welkom, tick = protocol.lees_records(data)
+    assert welkom[:4] == (protocol.WELKOM, 3, 20, 10)
+    assert welkom[4] == b"".join(tiles.rij(0, y, 20) for y in range(10))
+    assert tick == (protocol.TICK, 9)
+
+
+def test_afgekapt_of_onbekend_record_geeft_valueerror():
+    data = protocol.record(protocol.BERICHT, tekst="hallo")
+    with pytest.raises(ValueError, match="afgekapt"):
+        list(protocol.lees_records(data[:-2]))
+    with pytest.raises(ValueError, match="onbekend"):
+        list(protocol.lees_records(b"\xff"))
+
+
+def test_lees_frame():
+    async def lees(data: bytes) -> list:
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        frames = []
+        while True:
+            try:
+                frames.append(await protocol.lees_frame(reader))
+            except asyncio.IncompleteReadError:
+                return frames
+
+    eerste = protocol.frame(protocol.record(protocol.BEWEEG, 1, 0), protocol.record(protocol.INTERACTIE))
+    tweede = protocol.frame(protocol.record(protocol.WEG, 2))
+    frames = asyncio.run(lees(eerste + tweede))
+    assert [list(protocol.lees_records(inhoud)) for inhoud in frames] == [
+        [(protocol.BEWEEG, 1, 0), (protocol.INTERACTIE,)],
+        [(protocol.WEG, 2)],
+    ]
+
+    with pytest.raises(ValueError, match="te groot"):
+        asyncio.run(lees(protocol.FRAME.pack(protocol.MAX_FRAME + 1)))
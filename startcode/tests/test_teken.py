@@ -0,0 +1,58 @@
+"""
+Tests voor teken(): ook subklassen met de oude teken(self, scherm) moeten blijven werken.
+"""
+import pygame
+from config import TILE_SIZE
+from models.karakter import Karakter
+
+ROOD = (255, 0, 0)
+
+
+class OudKarakter(Karakter):
+    """Zoals in de oefeningen: tekent zichzelf in wereld pixels, zonder offset."""
+
+    def teken(self, scherm):
+        pygame.draw.rect(scherm, ROOD, (self.x_tile * TILE_SIZE, self.y_tile * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+
+
+class NieuwKarakter(Karakter):
+    def teken(self, scherm, offset=(0, 0)):
+        pygame.draw.rect(scherm, ROOD, self.geef_rect().move(offset))
+
+
+def _is_rood(scherm, x_tile, y_tile) -> bool:
+    return scherm.get_at((x_tile * TILE_SIZE + TILE_SIZE // 2, y_tile * TILE_SIZE + TILE_SIZE // 2))[:3] == ROOD
+
+
+def test_oude_teken_komt_op_de_plaats_van_de_camera():
+    scherm = pygame.Surface((10 * TILE_SIZE, 10 * TILE_SIZE))
+    karakter = OudKarakter("Oud", 10, 5, 4, (0, 0, 255), "")
+    gewijzigd = set(karakter._opslag.gewijzigd)
+
+    karakter.teken_op_scherm(scherm, (-3 * TILE_SIZE, -2 * TILE_SIZE))
+
+    assert _is_rood(scherm, 2, 2)
+    assert not _is_rood(scherm, 5, 4)
+    # Het karakter staat weer waar het stond, en de opslag denkt niet dat het bewoog
+    assert (karakter.x_tile, karakter.y_tile) == (5, 4)
+    assert karakter._opslag.gewijzigd == gewijzigd
+
+
+def test_teken_met_offset_krijgt_de_offset():
+    scherm = pygame.Surface((10 * TILE_SIZE, 10 * TILE_SIZE))
+    karakter = NieuwKarakter("Nieuw", 10, 5, 4, (0, 0, 255), "")
+    karakter.teken_op_scherm(scherm, (-TILE_SIZE, 0))
+    assert _is_rood(scherm, 4, 4)
+
+
+def test_game_tekent_een_oude_subklasse(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "REGIO_SIMULATIE", False)
+    game = main.Game(headless=True, server=None)
+    karakter = OudKarakter("Oud", 10, game.speler.x_tile + 1, game.speler.y_tile, (0, 0, 255), "")
+    game.voeg_npc_toe(karakter)
+    game.teken_alles()
+
+    x, y = game.camera.offset
+    scherm_x, scherm_y = karakter.x_tile + x // TILE_SIZE, karakter.y_tile + y // TILE_SIZE
+    assert _is_rood(game.scherm, scherm_x, scherm_y)
@@ -0,0 +1,47 @@
+"""
+Tests voor zichtveld.py: wie jij ziet, ziet jou; muren houden het zicht tegen.
+"""
+import random
+import pytest
+from tilemap import TileMap
+from zichtveld import Zichtveld
+
+
+@pytest.fixture
+def kaart():
+    """De schoolkaart met 120 willekeurige extra muren."""
+    tilemap = TileMap(40, 30)
+    willekeurig = random.Random(1)
+    for _ in range(120):
+        tilemap.set_tile(willekeurig.randrange(1, 39), willekeurig.randrange(1, 29), 1)
+    return tilemap
+
+
+def test_zicht_is_symmetrisch(kaart):
+    zichtveld = Zichtveld(kaart, straal=6, max_cache=10_000)
+    vloer = [(x, y) for y in range(kaart.hoogte) for x in range(kaart.breedte) if not kaart.is_blokkade(x, y)]
+    verschillend = [
+        (a, b) for a in vloer for b in vloer
+        if a < b and zichtveld.kan_zien(*a, *b) != zichtveld.kan_zien(*b, *a)
+    ]
+    assert verschillend == []
+
+
+def test_muur_houdt_het_zicht_tegen():
+    tilemap = TileMap(40, 30)
+    zichtveld = Zichtveld(tilemap, straal=8)
+    # Klaslokaal (linksboven) en de gang erbuiten zijn gescheiden door de muur op x = 6
+    assert zichtveld.kan_zien(3, 3, 5, 3)
+    assert not zichtveld.kan_zien(3, 3, 8, 3)
+    assert zichtveld.kan_zien(3, 3, 6, 3)  # de muur zelf zie je wel
+    assert not zichtveld.kan_zien(3, 3, 3 + 9, 3)  # te ver
+
+
+def test_cache_vergeet_zicht_als_een_tile_verandert():
+    tilemap = TileMap(40, 30)
+    zichtveld = Zichtveld(tilemap, straal=8)
+    assert zichtveld.kan_zien(10, 8, 14, 8)
+    tilemap.set_tile(12, 8, 1)
+    assert not zichtveld.kan_zien(10, 8, 14, 8)
+    tilemap.set_tile(12, 8, 0)
+    assert zichtveld.kan_zien(10, 8, 14, 8)
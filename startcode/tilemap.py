@@ -1,8 +1,13 @@
 """
 TileMap - Beheert de spelwereld als een grid van tiles.
 """
+from collections import OrderedDict
 import pygame
-from config import TILE_SIZE, COLORS, SCREEN_WIDTH, SCREEN_HEIGHT, HUD_HEIGHT, MAP_HEIGHT
+from config import TILE_SIZE, CHUNK_SIZE, COLORS, SCREEN_WIDTH, SCREEN_HEIGHT, HUD_HEIGHT, VIEW_WIDTH, VIEW_HEIGHT
+from tekst_cache import tekst_cache
+from tileraster import TileRaster
+from kaartbestand import GechunktRaster
+from botsing import BotsingsKaart
 
 
 class TileMap:
@@ -14,44 +19,92 @@ class TileMap:
     # 1 = muur (blokkeert beweging)
     """
     
-    def __init__(self, breedte: int, hoogte: int):
+    # Deuren van de standaard schoolkaart (veelgebruikte doelen voor padvinding)
+    DEUREN = {
+        "klaslokaal": (5, 6),
+        "turnzaal": (17, 11),
+    }
+    
+    def __init__(self, breedte: int, hoogte: int, tiles=None):
+        """
+        Initialiseer de tilemap.
+        
+        Args:
+            breedte: Aantal tiles breed
+            hoogte: Aantal tiles hoog
+            tiles: Raster met tile codes, of None om de standaard schoolkaart te maken
+        """
         self.breedte = breedte
         self.hoogte = hoogte
-        self.tiles = self._maak_kaart()
+        self.tiles = tiles if tiles is not None else self._maak_kaart()
+        self.versie = 0  # gaat omhoog bij elke tile die verandert
+        self.luisteraars = []  # functies die (x_tile, y_tile, code) krijgen bij elke tile die verandert
+        
+        # Muren (en bezette tiles, zie BezettingsIndex) in één bitmap met een rand rond de kaart.
+        # Van een kaartbestand kennen we enkel de muren van de geladen chunks: de rest telt als muur.
+        if isinstance(self.tiles, GechunktRaster):
+            self.botsing = BotsingsKaart(breedte, hoogte, onbekend=True)
+            self.tiles.luisteraars.append(self._chunk_geladen)
+        else:
+            self.botsing = BotsingsKaart(breedte, hoogte)
+            self.botsing.vul_muren(self.tiles)
+        
+        # Getekende chunks van tiles, worden één keer getekend en daarna hergebruikt.
+        # Enkel de chunks rond de camera blijven bewaard (minst recent gebruikt gaat eruit).
+        self._chunks = OrderedDict()  # (chunk_x, chunk_y) -> Surface
+        self.max_chunks = 2 * (VIEW_WIDTH // CHUNK_SIZE + 2) * (VIEW_HEIGHT // CHUNK_SIZE + 2)
+        
+        # Stukken van de wereld (in pixels) die veranderd zijn sinds de vorige frame
+        self.gewijzigde_rects = []
+        
+        # Plaats van de HUD onderaan het scherm
+        self.hud_rect = pygame.Rect(0, SCREEN_HEIGHT - HUD_HEIGHT, SCREEN_WIDTH, HUD_HEIGHT)
 
     
-    def _maak_kaart(self) -> list[list[int]]:
+    @classmethod
+    def laad(cls, pad: str) -> "TileMap":
+        """
+        Open een kaartbestand (zie kaartbestand.py).
+        Enkel de chunks rond de camera worden ingelezen.
+        
+        Args:
+            pad: Pad van het kaartbestand
+        """
+        tiles = GechunktRaster(pad)
+        return cls(tiles.breedte, tiles.hoogte, tiles)
+    
+
+    def _chunk_geladen(self, chunk_x: int, chunk_y: int, codes):
+        """Houd de muren in de BotsingsKaart bij voor de chunks die het kaartbestand laadt en vergeet."""
+        grootte = self.tiles.chunk_grootte
+        if codes is None:
+            self.botsing.wis_chunk(chunk_x * grootte, chunk_y * grootte, grootte)
+        else:
+            self.botsing.vul_chunk(chunk_x * grootte, chunk_y * grootte, grootte, codes)
+
+
+    def _maak_kaart(self) -> TileRaster:
         """
         Maak een kaart met klaslokaal en turnzaal.
         
         Returns:
-            2D lijst met tile codes
+            TileRaster met tile codes
         """
         # Maak lege kaart (allemaal vloer)
-        tiles = [[0 for _ in range(self.breedte)] for _ in range(self.hoogte)]
+        tiles = TileRaster(self.breedte, self.hoogte, 0)
         
         # Plaats muren aan de randen
-        for x in range(self.breedte):
-            tiles[0][x] = 1  # Bovenkant
-            tiles[self.hoogte - 1][x] = 1  # Onderkant
-        
-        for y in range(self.hoogte):
-            tiles[y][0] = 1  # Linkerkant
-            tiles[y][self.breedte - 1] = 1  # Rechterkant
+        tiles.rand(1)
         
         # Klaslokaal muren (linksboven)
-        for y in range(1, 7):
-            tiles[y][6] = 1  # Rechtermuur klaslokaal
-        for x in range(1, 7):
-            tiles[6][x] = 1  # Ondermuur klaslokaal
-        tiles[6][5] = 0  # Deur uit klaslokaal
-        
-        # Turnzaal muren (rechtsonder)  
-        for y in range(11, self.hoogte - 1):
-            tiles[y][16] = 1  # Linkermuur turnzaal
-        for x in range(16, self.breedte - 1):
-            tiles[11][x] = 1  # Bovenmuur turnzaal
-        tiles[11][17] = 0  # Deur naar turnzaal
+        tiles.verticale_lijn(6, 1, 6, 1)  # Rechtermuur klaslokaal
+        tiles.horizontale_lijn(1, 6, 6, 1)  # Ondermuur klaslokaal
+        tiles.zet(*self.DEUREN["klaslokaal"], 0)  # Deur uit klaslokaal
+        
+        # Turnzaal muren (rechtsonder)
+        tiles.verticale_lijn(16, 11, self.hoogte - 12, 1)  # Linkermuur turnzaal
+        tiles.horizontale_lijn(16, 11, self.breedte - 17, 1)  # Bovenmuur turnzaal
+        tiles.zet(*self.DEUREN["turnzaal"], 0)  # Deur naar turnzaal
         
         return tiles
     
@@ -67,16 +120,87 @@ class TileMap:
             True als de tile geblokkeerd is, anders False
         """
         # Buiten de kaart = geblokkeerd
-        if x_tile < 0 or x_tile >= self.breedte:
-            return True
-        if y_tile < 0 or y_tile >= self.hoogte:
+        if not (0 <= x_tile < self.breedte and 0 <= y_tile < self.hoogte):
             return True
         
         # Check of tile een muur is (code 1)
-        return self.tiles[y_tile][x_tile] == 1
+        return self.botsing.is_muur(x_tile, y_tile)
+    
+
+    def set_tile(self, x_tile: int, y_tile: int, code: int):
+        """
+        Verander de code van één tile.
+        Alleen deze tile wordt opnieuw getekend in de gecachte chunk.
+        
+        Args:
+            x_tile: X-positie in tiles
+            y_tile: Y-positie in tiles
+            code: Nieuwe tile code (0 = vloer, 1 = muur)
+        """
+        if self.tiles.geef(x_tile, y_tile) == code:
+            return
+        self.tiles.zet(x_tile, y_tile, code)
+        self.botsing.zet_muur(x_tile, y_tile, code == 1)
+        self.versie += 1
+        
+        chunk = self._chunks.get((x_tile // CHUNK_SIZE, y_tile // CHUNK_SIZE))
+        if chunk is not None:
+            self._teken_tile(chunk, x_tile, y_tile, (x_tile % CHUNK_SIZE) * TILE_SIZE, (y_tile % CHUNK_SIZE) * TILE_SIZE)
+        self.gewijzigde_rects.append(pygame.Rect(x_tile * TILE_SIZE, y_tile * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        for luisteraar in self.luisteraars:
+            luisteraar(x_tile, y_tile, code)
     
 
-    def teken(self, scherm: pygame.Surface, bericht: str = "", is_typing: bool = False, input_text: str = "", inventory: list = None):
+    def _tile_kleur(self, tile_code: int) -> tuple[int, int, int]:
+        """Bepaal de kleur van een tile op basis van de tile code."""
+        if tile_code == 0:
+            return COLORS["wit"]  # Vloer
+        elif tile_code == 1:
+            return COLORS["donkergrijs"]  # Muur
+        else:
+            return COLORS["grijs"]  # Onbekend
+    
+
+    def _teken_tile(self, surface: pygame.Surface, x_tile: int, y_tile: int, x_px: int, y_px: int):
+        """Teken één tile op een surface, op pixel positie (x_px, y_px)."""
+        kleur = self._tile_kleur(self.tiles.geef(x_tile, y_tile))
+        surface.fill(kleur, (x_px, y_px, TILE_SIZE, TILE_SIZE))
+    
+
+    def _maak_chunk(self, chunk_x: int, chunk_y: int) -> pygame.Surface:
+        """
+        Teken alle tiles van één chunk op een aparte surface.
+        
+        Returns:
+            Surface met de tiles van deze chunk
+        """
+        x_start = chunk_x * CHUNK_SIZE
+        y_start = chunk_y * CHUNK_SIZE
+        x_einde = min(x_start + CHUNK_SIZE, self.breedte)
+        y_einde = min(y_start + CHUNK_SIZE, self.hoogte)
+        
+        chunk = pygame.Surface(((x_einde - x_start) * TILE_SIZE, (y_einde - y_start) * TILE_SIZE))
+        for y in range(y_start, y_einde):
+            for x in range(x_start, x_einde):
+                self._teken_tile(chunk, x, y, (x - x_start) * TILE_SIZE, (y - y_start) * TILE_SIZE)
+        return chunk
+    
+
+    def _geef_chunk(self, chunk_x: int, chunk_y: int) -> pygame.Surface:
+        """Geef een getekende chunk terug; teken hem als hij nog niet bestaat."""
+        sleutel = (chunk_x, chunk_y)
+        chunk = self._chunks.get(sleutel)
+        if chunk is None:
+            chunk = self._maak_chunk(chunk_x, chunk_y)
+            self._chunks[sleutel] = chunk
+            if len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(sleutel)
+        return chunk
+    
+
+    def teken(self, scherm: pygame.Surface, bericht: str = "", is_typing: bool = False, input_text: str = "", inventory: list = None, offset: tuple[int, int] = (0, 0)):
         """
         Teken de tilemap en HUD op het scherm.
         
@@ -86,35 +210,74 @@ class TileMap:
             is_typing: Of de speler aan het typen is
             input_text: De huidige input tekst
             inventory: De inventory lijst van de speler
+            offset: Verschuiving in pixels van wereld naar scherm (zie Camera.offset)
+        """
+        self.teken_tiles(scherm, pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT - HUD_HEIGHT), offset)
+        self.teken_hud(scherm, bericht, is_typing, input_text, inventory)
+    
+
+    def teken_tiles(self, scherm: pygame.Surface, gebied: pygame.Rect | None = None, offset: tuple[int, int] = (0, 0)):
+        """
+        Teken de tiles die in een stuk van het scherm vallen.
+        Enkel de chunks die (deels) zichtbaar zijn worden getekend.
+        
+        Args:
+            scherm: Pygame scherm surface
+            gebied: Rechthoek op het scherm (in pixels) om te tekenen, of None voor het hele scherm
+            offset: Verschuiving in pixels van wereld naar scherm (zie Camera.offset)
+        """
+        if gebied is None:
+            gebied = scherm.get_rect()
+        offset_x, offset_y = offset
+        
+        # Zelfde gebied, maar in wereld pixels
+        wereld = gebied.move(-offset_x, -offset_y)
+        chunk_px = CHUNK_SIZE * TILE_SIZE
+        
+        chunk_x_min = max(0, wereld.left // chunk_px)
+        chunk_y_min = max(0, wereld.top // chunk_px)
+        chunk_x_max = min((self.breedte - 1) // CHUNK_SIZE, (wereld.right - 1) // chunk_px)
+        chunk_y_max = min((self.hoogte - 1) // CHUNK_SIZE, (wereld.bottom - 1) // chunk_px)
+        
+        for chunk_y in range(chunk_y_min, chunk_y_max + 1):
+            for chunk_x in range(chunk_x_min, chunk_x_max + 1):
+                chunk = self._geef_chunk(chunk_x, chunk_y)
+                chunk_rect = chunk.get_rect(topleft=(chunk_x * chunk_px, chunk_y * chunk_px))
+                
+                # Enkel het stuk van de chunk dat binnen het gebied valt
+                deel = wereld.clip(chunk_rect)
+                if deel.width and deel.height:
+                    scherm.blit(chunk, (deel.x + offset_x, deel.y + offset_y), deel.move(-chunk_rect.x, -chunk_rect.y))
+    
+
+    def teken_hud(self, scherm: pygame.Surface, bericht: str = "", is_typing: bool = False, input_text: str = "", inventory: list = None, cursor_zichtbaar: bool = True):
+        """
+        Teken de HUD en, als de speler aan het typen is, het input veld.
+        
+        Args:
+            scherm: Pygame scherm surface
+            bericht: Bericht om in de HUD te tonen
+            is_typing: Of de speler aan het typen is
+            input_text: De huidige input tekst
+            inventory: De inventory lijst van de speler
+            cursor_zichtbaar: Of de (knipperende) typ-cursor getoond wordt
         """
         if inventory is None:
             inventory = []
-        # Teken tiles
-        for y in range(self.hoogte):
-            for x in range(self.breedte):
-                # Bereken pixel positie
-                x_px = x * TILE_SIZE
-                y_px = y * TILE_SIZE
-                
-                # Bepaal kleur op basis van tile type
-                tile_code = self.tiles[y][x]
-                if tile_code == 0:
-                    kleur = COLORS["wit"]  # Vloer
-                elif tile_code == 1:
-                    kleur = COLORS["donkergrijs"]  # Muur
-                else:
-                    kleur = COLORS["grijs"]  # Onbekend
-                
-                # Teken tile
-                rect = pygame.Rect(x_px, y_px, TILE_SIZE, TILE_SIZE)
-                pygame.draw.rect(scherm, kleur, rect)
         
         # Teken HUD onderaan
         self._teken_hud(scherm, bericht, inventory)
         
         # Teken input veld als aan het typen
         if is_typing:
-            self._teken_input_veld(scherm, input_text)
+            self._teken_input_veld(scherm, input_text, cursor_zichtbaar)
+    
+
+    def neem_gewijzigde_rects(self) -> list[pygame.Rect]:
+        """Geef de gewijzigde tile rechthoeken (in wereld pixels) terug en begin een nieuwe lijst."""
+        rects = self.gewijzigde_rects
+        self.gewijzigde_rects = []
+        return rects
     
 
     def _teken_hud(self, scherm: pygame.Surface, bericht: str, inventory: list):
@@ -126,41 +289,37 @@ class TileMap:
             bericht: Het bericht dat getoond moet worden
             inventory: De inventory lijst van de speler
         """
-        # Fonts
-        font = pygame.font.Font(None, 24)
-        klein_font = pygame.font.Font(None, 18)
-        
         # HUD onderaan het scherm
-        hud_y = SCREEN_HEIGHT - HUD_HEIGHT
-        hud_rect = pygame.Rect(0, hud_y, SCREEN_WIDTH, HUD_HEIGHT)
-        pygame.draw.rect(scherm, COLORS["zwart"], hud_rect)
+        hud_y = self.hud_rect.y
+        pygame.draw.rect(scherm, COLORS["zwart"], self.hud_rect)
         
         # Bericht tekst
-        tekst = font.render(bericht, True, COLORS["wit"])
+        tekst = tekst_cache.render(bericht, 24, COLORS["wit"])
         scherm.blit(tekst, (10, hud_y + 15))
         
         # Inventory tekst
         if inventory:
-            inv_tekst = klein_font.render(f"Inventory: {', '.join(inventory)}", True, COLORS["geel"])
+            inv_tekst = tekst_cache.render(f"Inventory: {', '.join(inventory)}", 18, COLORS["geel"])
         else:
-            inv_tekst = klein_font.render("Inventory: leeg", True, COLORS["grijs"])
+            inv_tekst = tekst_cache.render("Inventory: leeg", 18, COLORS["grijs"])
         scherm.blit(inv_tekst, (10, hud_y + 45))
         
         # Instructies rechts
-        instructie = klein_font.render("Pijltjes: bewegen | E: praten | T: typen", True, COLORS["grijs"])
+        instructie = tekst_cache.render("Pijltjes: bewegen | E: praten | T: typen", 18, COLORS["grijs"])
         scherm.blit(instructie, (SCREEN_WIDTH - 280, hud_y + 45))
 
 
-    def _teken_input_veld(self, scherm: pygame.Surface, input_text: str):
+    def _teken_input_veld(self, scherm: pygame.Surface, input_text: str, cursor_zichtbaar: bool = True):
         """
         Teken het tekst-input veld onderaan het scherm.
         
         Args:
             scherm: Pygame scherm surface
             input_text: De huidige input tekst
+            cursor_zichtbaar: Of de cursor getoond wordt
         """
         # Bereken positie onderaan het scherm (na de tilemap)
-        y_positie = MAP_HEIGHT * TILE_SIZE
+        y_positie = self.hud_rect.y
         
         # Achtergrond voor input veld
         input_rect = pygame.Rect(10, y_positie + 10, SCREEN_WIDTH - 20, 30)
@@ -168,6 +327,6 @@ class TileMap:
         pygame.draw.rect(scherm, COLORS["zwart"], input_rect, 2)
         
         # Teken de ingevoerde tekst met cursor
-        font = pygame.font.Font(None, 24)
-        tekst_surface = font.render(f"> {input_text}_", True, COLORS["zwart"])
+        cursor = "_" if cursor_zichtbaar else ""
+        tekst_surface = tekst_cache.render(f"> {input_text}{cursor}", 24, COLORS["zwart"])
         scherm.blit(tekst_surface, (input_rect.x + 5, input_rect.y + 5))
@@ -0,0 +1,100 @@
+"""
+TileRaster - Compacte opslag van tile codes (één byte per tile).
+"""
+
+
+class TileRaster:
+    """
+    Grid van tile codes, opgeslagen in één bytearray.
+
+    # In plaats van een lijst per rij (list[list[int]]) staan alle tiles
+    # rij na rij achter elkaar: tile (x, y) staat op index y * breedte + x.
+    # Eén tile kost zo maar 1 byte en hele rijen of kolommen kunnen in
+    # één keer ingevuld worden met slices.
+    """
+
+    def __init__(self, breedte: int, hoogte: int, code: int = 0):
+        """
+        Maak een raster waarin elke tile dezelfde code heeft.
+
+        Args:
+            breedte: Aantal tiles breed
+            hoogte: Aantal tiles hoog
+            code: Tile code voor elke tile (0 - 255)
+        """
+        self.breedte = breedte
+        self.hoogte = hoogte
+        self.data = bytearray([code]) * (breedte * hoogte)
+
+
+    def geef(self, x: int, y: int) -> int:
+        """Geef de tile code op (x, y)."""
+        return self.data[y * self.breedte + x]
+
+
+    def zet(self, x: int, y: int, code: int):
+        """Zet de tile code op (x, y)."""
+        self.data[y * self.breedte + x] = code
+
+
+    def rij(self, x: int, y: int, lengte: int) -> bytes:
+        """Geef de tile codes van een stuk rij, vanaf (x, y) naar rechts."""
+        start = y * self.breedte + x
+        return bytes(self.data[start:start + lengte])
+
+
+    def houd_geladen(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Niets te doen: een TileRaster zit altijd volledig in het geheugen."""
+
+
+    def horizontale_lijn(self, x: int, y: int, lengte: int, code: int):
+        """
+        Zet een rij tiles naast elkaar op dezelfde code.
+
+        Args:
+            x: X-positie van de eerste tile
+            y: Y-positie van de rij
+            lengte: Aantal tiles naar rechts (inclusief de eerste)
+            code: Tile code
+        """
+        start = y * self.breedte + x
+        self.data[start:start + lengte] = bytes([code]) * lengte
+
+
+    def verticale_lijn(self, x: int, y: int, lengte: int, code: int):
+        """
+        Zet een kolom tiles onder elkaar op dezelfde code.
+
+        Args:
+            x: X-positie van de kolom
+            y: Y-positie van de eerste tile
+            lengte: Aantal tiles naar onder (inclusief de eerste)
+            code: Tile code
+        """
+        start = y * self.breedte + x
+        self.data[start:start + lengte * self.breedte:self.breedte] = bytes([code]) * lengte
+
+
+    def vul_rechthoek(self, x: int, y: int, breedte: int, hoogte: int, code: int):
+        """
+        Zet alle tiles in een rechthoek op dezelfde code.
+
+        Args:
+            x: X-positie linksboven
+            y: Y-positie linksboven
+            breedte: Breedte van de rechthoek in tiles
+            hoogte: Hoogte van de rechthoek in tiles
+            code: Tile code
+        """
+        rij = bytes([code]) * breedte
+        for rij_y in range(y, y + hoogte):
+            start = rij_y * self.breedte + x
+            self.data[start:start + breedte] = rij
+
+
+    def rand(self, code: int):
+        """Zet alle tiles aan de rand van het raster op dezelfde code."""
+        self.horizontale_lijn(0, 0, self.breedte, code)
+        self.horizontale_lijn(0, self.hoogte - 1, self.breedte, code)
+        self.verticale_lijn(0, 0, self.hoogte, code)
+        self.verticale_lijn(self.breedte - 1, 0, self.hoogte, code)
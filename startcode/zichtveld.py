@@ -0,0 +1,320 @@
+"""
+Zichtveld - Wat een karakter kan zien (line of sight) en de mist over de rest van de kaart.
+
+Het zichtveld wordt berekend met (symmetrische) recursieve shadowcasting:
+vanuit de kijker lopen we per kwart (kwadrant) rij na rij naar buiten en
+houden we bij welke hellingen nog niet door een muur afgeschermd zijn.
+Elke tile wordt zo hoogstens één keer per kwadrant bekeken. Een vloertile
+telt enkel als zijn midden in het zichtbare stuk ligt: dan geldt ook
+omgekeerd dat wie jij ziet, jou ziet.
+
+Het resultaat per positie wordt bewaard (LRU cache). Opnieuw rekenen
+gebeurt dus enkel als een kijker naar een nieuwe tile stapt, of als er
+een tile (of een chunk van een kaartbestand) verandert binnen zijn zichtafstand.
+
+De mist (wat de speler al gezien heeft) wordt per chunk onthouden: enkel
+voor chunks waar de speler ooit iets zag, en ingepakt zolang de chunk van
+het kaartbestand niet geladen is. Een grote kaart kost zo enkel geheugen
+voor het stuk dat de speler verkend heeft.
+"""
+from collections import OrderedDict
+import zlib
+import pygame
+from botsing import MUUR
+from kaartbestand import GechunktRaster
+from config import TILE_SIZE, CHUNK_SIZE, COLORS
+
+# (xx, xy, yx, yy): zet (kolom, rij) in een kwadrant om naar (dx, dy): boven, onder, rechts, links
+_KWADRANTEN = ((1, 0, 0, -1), (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0))
+
+# Mist: tiles die je ooit gezien hebt, worden donkerder getekend zoals je ze het laatst zag
+# (kleur * _DONKERDER / 255); tiles die je nooit zag, zijn zwart
+_DONKERDER = (110, 110, 130)
+_ZICHTBAAR = 255  # in een rij met mist: deze tile niet bedekken
+_NOOIT_GEZIEN = 254  # ... helemaal zwart maken (andere waarden zijn tile codes: donkerder tekenen)
+
+
+class Zicht:
+    """
+    Wat zichtbaar is vanaf één tile.
+
+    # Enkel een venster van (2 * straal + 1) tiles breed rond de kijker:
+    # verder kan je toch niet kijken. Eén byte per tile (1 = zichtbaar).
+    """
+
+    __slots__ = ("x", "y", "x_min", "y_min", "breedte", "data")
+
+    def __init__(self, x_tile: int, y_tile: int, straal: int):
+        self.x = x_tile
+        self.y = y_tile
+        self.x_min = x_tile - straal
+        self.y_min = y_tile - straal
+        self.breedte = 2 * straal + 1
+        self.data = bytearray(self.breedte * self.breedte)
+
+
+    def ziet(self, x_tile: int, y_tile: int) -> bool:
+        """Of tile (x_tile, y_tile) zichtbaar is."""
+        x, y = x_tile - self.x_min, y_tile - self.y_min
+        return 0 <= x < self.breedte and 0 <= y < self.breedte and self.data[y * self.breedte + x] == 1
+
+
+class Zichtveld:
+    """
+    Berekent en bewaart zichtvelden op een TileMap.
+
+    # Muren (TileMap.is_blokkade, via de BotsingsKaart) houden het zicht
+    # tegen; karakters niet. De cache luistert naar tile wijzigingen en gooit
+    # enkel de zichtvelden weg die de gewijzigde tile konden zien. Bij een
+    # kaartbestand ook als er een chunk geladen of vergeten wordt: een chunk
+    # die niet geladen is, telt in de BotsingsKaart als muur.
+    """
+
+    def __init__(self, tilemap, straal: int = 8, max_cache: int = 1024):
+        """
+        Initialiseer het zichtveld.
+
+        Args:
+            tilemap: De TileMap
+            straal: Hoe ver een karakter kan kijken (in tiles)
+            max_cache: Aantal posities waarvan het zichtveld bewaard wordt
+        """
+        self.tilemap = tilemap
+        self.straal = straal
+        self.max_cache = max_cache
+        self._cache = OrderedDict()  # (x_tile, y_tile) -> Zicht
+        # Per chunk: per tile de code zoals de speler ze het laatst zag, of _NOOIT_GEZIEN (rij na rij)
+        self.chunk_grootte = getattr(tilemap.tiles, "chunk_grootte", CHUNK_SIZE)
+        self._chunks_breed = (tilemap.breedte + self.chunk_grootte - 1) // self.chunk_grootte
+        self._herinnering = {}  # chunk index -> bytearray, enkel voor chunks waar de speler iets zag
+        self._ingepakt = {}  # chunk index -> zlib bytes, voor chunks die het kaartbestand vergeten is
+        self._nooit_gezien = bytes([_NOOIT_GEZIEN]) * self.chunk_grootte  # één rij van een chunk
+        self._laatst_onthouden = None
+        self._mist_kleuren = {_NOOIT_GEZIEN: COLORS["zwart"]}  # waarde in een rij met mist -> kleur
+        tilemap.luisteraars.append(self._tile_gewijzigd)
+        if isinstance(tilemap.tiles, GechunktRaster):
+            tilemap.tiles.luisteraars.append(self._chunk_gewijzigd)  # na TileMap._chunk_geladen: de muren zijn dan al bijgewerkt
+
+        # Statistieken
+        self.berekend = 0
+        self.uit_cache = 0
+
+
+    def _tile_gewijzigd(self, x_tile: int, y_tile: int, code: int):
+        self._vergeet(x_tile, y_tile, x_tile, y_tile)
+
+
+    def _chunk_gewijzigd(self, chunk_x: int, chunk_y: int, codes):
+        """Een chunk van het kaartbestand werd geladen of vergeten: zijn muren zijn veranderd."""
+        grootte = self.chunk_grootte
+        x_min, y_min = chunk_x * grootte, chunk_y * grootte
+        self._vergeet(x_min, y_min, x_min + grootte - 1, y_min + grootte - 1)
+        if codes is None:
+            # De mist van een vergeten chunk inpakken (meestal grote stukken met dezelfde waarde)
+            herinnering = self._herinnering.pop(chunk_y * self._chunks_breed + chunk_x, None)
+            if herinnering is not None:
+                self._ingepakt[chunk_y * self._chunks_breed + chunk_x] = zlib.compress(herinnering)
+
+
+    def _vergeet(self, x_min: int, y_min: int, x_max: int, y_max: int):
+        """Gooi de zichtvelden weg die een tile binnen de rechthoek konden zien."""
+        straal = self.straal
+        x_min, y_min, x_max, y_max = x_min - straal, y_min - straal, x_max + straal, y_max + straal
+        for sleutel in [(x, y) for x, y in self._cache if x_min <= x <= x_max and y_min <= y <= y_max]:
+            del self._cache[sleutel]
+
+
+    def zicht(self, x_tile: int, y_tile: int) -> Zicht:
+        """Het zichtveld vanaf een tile (uit de cache als het kan)."""
+        sleutel = (x_tile, y_tile)
+        zicht = self._cache.get(sleutel)
+        if zicht is not None:
+            self._cache.move_to_end(sleutel)
+            self.uit_cache += 1
+            return zicht
+
+        zicht = self._bereken(x_tile, y_tile)
+        self.berekend += 1
+        self._cache[sleutel] = zicht
+        if len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+        return zicht
+
+
+    def kan_zien(self, kijker_x: int, kijker_y: int, x_tile: int, y_tile: int) -> bool:
+        """Of een karakter op (kijker_x, kijker_y) tile (x_tile, y_tile) kan zien (bv. voor NPCs)."""
+        if abs(x_tile - kijker_x) > self.straal or abs(y_tile - kijker_y) > self.straal:
+            return False
+        return self.zicht(kijker_x, kijker_y).ziet(x_tile, y_tile)
+
+
+    def _bereken(self, x_tile: int, y_tile: int) -> Zicht:
+        zicht = Zicht(x_tile, y_tile, self.straal)
+        if self.tilemap.botsing.in_kaart(x_tile, y_tile):
+            zicht.data[self.straal * zicht.breedte + self.straal] = 1
+            for kwadrant in _KWADRANTEN:
+                self._werp(zicht, 1, -1, 1, 1, 1, kwadrant)
+        return zicht
+
+
+    def _werp(self, zicht: Zicht, rij: int, begin_teller: int, begin_noemer: int, einde_teller: int, einde_noemer: int,
+              kwadrant: tuple[int, int, int, int]):
+        """
+        Symmetrische shadowcasting in één kwadrant.
+
+        # Hellingen zijn kolom / rij, als breuk teller / noemer (noemer > 0): met gehele getallen
+        # rekenen we exact, zodat een tile op de rand van een schaduw vanuit beide kanten
+        # hetzelfde uitkomt. Muren zie je zodra er een stuk van zichtbaar is.
+
+        Args:
+            rij: Afstand van de eerste rij die we bekijken
+            begin_teller, begin_noemer: Laagste helling die nog zichtbaar is (-1 = diagonaal links)
+            einde_teller, einde_noemer: Hoogste helling die nog zichtbaar is (1 = diagonaal rechts)
+            kwadrant: (xx, xy, yx, yy) uit _KWADRANTEN
+        """
+        xx, xy, yx, yy = kwadrant
+        botsing = self.tilemap.botsing
+        data, rij_breedte, kaart_breedte, kaart_hoogte = botsing.data, botsing.rij_breedte, botsing.breedte, botsing.hoogte
+        straal = self.straal
+        straal_kwadraat = straal * straal + straal  # + straal: de rand wordt wat ronder
+        venster, breedte = zicht.data, zicht.breedte
+        x0, y0 = zicht.x, zicht.y
+
+        for rij in range(rij, straal + 1):
+            # Kolommen die (deels) tussen de hellingen liggen: rij * helling, op een halve tile afgerond
+            min_kolom = (2 * rij * begin_teller + begin_noemer) // (2 * begin_noemer)
+            max_kolom = -((einde_noemer - 2 * rij * einde_teller) // (2 * einde_noemer))
+            vorige_muur = None  # None: nog geen tile bekeken in deze rij
+            for kolom in range(min_kolom, max_kolom + 1):
+                x = x0 + kolom * xx + rij * xy
+                y = y0 + kolom * yx + rij * yy
+                op_kaart = 0 <= x < kaart_breedte and 0 <= y < kaart_hoogte
+                muur = not op_kaart or data[(y + 1) * rij_breedte + x + 1] & MUUR
+                if op_kaart and kolom * kolom + rij * rij <= straal_kwadraat and (
+                        muur or (kolom * begin_noemer >= rij * begin_teller and kolom * einde_noemer <= rij * einde_teller)):
+                    venster[(y - zicht.y_min) * breedte + x - zicht.x_min] = 1
+
+                if vorige_muur and not muur:
+                    # Net voorbij een muur: vanaf hier is er weer zicht
+                    begin_teller, begin_noemer = 2 * kolom - 1, 2 * rij
+                elif vorige_muur is False and muur and rij < straal:
+                    # Muur: het stuk ervoor apart verder bekijken
+                    self._werp(zicht, rij + 1, begin_teller, begin_noemer, 2 * kolom - 1, 2 * rij, kwadrant)
+                vorige_muur = bool(muur)
+            if vorige_muur is not False:
+                return  # de rij eindigde op een muur (of was leeg): alles verder ligt in de schaduw
+
+
+    def onthoud(self, zicht: Zicht):
+        """Onthoud hoe alles in een zichtveld eruitziet (voor de mist)."""
+        if zicht is self._laatst_onthouden:
+            return
+        self._laatst_onthouden = zicht
+        tiles = self.tilemap.tiles
+        kaart_breedte, kaart_hoogte = self.tilemap.breedte, self.tilemap.hoogte
+        c, chunks_breed = self.chunk_grootte, self._chunks_breed
+        for y in range(max(0, zicht.y_min), min(kaart_hoogte, zicht.y_min + zicht.breedte)):
+            rij = (y - zicht.y_min) * zicht.breedte
+            for x in range(max(0, zicht.x_min), min(kaart_breedte, zicht.x_min + zicht.breedte)):
+                if zicht.data[rij + x - zicht.x_min]:
+                    herinnering = self._herinnering_van((y // c) * chunks_breed + x // c, maak=True)
+                    herinnering[(y % c) * c + x % c] = tiles.geef(x, y)
+
+
+    def _herinnering_van(self, chunk_index: int, maak: bool = False) -> bytearray | None:
+        """
+        De mist van één chunk (uitgepakt als het moet).
+
+        Args:
+            chunk_index: Index van de chunk (rij na rij)
+            maak: True = een lege herinnering maken als de speler hier nog niets zag
+
+        Returns:
+            De bytearray, of None als de speler in deze chunk nog niets zag (en maak False is)
+        """
+        herinnering = self._herinnering.get(chunk_index)
+        if herinnering is None:
+            ingepakt = self._ingepakt.pop(chunk_index, None)
+            if ingepakt is not None:
+                herinnering = bytearray(zlib.decompress(ingepakt))
+            elif maak:
+                herinnering = bytearray(self._nooit_gezien) * self.chunk_grootte
+            else:
+                return None
+            self._herinnering[chunk_index] = herinnering
+        return herinnering
+
+
+    def herinnering(self, x_tile: int, y_tile: int, lengte: int) -> bytearray:
+        """
+        De onthouden tile codes van een stuk rij, vanaf (x_tile, y_tile) naar rechts.
+
+        Returns:
+            Per tile de code zoals de speler ze het laatst zag, of _NOOIT_GEZIEN
+        """
+        c = self.chunk_grootte
+        chunk_rij = (y_tile // c) * self._chunks_breed
+        rij_start = (y_tile % c) * c
+        rij = bytearray()
+        x, einde = x_tile, x_tile + lengte
+        while x < einde:
+            stuk = min(einde, (x // c + 1) * c) - x  # tot het einde van deze chunk
+            herinnering = self._herinnering_van(chunk_rij + x // c)
+            if herinnering is None:
+                rij += self._nooit_gezien[:stuk]
+            else:
+                start = rij_start + x % c
+                rij += herinnering[start:start + stuk]
+            x += stuk
+        return rij
+
+
+    def teken_mist(self, scherm: pygame.Surface, zicht: Zicht, gebied: pygame.Rect, offset: tuple[int, int] = (0, 0)):
+        """
+        Bedek de tiles die nu niet zichtbaar zijn (na TileMap.teken_tiles).
+        Aaneengesloten tiles met dezelfde mist worden met één fill() getekend.
+
+        Args:
+            scherm: Pygame scherm surface
+            zicht: Het zichtveld van de speler
+            gebied: Rechthoek op het scherm (in pixels) die net getekend werd
+            offset: Verschuiving in pixels van wereld naar scherm (zie Camera.offset)
+        """
+        offset_x, offset_y = offset
+        wereld = gebied.move(-offset_x, -offset_y)
+        kaart_breedte = self.tilemap.breedte
+        x_min, x_max = max(0, wereld.left // TILE_SIZE), min(kaart_breedte - 1, (wereld.right - 1) // TILE_SIZE)
+        y_min, y_max = max(0, wereld.top // TILE_SIZE), min(self.tilemap.hoogte - 1, (wereld.bottom - 1) // TILE_SIZE)
+        if x_min > x_max:
+            return
+
+        lengte = x_max - x_min + 1
+        for y in range(y_min, y_max + 1):
+            # Per tile: _NOOIT_GEZIEN, de onthouden tile code of _ZICHTBAAR
+            mist = self.herinnering(x_min, y, lengte)
+            venster_y = y - zicht.y_min
+            if 0 <= venster_y < zicht.breedte:
+                for x in range(max(x_min, zicht.x_min), min(x_max, zicht.x_min + zicht.breedte - 1) + 1):
+                    if zicht.data[venster_y * zicht.breedte + x - zicht.x_min]:
+                        mist[x - x_min] = _ZICHTBAAR
+
+            # Aaneengesloten tiles met dezelfde waarde: één fill() (een gewone fill, geen blend: veel sneller)
+            rect_y = y * TILE_SIZE + offset_y
+            begin = 0
+            while begin < lengte:
+                waarde = mist[begin]
+                einde = begin + 1
+                while einde < lengte and mist[einde] == waarde:
+                    einde += 1
+                if waarde != _ZICHTBAAR:
+                    rect = pygame.Rect((x_min + begin) * TILE_SIZE + offset_x, rect_y, (einde - begin) * TILE_SIZE, TILE_SIZE)
+                    scherm.fill(self._mist_kleur(waarde), rect.clip(gebied))
+                begin = einde
+
+
+    def _mist_kleur(self, waarde: int) -> tuple[int, int, int]:
+        kleur = self._mist_kleuren.get(waarde)
+        if kleur is None:
+            kleur = tuple(kanaal * donker // 255 for kanaal, donker in zip(self.tilemap._tile_kleur(waarde), _DONKERDER))
+            self._mist_kleuren[waarde] = kleur
+        return kleur